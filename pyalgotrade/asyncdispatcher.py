@@ -0,0 +1,128 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import asyncio
+
+from pyalgotrade import dispatcher
+from pyalgotrade import observer
+
+
+def _get_fd(signal):
+    ret = None
+    if isinstance(signal, int):
+        ret = signal
+    elif hasattr(signal, "fileno"):
+        ret = signal.fileno()
+    return ret
+
+
+class AsyncioDispatcher(dispatcher.Dispatcher):
+    """A dispatcher that, when there are no events to dispatch, sleeps on an asyncio event loop until one of the
+    subjects signals that events are available (see :meth:`pyalgotrade.observer.Subject.getDataReadySignal`).
+
+    :param loop: The event loop to use. If None, a new event loop is created for each run.
+    :param pollInterval: The maximum number of seconds to wait when there are subjects that can't signal when
+        events are available.
+    :type pollInterval: float.
+
+    .. note::
+        Realtime subjects that return a :class:`pyalgotrade.observer.DataReadySignal` are dispatched only while the
+        signal is set.
+    """
+
+    def __init__(self, loop=None, pollInterval=0.01):
+        super(AsyncioDispatcher, self).__init__()
+        self.__loop = loop
+        self.__runLoop = None
+        self.__pollInterval = pollInterval
+
+    def getEventLoop(self):
+        return self.__runLoop
+
+    def run(self):
+        if self.__loop is None:
+            self.__runLoop = asyncio.new_event_loop()
+        else:
+            self.__runLoop = self.__loop
+        try:
+            super(AsyncioDispatcher, self).run()
+        finally:
+            if self.__loop is None:
+                self.__runLoop.close()
+            self.__runLoop = None
+
+    def _dispatchSubject(self, subject, currEventDateTime):
+        signal = subject.getDataReadySignal()
+        if isinstance(signal, observer.DataReadySignal) and not signal.isSet() and subject.peekDateTime() is None:
+            return False
+        return super(AsyncioDispatcher, self)._dispatchSubject(subject, currEventDateTime)
+
+    def _waitForEvents(self):
+        self.__runLoop.run_until_complete(self.__waitForEvents())
+
+    async def __waitForEvents(self):
+        loop = self.__runLoop
+        wakeUp = asyncio.Event()
+        timeout = None
+        signals = []
+        fds = []
+        tasks = []
+
+        def onSignalSet():
+            loop.call_soon_threadsafe(wakeUp.set)
+
+        try:
+            for subject in self.getSubjects():
+                if subject.eof():
+                    continue
+
+                signal = subject.getDataReadySignal()
+                if signal is None:
+                    timeout = self.__pollInterval
+                elif isinstance(signal, observer.DataReadySignal):
+                    signal.addCallback(onSignalSet)
+                    signals.append(signal)
+                    # The signal may have been set before registering the callback.
+                    if signal.isSet():
+                        wakeUp.set()
+                elif _get_fd(signal) is not None:
+                    fd = _get_fd(signal)
+                    loop.add_reader(fd, wakeUp.set)
+                    fds.append(fd)
+                else:
+                    task = asyncio.ensure_future(signal())
+                    task.add_done_callback(lambda task: wakeUp.set())
+                    tasks.append(task)
+
+            # Don't wait if there is nothing to wait on.
+            if not wakeUp.is_set() and (timeout is not None or signals or fds or tasks):
+                try:
+                    await asyncio.wait_for(wakeUp.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for signal in signals:
+                signal.removeCallback(onSignalSet)
+            for fd in fds:
+                loop.remove_reader(fd)
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
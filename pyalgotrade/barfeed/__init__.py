@@ -50,6 +50,7 @@ class BaseBarFeed(feed.BaseFeed):
         else:
             self.__frequency = [frequency]
         self.__useAdjustedValues = False
+        self.__useColumnarDataSeries = False
         self.__defaultInstrument = None
         self.__currentBars = None
         self.__currentRealtimeBars = None
@@ -70,6 +71,19 @@ class BaseBarFeed(feed.BaseFeed):
         for instrument in self.getRegisteredInstruments():
             self[instrument].setUseAdjustedValues(useAdjusted)
 
+    def setUseColumnarDataSeries(self, useColumnar):
+        """Sets whether to hold bars using :class:`pyalgotrade.dataseries.bards.ColumnarBarDataSeries` instances.
+
+        :param useColumnar: True to use ColumnarBarDataSeries instances instead of BarDataSeries ones.
+        :type useColumnar: boolean.
+
+        .. note::
+            This must be called before any instrument gets registered.
+        """
+        if len(self.getRegisteredInstruments()):
+            raise Exception("Instruments were already registered")
+        self.__useColumnarDataSeries = useColumnar
+
     # Return the datetime for the current bars.
     @abc.abstractmethod
     def getCurrentDateTime(self):
@@ -91,7 +105,10 @@ class BaseBarFeed(feed.BaseFeed):
         raise NotImplementedError()
 
     def createDataSeries(self, key, maxLen):
-        ret = bards.BarDataSeries(maxLen)
+        if self.__useColumnarDataSeries:
+            ret = bards.ColumnarBarDataSeries(maxLen)
+        else:
+            ret = bards.BarDataSeries(maxLen)
         ret.setUseAdjustedValues(self.__useAdjustedValues)
         return ret
 
@@ -180,8 +197,9 @@ class MultiFrequencyBarFeed(BaseBarFeed):
 # This class is used by the optimizer module. The barfeed is already built on the server side,
 # and the bars are sent back to workers.
 class OptimizerBarFeed(BaseBarFeed):
-    def __init__(self, frequency, instruments, bars, maxLen=None):
+    def __init__(self, frequency, instruments, bars, maxLen=None, columnar=False):
         super(OptimizerBarFeed, self).__init__(frequency, maxLen)
+        self.setUseColumnarDataSeries(columnar)
         for instrument in instruments:
             self.registerInstrument(instrument, frequency)
         self.__bars = bars
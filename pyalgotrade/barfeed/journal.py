@@ -0,0 +1,323 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+import math
+import mmap
+import struct
+
+import pytz
+import six
+
+from pyalgotrade import bar
+from pyalgotrade import barfeed
+
+# Journal layout:
+# * Header: MAGIC followed by the format version.
+# * A sequence of records, each one starting with a one byte tag:
+#   * STRING_RECORD: Defines a string (instrument, extra column or timezone name) used by the records that follow.
+#     uint32 id, uint16 length, utf-8 bytes.
+#   * EVENT_RECORD: The bars dispatched by a bar feed.
+#     int64 microseconds since epoch, uint32 timezone string id, uint16 subject id, int32 bars frequency,
+#     uint16 bar count and then, for each bar:
+#     uint32 instrument string id, open, high, low, close, volume, adjClose (doubles), int32 frequency,
+#     uint16 extra column count and (uint32 name string id, double value) for each extra column.
+#
+# Datetimes are stored as UTC for timezone aware datetimes. adjClose None is stored as NaN, and a None
+# frequency as NO_FREQUENCY.
+
+MAGIC = b"PATJ"
+VERSION = 1
+
+STRING_RECORD = b"S"
+EVENT_RECORD = b"E"
+
+NO_FREQUENCY = -2**31
+NAIVE_TZ_ID = 0
+
+_header = struct.Struct("<4sH")
+_string = struct.Struct("<IH")
+_event = struct.Struct("<qIHiH")
+_bar = struct.Struct("<I6diH")
+_extra = struct.Struct("<Id")
+
+_epoch = datetime.datetime(1970, 1, 1)
+_epoch_utc = pytz.utc.localize(_epoch)
+
+
+def _get_tz_name(dateTime):
+    tzinfo = dateTime.tzinfo
+    if tzinfo is None or tzinfo.utcoffset(dateTime) is None:
+        ret = None
+    elif getattr(tzinfo, "zone", None) is not None:
+        ret = tzinfo.zone
+    elif tzinfo.utcoffset(dateTime) == datetime.timedelta(0):
+        ret = "UTC"
+    else:
+        raise Exception("Unsupported timezone %s. Only pytz timezones can be journaled" % tzinfo)
+    return ret
+
+
+def _to_microseconds(dateTime, tzName):
+    if tzName is None:
+        diff = dateTime - _epoch
+    else:
+        diff = dateTime - _epoch_utc
+    return (diff.days * 86400 + diff.seconds) * 1000000 + diff.microseconds
+
+
+def _from_microseconds(microseconds, timeZone):
+    ret = _epoch + datetime.timedelta(microseconds=microseconds)
+    if timeZone is not None:
+        ret = pytz.utc.localize(ret).astimezone(timeZone)
+    return ret
+
+
+def _freq_to_int(frequency):
+    return NO_FREQUENCY if frequency is None else frequency
+
+
+def _int_to_freq(value):
+    return None if value == NO_FREQUENCY else value
+
+
+class Recorder(object):
+    """Writes the bars dispatched by one or more bar feeds to an append-only binary journal that can be
+    replayed using :class:`ReplayBarFeed`.
+
+    :param fileName: The path to the journal file. If it exists, it will be overwritten.
+    :type fileName: string.
+
+    .. note::
+        * Call :meth:`close` once the dispatcher finishes running.
+        * Only numeric extra columns are supported.
+    """
+
+    def __init__(self, fileName):
+        self.__file = open(fileName, "wb")
+        self.__file.write(_header.pack(MAGIC, VERSION))
+        self.__stringIds = {}
+        self.__barFeeds = []
+
+    def __getStringId(self, value):
+        ret = self.__stringIds.get(value)
+        if ret is None:
+            ret = len(self.__stringIds) + 1
+            self.__stringIds[value] = ret
+            encoded = value.encode("utf-8")
+            self.__file.write(STRING_RECORD + _string.pack(ret, len(encoded)) + encoded)
+        return ret
+
+    def attach(self, dispatcher):
+        """Records every bar feed registered with a dispatcher, in dispatch order.
+        Bar feeds get subject ids starting from 0."""
+        for subject in dispatcher.getSubjects():
+            if isinstance(subject, barfeed.BaseBarFeed):
+                self.addBarFeed(subject)
+
+    def addBarFeed(self, barFeed):
+        """Records a bar feed and returns the subject id to use with :class:`ReplayBarFeed`."""
+        ret = len(self.__barFeeds)
+        self.__barFeeds.append(barFeed)
+        barFeed.getNewValuesEvent().subscribe(lambda dateTime, bars: self.__onBars(ret, dateTime, bars))
+        return ret
+
+    def __onBars(self, subjectId, dateTime, bars):
+        tzName = _get_tz_name(dateTime)
+        tzId = NAIVE_TZ_ID if tzName is None else self.__getStringId(tzName)
+        items = bars.items()
+
+        chunks = [EVENT_RECORD, _event.pack(
+            _to_microseconds(dateTime, tzName), tzId, subjectId, _freq_to_int(bars.getBarFrequency()), len(items)
+        )]
+        for instrument, bar_ in items:
+            adjClose = bar_.getAdjClose()
+            extra = bar_.getExtraColumns()
+            chunks.append(_bar.pack(
+                self.__getStringId(instrument),
+                bar_.getOpen(), bar_.getHigh(), bar_.getLow(), bar_.getClose(), bar_.getVolume(),
+                float("nan") if adjClose is None else adjClose,
+                _freq_to_int(bar_.getFrequency()),
+                len(extra)
+            ))
+            for name, value in six.iteritems(extra):
+                chunks.append(_extra.pack(self.__getStringId(name), value))
+        self.__file.write(b"".join(chunks))
+
+    def flush(self):
+        self.__file.flush()
+
+    def close(self):
+        self.__file.close()
+
+
+class ReplayBarFeed(barfeed.BaseBarFeed):
+    """A non real-time bar feed that replays the bars recorded by :class:`Recorder`.
+
+    :param fileName: The path to the journal file.
+    :type fileName: string.
+    :param frequency: The frequency of the bars. Check :class:`pyalgotrade.bar.Frequency`.
+    :param subjectId: The id of the recorded bar feed to replay.
+    :type subjectId: int.
+    :param maxLen: The maximum number of values that the :class:`pyalgotrade.dataseries.bards.BarDataSeries` will hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded
+        from the opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+
+    .. note::
+        The journal file is memory mapped until all the bars are replayed, or until the feed is stopped or closed.
+    """
+
+    def __init__(self, fileName, frequency, subjectId=0, maxLen=None):
+        super(ReplayBarFeed, self).__init__(frequency, maxLen)
+        self.__subjectId = subjectId
+        with open(fileName, "rb") as f:
+            # mmap doesn't support empty files, but a valid journal always has a header.
+            self.__buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = _header.unpack_from(self.__buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            self.__buffer.close()
+            raise Exception("Invalid journal file %s" % fileName)
+        self.__strings = {}
+        self.__timeZones = {NAIVE_TZ_ID: None}
+        self.__registered = set()
+        self.__barsHaveAdjClose = False
+        self.__currDateTime = None
+        self.__pos = _header.size
+        self.__nextEvent = None
+        self.__registerInstruments()
+        self.__readNextEvent()
+        if self.__nextEvent is None:
+            self.close()
+
+    # Make a first pass to register instruments upfront, so dataseries are available before the feed starts.
+    def __registerInstruments(self):
+        buf = self.__buffer
+        while self.__pos < len(buf):
+            self.__readNextEvent()
+            if self.__nextEvent is not None:
+                frequency, barCount, pos = self.__nextEvent[2:]
+                for _ in six.moves.xrange(barCount):
+                    values = _bar.unpack_from(buf, pos)
+                    pos += _bar.size + _extra.size * values[-1]
+                    if not math.isnan(values[6]):
+                        self.__barsHaveAdjClose = True
+                    self.__register(self.__strings[values[0]], _int_to_freq(frequency))
+        self.__pos = _header.size
+
+    # Advances self.__pos up to the next event for our subject and stores its header in self.__nextEvent.
+    def __readNextEvent(self):
+        buf = self.__buffer
+        size = len(buf)
+        self.__nextEvent = None
+        while self.__nextEvent is None and self.__pos < size:
+            tag = buf[self.__pos:self.__pos + 1]
+            pos = self.__pos + 1
+            if tag == STRING_RECORD:
+                stringId, length = _string.unpack_from(buf, pos)
+                pos += _string.size
+                value = buf[pos:pos + length].decode("utf-8")
+                self.__strings[stringId] = value
+                pos += length
+            elif tag == EVENT_RECORD:
+                microseconds, tzId, subjectId, frequency, barCount = _event.unpack_from(buf, pos)
+                pos += _event.size
+                if subjectId == self.__subjectId:
+                    self.__nextEvent = (microseconds, tzId, frequency, barCount, pos)
+                # Skip the bars.
+                for _ in six.moves.xrange(barCount):
+                    extraCount = _bar.unpack_from(buf, pos)[-1]
+                    pos += _bar.size + _extra.size * extraCount
+            else:
+                raise Exception("Invalid record at offset %d" % self.__pos)
+            self.__pos = pos
+
+    def __getTimeZone(self, tzId):
+        ret = self.__timeZones.get(tzId)
+        if ret is None and tzId != NAIVE_TZ_ID:
+            ret = pytz.timezone(self.__strings[tzId])
+            self.__timeZones[tzId] = ret
+        return ret
+
+    def __register(self, instrument, frequency):
+        if (instrument, frequency) not in self.__registered:
+            self.__registered.add((instrument, frequency))
+            self.registerInstrument(instrument, frequency)
+
+    def getCurrentDateTime(self):
+        return self.__currDateTime
+
+    def barsHaveAdjClose(self):
+        return self.__barsHaveAdjClose
+
+    def start(self):
+        super(ReplayBarFeed, self).start()
+
+    def stop(self):
+        self.close()
+
+    def join(self):
+        pass
+
+    def close(self):
+        """Unmaps the journal file. No more bars are replayed after this."""
+        self.__nextEvent = None
+        if self.__buffer is not None:
+            self.__buffer.close()
+            self.__buffer = None
+
+    def eof(self):
+        return self.__nextEvent is None
+
+    def peekDateTime(self):
+        ret = None
+        if self.__nextEvent is not None:
+            microseconds, tzId = self.__nextEvent[0:2]
+            ret = _from_microseconds(microseconds, self.__getTimeZone(tzId))
+        return ret
+
+    def getNextBars(self):
+        if self.__nextEvent is None:
+            return None
+
+        microseconds, tzId, frequency, barCount, pos = self.__nextEvent
+        dateTime = _from_microseconds(microseconds, self.__getTimeZone(tzId))
+        frequency = _int_to_freq(frequency)
+        buf = self.__buffer
+        barDict = {}
+        for _ in six.moves.xrange(barCount):
+            instrumentId, open_, high, low, close, volume, adjClose, barFrequency, extraCount = _bar.unpack_from(buf, pos)
+            pos += _bar.size
+            extra = {}
+            for _ in six.moves.xrange(extraCount):
+                nameId, value = _extra.unpack_from(buf, pos)
+                pos += _extra.size
+                extra[self.__strings[nameId]] = value
+            if math.isnan(adjClose):
+                adjClose = None
+            barDict[self.__strings[instrumentId]] = bar.BasicBar(
+                dateTime, open_, high, low, close, volume, adjClose, _int_to_freq(barFrequency), extra
+            )
+
+        self.__currDateTime = dateTime
+        self.__readNextEvent()
+        if self.__nextEvent is None:
+            self.close()
+        return bar.Bars(barDict, frequecy=frequency)
@@ -48,6 +48,10 @@ class BarFeed(barfeed.BaseBarFeed):
         self.__currDateTime = None
         super(BarFeed, self).reset()
 
+    # Bars held in memory are registered and dispatched using the first frequency the feed was built with.
+    def __getBarFrequency(self):
+        return self.getFrequency()[0]
+
     def getCurrentDateTime(self):
         return self.__currDateTime
 
@@ -72,7 +76,11 @@ class BarFeed(barfeed.BaseBarFeed):
         self.__bars[instrument].extend(bars)
         self.__bars[instrument].sort(key=lambda b: b.getDateTime())
 
-        self.registerInstrument(instrument)
+        self.registerInstrument(instrument, self.__getBarFrequency())
+
+    def getBars(self, instrument):
+        """Returns the list of :class:`pyalgotrade.bar.Bar` held for a given instrument, sorted by datetime."""
+        return self.__bars.get(instrument, [])
 
     def eof(self):
         ret = True
@@ -112,7 +120,7 @@ class BarFeed(barfeed.BaseBarFeed):
             raise Exception("Duplicate bars found for %s on %s" % (list(ret.keys()), smallestDateTime))
 
         self.__currDateTime = smallestDateTime
-        return bar.Bars(ret)
+        return bar.Bars(ret, frequecy=self.__getBarFrequency())
 
     def loadAll(self):
         for dateTime, bars in self:
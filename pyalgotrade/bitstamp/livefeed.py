@@ -218,6 +218,12 @@ class LiveTradeFeed(barfeed.BaseBarFeed):
         # Return None since this is a realtime subject.
         return None
 
+    def getDataReadySignal(self):
+        ret = None
+        if self.__thread is not None and isinstance(self.__thread.getQueue(), observer.DataReadyQueue):
+            ret = self.__thread.getQueue().getDataReadySignal()
+        return ret
+
     # This may raise.
     def start(self):
         super(LiveTradeFeed, self).start()
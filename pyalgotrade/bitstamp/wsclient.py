@@ -20,8 +20,7 @@
 
 import datetime
 
-from six.moves import queue
-
+from pyalgotrade import observer
 from pyalgotrade.websocket import pusher
 from pyalgotrade.websocket import client
 from pyalgotrade.bitstamp import common
@@ -171,7 +170,7 @@ class WebSocketClientThread(client.WebSocketClientThreadBase):
 
     def __init__(self):
         super(WebSocketClientThread, self).__init__()
-        self.__queue = queue.Queue()
+        self.__queue = observer.DataReadyQueue()
         self.__wsClient = None
 
     def getQueue(self):
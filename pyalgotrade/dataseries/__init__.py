@@ -19,7 +19,11 @@
 """
 
 import abc
+import bisect
+import functools
+import numbers
 
+import numpy as np
 import six
 from six.moves import xrange
 
@@ -57,7 +61,9 @@ class DataSeries(object):
         or TypeError if the key type is invalid."""
         if isinstance(key, slice):
             return [self[i] for i in xrange(*key.indices(len(self)))]
-        elif isinstance(key, int):
+        elif isinstance(key, numbers.Integral):
+            # numpy integers too.
+            key = int(key)
             if key < 0:
                 key += len(self)
             if key >= len(self) or key < 0:
@@ -73,7 +79,11 @@ class DataSeries(object):
 
     @abc.abstractmethod
     def getDateTimes(self):
-        """Returns a list of :class:`datetime.datetime` associated with each value."""
+        """Returns a sequence of :class:`datetime.datetime` associated with each value.
+
+        .. note::
+            The sequence may be a read-only view that reflects values appended later. Use list() to get a copy.
+        """
         raise NotImplementedError()
 
 
@@ -84,15 +94,38 @@ class SequenceDataSeries(DataSeries):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param epochDateTimes: True to store datetimes as int64 nanoseconds since epoch instead of datetime.datetime
+        instances. Datetimes must be either all naive or all timezone aware.
+    :type epochDateTimes: boolean.
     """
 
-    def __init__(self, maxLen=None):
+    def __init__(self, maxLen=None, epochDateTimes=False):
         super(SequenceDataSeries, self).__init__()
         maxLen = get_checked_max_len(maxLen)
 
         self.__newValueEvent = observer.Event()
-        self.__values = collections.ListDeque(maxLen)
-        self.__dateTimes = collections.ListDeque(maxLen)
+        self.__values = self._buildValues(maxLen)
+        self.__dateTimes = self._buildDateTimes(maxLen, epochDateTimes)
+        self.__lastDateTime = None
+        self.__sharedDateTimes = False
+
+    # Subclasses can override this to use a different storage for the values.
+    def _buildValues(self, maxLen):
+        return collections.RingDeque(maxLen)
+
+    # Subclasses can override this to use a different storage for the datetimes.
+    def _buildDateTimes(self, maxLen, epochDateTimes):
+        if epochDateTimes:
+            return collections.DateTimeDeque(maxLen)
+        else:
+            return collections.RingDeque(maxLen)
+
+    # Used by dataseries that get values appended in lockstep with dataSeries, like the ones in BarDataSeries,
+    # to reference its datetimes instead of holding a copy. dataSeries must get values appended first.
+    def _shareDateTimes(self, dataSeries):
+        assert(len(self) == 0)
+        self.__dateTimes = dataSeries.__dateTimes
+        self.__sharedDateTimes = True
 
     def __len__(self):
         return len(self.__values)
@@ -103,7 +136,8 @@ class SequenceDataSeries(DataSeries):
     def setMaxLen(self, maxLen):
         """Sets the maximum number of values to hold and resizes accordingly if necessary."""
         self.__values.resize(maxLen)
-        self.__dateTimes.resize(maxLen)
+        if not self.__sharedDateTimes:
+            self.__dateTimes.resize(maxLen)
 
     def getMaxLen(self):
         """Returns the maximum number of values to hold."""
@@ -134,15 +168,105 @@ class SequenceDataSeries(DataSeries):
             If dateTime is not None, it must be greater than the last one.
         """
 
-        if dateTime is not None and len(self.__dateTimes) != 0 and self.__dateTimes[-1] > dateTime:
-            raise Exception("Invalid datetime. "
-                            "It must be bigger than that last one {0} {1}".format(self.__dateTimes[-1], dateTime))
+        if not self.__sharedDateTimes:
+            if dateTime is not None and self.__lastDateTime is not None and self.__lastDateTime > dateTime:
+                raise Exception("Invalid datetime. "
+                                "It must be bigger than that last one {0} {1}".format(self.__lastDateTime, dateTime))
 
-        assert(len(self.__values) == len(self.__dateTimes))
-        self.__dateTimes.append(dateTime)
+            assert(len(self.__values) == len(self.__dateTimes))
+            self.__dateTimes.append(dateTime)
+            self.__lastDateTime = dateTime
         self.__values.append(value)
 
         self.getNewValueEvent().emit(self, dateTime, value)
 
+    # Returns the datetime associated with the value at a given position.
+    def _getDateTimeAbsolute(self, pos):
+        return self.__dateTimes[pos + len(self.__dateTimes) - len(self.__values)]
+
     def getDateTimes(self):
-        return self.__dateTimes.data()
+        ret = self.__dateTimes.data()
+        if self.__sharedDateTimes and len(ret) != len(self.__values):
+            ret = ret[len(ret) - len(self.__values):]
+        return ret
+
+    def getSliceForDateTimes(self, beginDateTime=None, endDateTime=None):
+        """Returns a slice with the positions of the values whose datetimes are >= beginDateTime and < endDateTime
+        using a binary search.
+
+        :param beginDateTime: The first datetime to include. If None, the range starts with the first value.
+        :type beginDateTime: :class:`datetime.datetime`.
+        :param endDateTime: The datetime where the range ends (not included). If None, the range ends with the last value.
+        :type endDateTime: :class:`datetime.datetime`.
+
+        .. note::
+            Datetimes associated with the values must not be None.
+        """
+
+        if isinstance(self.__dateTimes, collections.DateTimeDeque):
+            search = self.__dateTimes.searchsorted
+        else:
+            # RingDeque.data() returns a view, so this doesn't copy the datetimes.
+            search = functools.partial(bisect.bisect_left, self.__dateTimes.data())
+
+        offset = len(self.__dateTimes) - len(self.__values)
+        begin = 0
+        end = len(self.__values)
+        if beginDateTime is not None:
+            begin = max(search(beginDateTime) - offset, 0)
+        if endDateTime is not None:
+            end = max(search(endDateTime) - offset, 0)
+        return slice(begin, end)
+
+
+class NumericSequenceDataSeries(SequenceDataSeries):
+    """A :class:`SequenceDataSeries` that holds float64 values in a NumPy buffer.
+
+    :param maxLen: The maximum number of values to hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    :param nanAsNone: True to return None instead of NaN when accessing a single value.
+    :type nanAsNone: boolean.
+    :param epochDateTimes: True to store datetimes as int64 nanoseconds since epoch.
+    :type epochDateTimes: boolean.
+
+    .. note::
+        * None values are stored as NaN.
+        * Slicing returns a numpy.array that is a view over the buffer and holds NaN for missing values. The view is
+          only valid until the next value is appended.
+    """
+
+    def __init__(self, maxLen=None, nanAsNone=True, epochDateTimes=False):
+        super(NumericSequenceDataSeries, self).__init__(maxLen, epochDateTimes)
+        self.__nanAsNone = nanAsNone
+
+    def _buildValues(self, maxLen):
+        self.__values = self._buildBuffer(maxLen)
+        return self.__values
+
+    # Subclasses can override this to hold the values in a different float64 buffer that behaves like a NumPyDeque.
+    def _buildBuffer(self, maxLen):
+        return collections.NumPyDeque(maxLen, dtype=np.float64)
+
+    def __getitem__(self, key):
+        # Same keys as DataSeries.__getitem__. numpy would also take arrays, lists or floats.
+        if isinstance(key, slice):
+            return self.__values.data()[key]
+        elif isinstance(key, numbers.Integral):
+            ret = self.__values.data()[int(key)]
+            if self.__nanAsNone and ret != ret:
+                ret = None
+            return ret
+        else:
+            raise TypeError("Invalid argument type")
+
+    def getValueAbsolute(self, pos):
+        ret = None
+        if pos >= 0 and pos < len(self.__values):
+            ret = self[pos]
+        return ret
+
+    def asarray(self):
+        """Returns a numpy.array view with all the values. The view is only valid until the next value is appended."""
+        return self.__values.data()
@@ -18,10 +18,15 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import collections
+import heapq
+
+from six.moves import xrange
+
 from pyalgotrade import dataseries
 
 
-def datetime_aligned(ds1, ds2, maxLen=None):
+def datetime_aligned(ds1, ds2, maxLen=None, maxPending=None):
     """
     Returns two dataseries that exhibit only those values whose datetimes are in both dataseries.
 
@@ -33,63 +38,116 @@ def datetime_aligned(ds1, ds2, maxLen=None):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param maxPending: The maximum number of datetimes to keep track of while waiting for values from both dataseries.
+        Once full, the oldest datetimes are discarded. If None then maxLen is used.
+    :type maxPending: int.
+
+    .. note::
+        Values without datetimes are paired in the order they arrive.
     """
+    if maxPending is None:
+        maxPending = maxLen
     aligned1 = dataseries.SequenceDataSeries(maxLen)
     aligned2 = dataseries.SequenceDataSeries(maxLen)
-    Syncer(ds1, ds2, aligned1, aligned2)
+    Syncer(ds1, ds2, aligned1, aligned2, maxPending)
     return (aligned1, aligned2)
 
 
-# This class is responsible for filling 2 dataseries when 2 other dataseries get new values.
-class Syncer(object):
-    def __init__(self, sourceDS1, sourceDS2, destDS1, destDS2):
-        self.__values1 = []  # (datetime, value)
-        self.__values2 = []  # (datetime, value)
-        self.__destDS1 = destDS1
-        self.__destDS2 = destDS2
-        sourceDS1.getNewValueEvent().subscribe(self.__onNewValue1)
-        sourceDS2.getNewValueEvent().subscribe(self.__onNewValue2)
+def datetime_aligned_many(*dataSeries, **kwargs):
+    """
+    Returns a tuple with one dataseries for each dataseries supplied, that exhibit only those values whose datetimes are
+    in all of them.
+
+    :param dataSeries: The DataSeries instances to align.
+    :type dataSeries: :class:`DataSeries`.
+    :param maxLen: The maximum number of values to hold for the returned :class:`DataSeries`.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    :param maxPending: The maximum number of datetimes to keep track of while waiting for values from all dataseries.
+        Once full, the oldest datetimes are discarded. If None then maxLen is used.
+    :type maxPending: int.
+
+    .. note::
+        Values without datetimes are paired in the order they arrive.
+    """
+    maxLen = kwargs.pop("maxLen", None)
+    maxPending = kwargs.pop("maxPending", None)
+    if kwargs:
+        raise TypeError("Unexpected keyword arguments %s" % ", ".join(kwargs.keys()))
+    if len(dataSeries) == 0:
+        raise Exception("At least one dataseries is required")
+
+    if maxPending is None:
+        maxPending = maxLen
+    ret = tuple(dataseries.SequenceDataSeries(maxLen) for _ in dataSeries)
+    MultiSyncer(dataSeries, ret, maxPending)
+    return ret
+
+
+# This class is responsible for filling N dataseries when N other dataseries get new values.
+# Values are buffered by datetime until all the source dataseries have one for it. Since source dataseries are sorted,
+# once that happens, pending datetimes before it can't be matched anymore and are discarded.
+# Each new value takes a dict lookup plus a heap push, and the values are copied to the destination dataseries
+# once per match, so the amortized work per value doesn't depend on the number of dataseries.
+# None datetimes can't be sorted, so values without datetimes are queued for each source dataseries and paired in the
+# order they arrive.
+class MultiSyncer(object):
+    def __init__(self, sourceDSs, destDSs, maxPending=None):
+        assert(len(sourceDSs) == len(destDSs))
+        self.__destDSs = destDSs
+        self.__maxPending = dataseries.get_checked_max_len(maxPending)
+        self.__pending = {}  # datetime -> {source index: value}
+        self.__pendingDateTimes = []  # Heap with the keys in self.__pending.
+        self.__undated = [collections.deque() for _ in destDSs]  # Values without datetimes for each source.
+        self.__undatedReady = 0  # The number of non empty queues in self.__undated.
+        for i, sourceDS in enumerate(sourceDSs):
+            sourceDS.getNewValueEvent().subscribe(self.__buildHandler(i))
         # Source dataseries will keep a reference to self and that will prevent from getting this destroyed.
 
-    # Scan backwards for the position of dateTime in ds.
-    def __findPosForDateTime(self, values, dateTime):
-        ret = None
-        i = len(values) - 1
-        while i >= 0:
-            if values[i][0] == dateTime:
-                ret = i
-                break
-            elif values[i][0] < dateTime:
-                break
-            i -= 1
-        return ret
-
-    def __onNewValue1(self, dataSeries, dateTime, value):
-        pos2 = self.__findPosForDateTime(self.__values2, dateTime)
-        # If a value for dateTime was added to first dataseries, and a value for that same datetime is also in the second one
-        # then append to both destination dataseries.
-        if pos2 is not None:
-            self.__append(dateTime, value, self.__values2[pos2][1])
-            # Reset buffers.
-            self.__values1 = []
-            self.__values2 = self.__values2[pos2+1:]
-        else:
-            # Since source dataseries may not hold all the values we need, we need to buffer manually.
-            self.__values1.append((dateTime, value))
-
-    def __onNewValue2(self, dataSeries, dateTime, value):
-        pos1 = self.__findPosForDateTime(self.__values1, dateTime)
-        # If a value for dateTime was added to second dataseries, and a value for that same datetime is also in the first one
-        # then append to both destination dataseries.
-        if pos1 is not None:
-            self.__append(dateTime, self.__values1[pos1][1], value)
-            # Reset buffers.
-            self.__values1 = self.__values1[pos1+1:]
-            self.__values2 = []
-        else:
-            # Since source dataseries may not hold all the values we need, we need to buffer manually.
-            self.__values2.append((dateTime, value))
-
-    def __append(self, dateTime, value1, value2):
-        self.__destDS1.appendWithDateTime(dateTime, value1)
-        self.__destDS2.appendWithDateTime(dateTime, value2)
+    def __buildHandler(self, pos):
+        return lambda dataSeries, dateTime, value: self.__onNewValue(pos, dateTime, value)
+
+    def __onNewValue(self, pos, dateTime, value):
+        if dateTime is None:
+            self.__onNewUndatedValue(pos, value)
+            return
+
+        values = self.__pending.get(dateTime)
+        if values is None:
+            values = {}
+            self.__pending[dateTime] = values
+            heapq.heappush(self.__pendingDateTimes, dateTime)
+            if self.__maxPending is not None and len(self.__pendingDateTimes) > self.__maxPending:
+                del self.__pending[heapq.heappop(self.__pendingDateTimes)]
+        values[pos] = value
+
+        if len(values) == len(self.__destDSs):
+            # Discard this datetime and the ones before it.
+            while self.__pendingDateTimes and self.__pendingDateTimes[0] <= dateTime:
+                del self.__pending[heapq.heappop(self.__pendingDateTimes)]
+            for i in xrange(len(self.__destDSs)):
+                self.__destDSs[i].appendWithDateTime(dateTime, values[i])
+
+    def __onNewUndatedValue(self, pos, value):
+        queue = self.__undated[pos]
+        queue.append(value)
+        if len(queue) == 1:
+            self.__undatedReady += 1
+        elif len(queue) > self.__maxPending:
+            queue.popleft()
+
+        if self.__undatedReady == len(self.__destDSs):
+            values = []
+            for queue in self.__undated:
+                values.append(queue.popleft())
+                if len(queue) == 0:
+                    self.__undatedReady -= 1
+            for i in xrange(len(self.__destDSs)):
+                self.__destDSs[i].appendWithDateTime(None, values[i])
+
+
+# This class is responsible for filling 2 dataseries when 2 other dataseries get new values.
+class Syncer(MultiSyncer):
+    def __init__(self, sourceDS1, sourceDS2, destDS1, destDS2, maxPending=None):
+        super(Syncer, self).__init__([sourceDS1, sourceDS2], [destDS1, destDS2], maxPending)
@@ -18,10 +18,21 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import pyalgotrade.bar
 from pyalgotrade import dataseries
+from pyalgotrade.utils import collections
 
+import numpy as np
 import six
 
+# The rows in the ColumnarBarDataSeries buffer.
+OPEN = 0
+HIGH = 1
+LOW = 2
+CLOSE = 3
+VOLUME = 4
+ADJ_CLOSE = 5
+
 
 class BarDataSeries(dataseries.SequenceDataSeries):
     """A DataSeries of :class:`pyalgotrade.bar.Bar` instances.
@@ -30,29 +41,51 @@ class BarDataSeries(dataseries.SequenceDataSeries):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param numericColumns: True to hold open, high, low, close, volume and adjusted close values using
+        :class:`pyalgotrade.dataseries.NumericSequenceDataSeries`.
+    :type numericColumns: boolean.
+    :param epochDateTimes: True to store datetimes as int64 nanoseconds since epoch. The datetimes are stored once
+        and shared with the open, high, low, close, volume and adjusted close dataseries.
+    :type epochDateTimes: boolean.
     """
 
-    def __init__(self, maxLen=None):
-        super(BarDataSeries, self).__init__(maxLen)
-        self.__openDS = dataseries.SequenceDataSeries(maxLen)
-        self.__closeDS = dataseries.SequenceDataSeries(maxLen)
-        self.__highDS = dataseries.SequenceDataSeries(maxLen)
-        self.__lowDS = dataseries.SequenceDataSeries(maxLen)
-        self.__volumeDS = dataseries.SequenceDataSeries(maxLen)
-        self.__adjCloseDS = dataseries.SequenceDataSeries(maxLen)
+    def __init__(self, maxLen=None, numericColumns=False, epochDateTimes=False):
+        super(BarDataSeries, self).__init__(maxLen, epochDateTimes)
+        self.__numericColumns = numericColumns
+        self.__openDS = self._buildColumnDataSeries(OPEN, maxLen)
+        self.__closeDS = self._buildColumnDataSeries(CLOSE, maxLen)
+        self.__highDS = self._buildColumnDataSeries(HIGH, maxLen)
+        self.__lowDS = self._buildColumnDataSeries(LOW, maxLen)
+        self.__volumeDS = self._buildColumnDataSeries(VOLUME, maxLen)
+        self.__adjCloseDS = self._buildColumnDataSeries(ADJ_CLOSE, maxLen)
+        if epochDateTimes:
+            for columnDS in [self.__openDS, self.__closeDS, self.__highDS, self.__lowDS, self.__volumeDS, self.__adjCloseDS]:
+                columnDS._shareDateTimes(self)
+        self.__epochDateTimes = epochDateTimes
         self.__extraDS = {}
         self.__useAdjustedValues = False
 
+    # Subclasses can override this to use a different dataseries for the open, high, low, close, volume and adjusted
+    # close values.
+    def _buildColumnDataSeries(self, column, maxLen):
+        if self.__numericColumns:
+            return dataseries.NumericSequenceDataSeries(maxLen)
+        else:
+            return dataseries.SequenceDataSeries(maxLen)
+
     def __getOrCreateExtraDS(self, name):
         ret = self.__extraDS.get(name)
         if ret is None:
-            ret = dataseries.SequenceDataSeries(self.getMaxLen())
+            ret = dataseries.SequenceDataSeries(self.getMaxLen(), self.__epochDateTimes)
             self.__extraDS[name] = ret
         return ret
 
     def setUseAdjustedValues(self, useAdjusted):
         self.__useAdjustedValues = useAdjusted
 
+    def getUseAdjustedValues(self):
+        return self.__useAdjustedValues
+
     def append(self, bar):
         self.appendWithDateTime(bar.getDateTime(), bar)
 
@@ -109,3 +142,123 @@ class BarDataSeries(dataseries.SequenceDataSeries):
     def getExtraDataSeries(self, name):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` for an extra column."""
         return self.__getOrCreateExtraDS(name)
+
+
+# Holds the values for the bars in a ColumnarBarDataSeries.
+class _BarBuffer(object):
+    def __init__(self, maxLen):
+        self.__values = collections.NumPyDeque(maxLen, dtype=np.float64, columns=ADJ_CLOSE + 1)
+        # Frequencies can be None, so they are not kept in a NumPy buffer.
+        self.__frequencies = collections.RingDeque(maxLen)
+        self.__extra = collections.RingDeque(maxLen)
+
+    def getMaxLen(self):
+        return self.__values.getMaxLen()
+
+    def append(self, bar):
+        # None adjusted close values are stored as NaN.
+        self.__values.append((bar.getOpen(), bar.getHigh(), bar.getLow(), bar.getClose(), bar.getVolume(), bar.getAdjClose()))
+        self.__frequencies.append(bar.getFrequency())
+        self.__extra.append(bar.getExtraColumns())
+
+    def resize(self, maxLen):
+        self.__values.resize(maxLen)
+        self.__frequencies.resize(maxLen)
+        self.__extra.resize(maxLen)
+
+    # Returns a 2-D numpy.array view with one row per column.
+    def getValues(self):
+        return self.__values.data()
+
+    def buildBar(self, pos, dateTime):
+        open_, high, low, close, volume, adjClose = self.__values.data()[:, pos].tolist()
+        if adjClose != adjClose:
+            adjClose = None
+        return pyalgotrade.bar.BasicBar(
+            dateTime, open_, high, low, close, volume, adjClose, self.__frequencies[pos], self.__extra[pos]
+        )
+
+    def __len__(self):
+        return len(self.__values)
+
+
+# A read-only view over a row of a _BarBuffer that behaves like a NumPyDeque.
+class _BarColumn(object):
+    def __init__(self, buffer, row):
+        self.__buffer = buffer
+        self.__row = row
+
+    def getMaxLen(self):
+        return self.__buffer.getMaxLen()
+
+    def append(self, value):
+        # The value was already appended to the buffer by ColumnarBarDataSeries.
+        pass
+
+    def data(self):
+        return self.__buffer.getValues()[self.__row]
+
+    def resize(self, maxLen):
+        raise Exception("Column dataseries can't be resized. Resize the ColumnarBarDataSeries instead")
+
+    def __len__(self):
+        return len(self.__buffer)
+
+    def __getitem__(self, key):
+        return self.data()[key]
+
+
+class _ColumnDataSeries(dataseries.NumericSequenceDataSeries):
+    def __init__(self, buffer, row, maxLen):
+        self.__buffer = buffer
+        self.__row = row
+        super(_ColumnDataSeries, self).__init__(maxLen)
+
+    def _buildBuffer(self, maxLen):
+        return _BarColumn(self.__buffer, self.__row)
+
+
+class ColumnarBarDataSeries(BarDataSeries):
+    """A :class:`BarDataSeries` that holds open, high, low, close, volume and adjusted close values in a single
+    NumPy buffer. :class:`pyalgotrade.bar.Bar` instances are only built when accessed.
+
+    :param maxLen: The maximum number of values to hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    :param epochDateTimes: True to store datetimes as int64 nanoseconds since epoch.
+    :type epochDateTimes: boolean.
+
+    .. note::
+        * The open, high, low, close, volume and adjusted close dataseries are
+          :class:`pyalgotrade.dataseries.NumericSequenceDataSeries` instances whose values are views over the buffer,
+          so they can't be resized on their own.
+        * A new :class:`pyalgotrade.bar.Bar` is built every time a value is accessed.
+    """
+
+    def __init__(self, maxLen=None, epochDateTimes=False):
+        super(ColumnarBarDataSeries, self).__init__(maxLen, numericColumns=True, epochDateTimes=epochDateTimes)
+
+    def _buildValues(self, maxLen):
+        self.__buffer = _BarBuffer(maxLen)
+        return self.__buffer
+
+    def _buildColumnDataSeries(self, column, maxLen):
+        ret = _ColumnDataSeries(self.__buffer, column, maxLen)
+        ret._shareDateTimes(self)
+        return ret
+
+    def __getitem__(self, key):
+        return dataseries.DataSeries.__getitem__(self, key)
+
+    def getValueAbsolute(self, pos):
+        ret = None
+        if pos >= 0 and pos < len(self.__buffer):
+            ret = self.__buffer.buildBar(pos, self._getDateTimeAbsolute(pos))
+            ret.setUseAdjustedValue(self.getUseAdjustedValues())
+        return ret
+
+    def getValues(self):
+        """Returns a 2-D numpy.array view with the open, high, low, close, volume and adjusted close values, one row per
+        column. The view is only valid until the next value is appended."""
+        return self.__buffer.getValues()
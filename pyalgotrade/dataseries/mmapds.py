@@ -0,0 +1,79 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import sys
+
+import numpy as np
+
+from pyalgotrade import dataseries
+from pyalgotrade.utils import collections
+
+
+class MemMapDataSeries(dataseries.NumericSequenceDataSeries):
+    """A :class:`pyalgotrade.dataseries.NumericSequenceDataSeries` that stores values and datetimes in memory-mapped
+    files, so it can hold histories that don't fit in memory.
+
+    :param fileName: The path to the file where values will be stored. Datetimes are stored in fileName + ".datetimes".
+        If None, anonymous temporary files are used. Existing files will be overwritten.
+    :type fileName: string.
+    :param maxLen: The maximum number of values to hold. If None, all values are kept and the files grow without bounds.
+        Otherwise files are reused once full, so they hold less than twice maxLen values.
+    :type maxLen: int.
+    :param nanAsNone: True to return None instead of NaN when accessing a single value.
+    :type nanAsNone: boolean.
+
+    .. note::
+        * Datetimes are stored as int64 nanoseconds since epoch, so they must be either all naive or all timezone aware.
+        * The operating system pages values in and out of memory, so only the recently accessed ones stay resident.
+        * :meth:`getDateTimes` returns a read-only view that builds datetimes as they are accessed. Iterating over it,
+          or using list(), builds a datetime.datetime for every value. To search by datetime use
+          :meth:`pyalgotrade.dataseries.SequenceDataSeries.getSliceForDateTimes` instead.
+        * Call :meth:`close` once done.
+    """
+
+    def __init__(self, fileName=None, maxLen=None, nanAsNone=True):
+        self.__fileName = fileName
+        if maxLen is None:
+            maxLen = sys.maxsize
+        super(MemMapDataSeries, self).__init__(maxLen, nanAsNone=nanAsNone, epochDateTimes=True)
+
+    def __getFileName(self, suffix):
+        ret = None
+        if self.__fileName is not None:
+            ret = self.__fileName + suffix
+        return ret
+
+    def _buildBuffer(self, maxLen):
+        self.__values = collections.MemMapDeque(maxLen, dtype=np.float64, fileName=self.__getFileName(""))
+        return self.__values
+
+    def _buildDateTimes(self, maxLen, epochDateTimes):
+        self.__dateTimes = collections.MemMapDeque(maxLen, dtype=np.int64, fileName=self.__getFileName(".datetimes"))
+        return collections.DateTimeDeque(maxLen, self.__dateTimes, lazy=True)
+
+    def flush(self):
+        """Flushes pending changes to disk."""
+        self.__values.flush()
+        self.__dateTimes.flush()
+
+    def close(self):
+        """Flushes pending changes and closes the files. The dataseries can't be used after this."""
+        self.__values.close()
+        self.__dateTimes.close()
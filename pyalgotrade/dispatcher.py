@@ -18,9 +18,13 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import bisect
+import heapq
+
 from pyalgotrade import utils
 from pyalgotrade import observer
 from pyalgotrade import dispatchprio
+from pyalgotrade import instrumentation
 
 
 # This class is responsible for dispatching events from multiple subjects, synchronizing them if necessary.
@@ -67,18 +71,30 @@ class Dispatcher(object):
 
         subject.onDispatcherRegistered(self)
 
+    def _setCurrentDateTime(self, dateTime):
+        self.__currDateTime = dateTime
+
+    # Called after the idle event is emitted. Realtime subjects are responsible for throttling the dispatch loop so
+    # there is nothing to do here.
+    def _waitForEvents(self):
+        pass
+
     # Return True if events were dispatched.
-    def __dispatchSubject(self, subject, currEventDateTime):
+    def _dispatchSubject(self, subject, currEventDateTime):
         ret = False
         # Dispatch if the datetime is currEventDateTime of if its a realtime subject.
         if not subject.eof() and subject.peekDateTime() in (None, currEventDateTime):
-            ret = subject.dispatch() is True
+            stats = instrumentation.current
+            if stats is None:
+                ret = subject.dispatch() is True
+            else:
+                ret = stats.dispatchSubject(subject) is True
         return ret
 
     # Returns a tuple with booleans
     # 1: True if all subjects hit eof
     # 2: True if at least one subject dispatched events.
-    def __dispatch(self):
+    def _dispatch(self):
         smallestDateTime = None
         eof = True
         eventsDispatched = False
@@ -94,7 +110,7 @@ class Dispatcher(object):
             self.__currDateTime = smallestDateTime
 
             for subject in self.__subjects:
-                if self.__dispatchSubject(subject, smallestDateTime):
+                if self._dispatchSubject(subject, smallestDateTime):
                     eventsDispatched = True
         return eof, eventsDispatched
 
@@ -106,11 +122,13 @@ class Dispatcher(object):
             self.__startEvent.emit()
 
             while not self.__stop:
-                eof, eventsDispatched = self.__dispatch()
+                eof, eventsDispatched = self._dispatch()
                 if eof:
                     self.__stop = True
                 elif not eventsDispatched:
                     self.__idleEvent.emit()
+                    if not self.__stop:
+                        self._waitForEvents()
         finally:
             # There are no more events.
             self.__currDateTime = None
@@ -119,3 +137,89 @@ class Dispatcher(object):
                 subject.stop()
             for subject in self.__subjects:
                 subject.join()
+
+
+# This dispatcher keeps non-realtime subjects in a priority queue ordered by (peekDateTime, dispatch order), so
+# the cost of each dispatch step depends on the number of subjects that actually dispatch and not on the total
+# number of subjects.
+# Realtime subjects (those whose peekDateTime() returns None) get checked on every step, just like in Dispatcher.
+#
+# The next datetime of a non-realtime subject is assumed to change only when that subject dispatches. Stale keys
+# are detected and fixed when they reach the top of the queue.
+class HeapDispatcher(Dispatcher):
+    def __init__(self):
+        super(HeapDispatcher, self).__init__()
+        self.__queue = []  # (peekDateTime, dispatch order, subject)
+        self.__realtime = []  # (dispatch order, subject)
+        self.__rebuild = True
+
+    def addSubject(self, subject):
+        super(HeapDispatcher, self).addSubject(subject)
+        # Dispatch order may have changed.
+        self.__rebuild = True
+
+    def __rebuildQueue(self):
+        self.__queue = []
+        self.__realtime = []
+        for order, subject in enumerate(self.getSubjects()):
+            self.__push(order, subject, False)
+        self.__rebuild = False
+
+    # Put the subject into the appropriate container.
+    # Subjects that hit eof are dropped if they were dispatched as non-realtime subjects.
+    def __push(self, order, subject, dropOnEof):
+        if subject.eof():
+            if not dropOnEof:
+                bisect.insort(self.__realtime, (order, subject))
+        else:
+            nextDateTime = subject.peekDateTime()
+            if nextDateTime is None:
+                bisect.insort(self.__realtime, (order, subject))
+            else:
+                heapq.heappush(self.__queue, (nextDateTime, order, subject))
+
+    # Make sure that the subject at the top of the queue has an up to date key.
+    def __fixTop(self):
+        while self.__queue:
+            dateTime, order, subject = self.__queue[0]
+            if subject.eof() or subject.peekDateTime() != dateTime:
+                heapq.heappop(self.__queue)
+                self.__push(order, subject, True)
+            else:
+                break
+
+    def _dispatch(self):
+        if self.__rebuild:
+            self.__rebuildQueue()
+
+        self.__fixTop()
+        smallestDateTime = None
+        eof = True
+        eventsDispatched = False
+
+        if self.__queue:
+            eof = False
+            smallestDateTime = self.__queue[0][0]
+        for _, subject in self.__realtime:
+            if not subject.eof():
+                eof = False
+                smallestDateTime = utils.safe_min(smallestDateTime, subject.peekDateTime())
+
+        if not eof:
+            self._setCurrentDateTime(smallestDateTime)
+
+            # Pop the non-realtime subjects due for dispatch, and merge them with realtime ones to dispatch in order.
+            due = []
+            while self.__queue and self.__queue[0][0] == smallestDateTime:
+                _, order, subject = heapq.heappop(self.__queue)
+                due.append((order, subject))
+            toDispatch = sorted(due + self.__realtime) if due else self.__realtime[:]
+
+            for _, subject in toDispatch:
+                if self._dispatchSubject(subject, smallestDateTime):
+                    eventsDispatched = True
+
+            # Re-key only those subjects that were popped.
+            for order, subject in due:
+                self.__push(order, subject, True)
+        return eof, eventsDispatched
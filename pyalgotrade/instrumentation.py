@@ -0,0 +1,239 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import collections
+import csv
+import timeit
+
+import six
+
+import pyalgotrade.logger
+
+logger = pyalgotrade.logger.getLogger(__name__)
+
+# The active Stats instance, or None if instrumentation is disabled.
+# observer.Event.emit and the dispatchers check this on every call, so keep it as a plain module attribute.
+# observer imports this module, so anything that is not needed to check it, like numpy, gets imported when used.
+current = None
+
+timer = timeit.default_timer
+
+
+def get_handler_key(handler):
+    """Returns a key that identifies an event handler. Bound methods are created every time they are accessed, so they
+    are identified by the function and the instance."""
+    func = getattr(handler, "__func__", None)
+    instance = getattr(handler, "__self__", None)
+    if func is not None and instance is not None:
+        ret = (func, id(instance))
+    else:
+        ret = handler
+    return ret
+
+
+def get_handler_name(handler):
+    """Returns a name for an event handler, to display it. Bound methods are named after the class of the instance,
+    so handlers for different instances of the same class share the name."""
+    func = getattr(handler, "__func__", None)
+    instance = getattr(handler, "__self__", None)
+    if func is not None and instance is not None:
+        ret = "%s.%s" % (type(instance).__name__, func.__name__)
+    else:
+        ret = getattr(handler, "__name__", type(handler).__name__)
+    return ret
+
+
+class Counter(object):
+    """Call count and latencies for a subject or handler.
+
+    :param name: The name.
+    :type name: string.
+    :param maxSamples: The number of most recent latency samples to keep to calculate percentiles.
+    :type maxSamples: int.
+    """
+
+    def __init__(self, name, maxSamples):
+        self.__name = name
+        self.__count = 0
+        self.__total = 0.0
+        self.__max = 0.0
+        self.__samples = collections.deque(maxlen=maxSamples)
+
+    def add(self, elapsed):
+        self.__count += 1
+        self.__total += elapsed
+        self.__max = max(self.__max, elapsed)
+        self.__samples.append(elapsed)
+
+    def getName(self):
+        return self.__name
+
+    def getCount(self):
+        """Returns the number of calls."""
+        return self.__count
+
+    def getTotal(self):
+        """Returns the cumulative time in seconds."""
+        return self.__total
+
+    def getMean(self):
+        ret = None
+        if self.__count:
+            ret = self.__total / self.__count
+        return ret
+
+    def getMax(self):
+        return self.__max
+
+    def getPercentile(self, percentile):
+        """Returns a latency percentile (0 to 100) calculated over the most recent samples, or None."""
+        import numpy as np
+
+        ret = None
+        if len(self.__samples):
+            ret = float(np.percentile(np.fromiter(self.__samples, dtype=float), percentile))
+        return ret
+
+
+class Stats(object):
+    """Holds dispatch and event handler statistics.
+
+    :param maxSamples: The number of most recent latency samples to keep, per subject and per handler,
+        to calculate percentiles.
+    :type maxSamples: int.
+    :param reportInterval: If not None, the number of seconds between reports logged while dispatching.
+    :type reportInterval: float.
+
+    .. note::
+        Handler latencies are inclusive, so they include the time spent in handlers for events emitted
+        while handling the event.
+    """
+
+    PERCENTILES = [50, 90, 99]
+
+    def __init__(self, maxSamples=1000, reportInterval=None):
+        self.__maxSamples = maxSamples
+        self.__subjects = collections.OrderedDict()
+        # Counters by handler key, and the handler for each key. Handlers are kept so the instances they are bound to,
+        # and their ids, stay alive.
+        self.__handlers = collections.OrderedDict()
+        self.__handlerRefs = {}
+        self.__reportInterval = reportInterval
+        self.__lastReport = timer()
+
+    def __getCounter(self, counters, key, name):
+        ret = counters.get(key)
+        if ret is None:
+            ret = Counter(name, self.__maxSamples)
+            counters[key] = ret
+        return ret
+
+    def callHandler(self, handler, args, kwargs):
+        begin = timer()
+        try:
+            handler(*args, **kwargs)
+        finally:
+            elapsed = timer() - begin
+            key = get_handler_key(handler)
+            counter = self.__handlers.get(key)
+            if counter is None:
+                counter = self.__getCounter(self.__handlers, key, get_handler_name(handler))
+                self.__handlerRefs[key] = handler
+            counter.add(elapsed)
+
+    def dispatchSubject(self, subject):
+        begin = timer()
+        try:
+            return subject.dispatch()
+        finally:
+            elapsed = timer() - begin
+            self.__getCounter(self.__subjects, subject, type(subject).__name__).add(elapsed)
+            if self.__reportInterval is not None and begin - self.__lastReport >= self.__reportInterval:
+                self.__lastReport = begin
+                self.logReport()
+
+    def getSubjectStats(self):
+        """Returns a dictionary that maps subjects to :class:`Counter` instances."""
+        return dict(self.__subjects)
+
+    def getHandlerStats(self):
+        """Returns a dictionary that maps handlers to :class:`Counter` instances.
+        Use :meth:`Counter.getName` to get the handler name."""
+        return dict((self.__handlerRefs[key], counter) for key, counter in six.iteritems(self.__handlers))
+
+    def getReport(self):
+        """Returns a list of dictionaries, one for each subject and handler, sorted by cumulative time."""
+        ret = []
+        for kind, counters in [("subject", self.__subjects.values()), ("handler", self.__handlers.values())]:
+            for counter in counters:
+                row = collections.OrderedDict()
+                row["kind"] = kind
+                row["name"] = counter.getName()
+                row["count"] = counter.getCount()
+                row["total"] = counter.getTotal()
+                row["mean"] = counter.getMean()
+                row["max"] = counter.getMax()
+                for percentile in Stats.PERCENTILES:
+                    row["p%d" % percentile] = counter.getPercentile(percentile)
+                ret.append(row)
+        return sorted(ret, key=lambda row: row["total"], reverse=True)
+
+    def logReport(self, logger_=None, top=20):
+        if logger_ is None:
+            logger_ = logger
+        for row in self.getReport()[:top]:
+            logger_.info(" ".join(["%s=%s" % (key, value) for key, value in six.iteritems(row)]))
+
+    def writeCSV(self, fileName):
+        """Writes the report to a CSV file."""
+        report = self.getReport()
+        # The csv module writes its own line terminators, so newlines must not be translated.
+        if six.PY2:
+            f = open(fileName, "wb")
+        else:
+            f = open(fileName, "w", newline="")
+        with f:
+            writer = csv.writer(f)
+            if report:
+                writer.writerow(list(report[0].keys()))
+            for row in report:
+                writer.writerow(list(row.values()))
+
+
+def enable(stats=None):
+    """Enables instrumentation for event handlers and dispatchers.
+
+    :param stats: The instance to collect statistics into. If None, a new one is created.
+    :type stats: :class:`Stats`.
+    :rtype: :class:`Stats`.
+    """
+    global current
+    if stats is None:
+        stats = Stats()
+    current = stats
+    return stats
+
+
+def disable():
+    """Disables instrumentation and returns the :class:`Stats` that were being collected, or None."""
+    global current
+    ret = current
+    current = None
+    return ret
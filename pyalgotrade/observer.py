@@ -19,10 +19,13 @@
 """
 
 import abc
+import threading
 
 import six
+from six.moves import queue
 
 from pyalgotrade import dispatchprio
+from pyalgotrade import instrumentation
 
 
 class Event(object):
@@ -61,14 +64,72 @@ class Event(object):
     def emit(self, *args, **kwargs):
         try:
             self.__emitting += 1
-            for handler in self.__handlers:
-                handler(*args, **kwargs)
+            stats = instrumentation.current
+            if stats is None:
+                for handler in self.__handlers:
+                    handler(*args, **kwargs)
+            else:
+                for handler in self.__handlers:
+                    stats.callHandler(handler, args, kwargs)
         finally:
             self.__emitting -= 1
             if not self.__emitting:
                 self.__applyChanges()
 
 
+# A thread safe flag that subjects set while they have events to dispatch.
+# Callbacks get called (from the thread that sets the signal) every time the signal gets set, so asynchronous
+# dispatchers can wake up instead of polling.
+class DataReadySignal(object):
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__set = False
+        self.__callbacks = []
+
+    def set(self):
+        with self.__lock:
+            self.__set = True
+            callbacks = self.__callbacks[:]
+        for callback in callbacks:
+            callback()
+
+    def clear(self):
+        with self.__lock:
+            self.__set = False
+
+    def isSet(self):
+        return self.__set
+
+    def addCallback(self, callback):
+        with self.__lock:
+            self.__callbacks.append(callback)
+
+    def removeCallback(self, callback):
+        with self.__lock:
+            self.__callbacks.remove(callback)
+
+
+# A queue.Queue that keeps a DataReadySignal set while it is not empty.
+class DataReadyQueue(queue.Queue):
+    def __init__(self, maxsize=0):
+        self.__dataReadySignal = DataReadySignal()
+        queue.Queue.__init__(self, maxsize)
+
+    def getDataReadySignal(self):
+        return self.__dataReadySignal
+
+    # _put and _get get called with the queue mutex acquired.
+    def _put(self, item):
+        queue.Queue._put(self, item)
+        self.__dataReadySignal.set()
+
+    def _get(self):
+        ret = queue.Queue._get(self)
+        if not self._qsize():
+            self.__dataReadySignal.clear()
+        return ret
+
+
 @six.add_metaclass(abc.ABCMeta)
 class Subject(object):
 
@@ -115,6 +176,14 @@ class Subject(object):
     def setDispatchPriority(self, dispatchPrio):
         self.__dispatchPrio = dispatchPrio
 
+    def getDataReadySignal(self):
+        # Returns something that asynchronous dispatchers can wait on until this subject has events to dispatch:
+        # * A DataReadySignal. The subject won't be dispatched, if realtime, while the signal is not set.
+        # * A file descriptor (an int or an object with a fileno() method) that becomes readable.
+        # * A callable that returns an awaitable that completes once events are available.
+        # Return None if the subject can't tell when events will be available, and it will get polled.
+        return None
+
     def onDispatcherRegistered(self, dispatcher):
         # Called when the subject is registered with a dispatcher.
         pass
@@ -104,7 +104,10 @@ def run_impl(strategyClass, barFeed, strategyParameters, batchSize, workerCount=
     serverThread = ServerThread(srv)
     serverThread.start()
     logger.info("Waiting for the server to be ready")
-    srv.waitServing()
+    while not srv.waitServing(1):
+        if not serverThread.is_alive():
+            srv.server_close()
+            raise Exception("The server failed to start")
 
     try:
         logger.info("Starting %s workers" % workerCount)
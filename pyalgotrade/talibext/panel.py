@@ -0,0 +1,356 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import numpy
+import six
+import talib
+from six.moves import xrange
+
+from pyalgotrade import dataseries
+from pyalgotrade.talibext import streaming
+from pyalgotrade.utils import collections
+
+COLUMNS = ["open", "high", "low", "close", "volume"]
+
+
+# NumPy versions of common TA-Lib functions that calculate every row at once. Each one takes one 2-D array, with one
+# row per instrument, for each input, and returns a 2-D array with NaN values until the lookback period is over.
+# They follow the TA-Lib implementations, with the default unstable periods, so results match within rounding errors.
+# Loops go through datetimes only, operating on all the instruments at once.
+
+def _sma(values, timeperiod):
+    ret = numpy.full(values.shape, numpy.nan)
+    if values.shape[1] >= timeperiod:
+        cumSum = numpy.cumsum(values, axis=1)
+        sums = cumSum[:, timeperiod - 1:].copy()
+        sums[:, 1:] -= cumSum[:, :-timeperiod]
+        ret[:, timeperiod - 1:] = sums / float(timeperiod)
+    return ret
+
+
+def _ema(values, timeperiod):
+    ret = numpy.full(values.shape, numpy.nan)
+    if values.shape[1] >= timeperiod:
+        k = 2.0 / (timeperiod + 1)
+        value = values[:, :timeperiod].mean(axis=1)
+        ret[:, timeperiod - 1] = value
+        for i in xrange(timeperiod, values.shape[1]):
+            value = (values[:, i] - value) * k + value
+            ret[:, i] = value
+    return ret
+
+
+def _trange(high, low, close):
+    ret = numpy.full(high.shape, numpy.nan)
+    if high.shape[1] > 1:
+        prevClose = close[:, :-1]
+        ret[:, 1:] = numpy.maximum(
+            numpy.maximum(high[:, 1:] - low[:, 1:], numpy.abs(high[:, 1:] - prevClose)),
+            numpy.abs(low[:, 1:] - prevClose)
+        )
+    return ret
+
+
+def _atr(high, low, close, timeperiod):
+    trueRanges = _trange(high, low, close)
+    if timeperiod == 1:
+        return trueRanges
+    ret = numpy.full(high.shape, numpy.nan)
+    if high.shape[1] > timeperiod:
+        value = trueRanges[:, 1:timeperiod + 1].mean(axis=1)
+        ret[:, timeperiod] = value
+        for i in xrange(timeperiod + 1, high.shape[1]):
+            value = (value * (timeperiod - 1) + trueRanges[:, i]) / float(timeperiod)
+            ret[:, i] = value
+    return ret
+
+
+def _is_zero(values):
+    return (values > -0.00000001) & (values < 0.00000001)
+
+
+def _adx(high, low, close, timeperiod):
+    ret = numpy.full(high.shape, numpy.nan)
+    if high.shape[1] < timeperiod * 2:
+        return ret
+
+    trueRanges = _trange(high, low, close)
+    diffP = numpy.diff(high, axis=1)
+    diffM = -numpy.diff(low, axis=1)
+    # Directional movements, for each datetime after the first one.
+    minusDMs = numpy.where((diffM > 0) & (diffP < diffM), diffM, 0)
+    plusDMs = numpy.where((minusDMs == 0) & (diffP > 0) & (diffP > diffM), diffP, 0)
+
+    rows = high.shape[0]
+    minusDM = numpy.zeros(rows)
+    plusDM = numpy.zeros(rows)
+    trueRange = numpy.zeros(rows)
+    for i in xrange(1, timeperiod):
+        minusDM += minusDMs[:, i - 1]
+        plusDM += plusDMs[:, i - 1]
+        trueRange += trueRanges[:, i]
+
+    adx = numpy.zeros(rows)
+    for i in xrange(timeperiod, high.shape[1]):
+        minusDM = minusDM - minusDM / timeperiod + minusDMs[:, i - 1]
+        plusDM = plusDM - plusDM / timeperiod + plusDMs[:, i - 1]
+        trueRange = trueRange - trueRange / timeperiod + trueRanges[:, i]
+
+        valid = ~_is_zero(trueRange)
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            minusDI = 100.0 * (minusDM / trueRange)
+            plusDI = 100.0 * (plusDM / trueRange)
+            diSum = minusDI + plusDI
+            valid &= ~_is_zero(diSum)
+            dx = 100.0 * (numpy.abs(minusDI - plusDI) / diSum)
+        dx = numpy.where(valid, dx, 0)
+
+        if i < timeperiod * 2 - 1:
+            # Add up the first DX values.
+            adx += dx
+        elif i == timeperiod * 2 - 1:
+            adx = (adx + dx) / timeperiod
+        else:
+            adx = numpy.where(valid, (adx * (timeperiod - 1) + dx) / timeperiod, adx)
+        if i >= timeperiod * 2 - 1:
+            ret[:, i] = adx
+    return ret
+
+
+# Maps TA-Lib function names to the NumPy version, the default for the timeperiod parameter and its minimum value.
+_VECTORIZED = {
+    "SMA": (_sma, 30, 2),
+    "EMA": (_ema, 30, 2),
+    "TRANGE": (_trange, None, None),
+    "ATR": (_atr, 14, 1),
+    "ADX": (_adx, 14, 2),
+}
+
+
+# Returns a function that takes the inputs for every row, or None if the TA-Lib function should be called instead.
+def _get_vectorized(functionName, parameters):
+    vectorized = _VECTORIZED.get(functionName)
+    if vectorized is None:
+        return None
+    func, defaultPeriod, minPeriod = vectorized
+    if defaultPeriod is None:
+        return None if parameters else func
+
+    timeperiod = parameters.get("timeperiod", defaultPeriod)
+    # Let TA-Lib handle unexpected or invalid parameters.
+    if set(parameters) - set(["timeperiod"]) or not isinstance(timeperiod, six.integer_types) or \
+            not minPeriod <= timeperiod <= 100000:
+        return None
+    return lambda *inputs: func(*(inputs + (timeperiod,)))
+
+
+# Calculates a TA-Lib function for each row, where inputs holds one 2-D array, with one row per instrument, for each
+# input. Rows without missing values are calculated at once if there is a NumPy version of the function. Otherwise
+# talib gets called for each row. Rows are contiguous so talib gets called without copying values.
+def _call_rows(functionName, instruments, inputs, parameters, lastOnly):
+    ret = {}
+    pending = xrange(len(instruments))
+    vectorized = _get_vectorized(functionName, parameters)
+    if vectorized is not None and inputs[0].shape[1] > 0:
+        complete = ~numpy.any([numpy.isnan(values).any(axis=1) for values in inputs], axis=0)
+        completeRows = numpy.flatnonzero(complete)
+        if len(completeRows):
+            if len(completeRows) == len(instruments):
+                outputs = vectorized(*inputs)
+            else:
+                outputs = vectorized(*[values[completeRows] for values in inputs])
+            if lastOnly:
+                outputs = outputs[:, -1]
+            for pos, i in enumerate(completeRows.tolist()):
+                ret[instruments[i]] = outputs[pos]
+        pending = numpy.flatnonzero(~complete).tolist()
+
+    talibFunc = getattr(talib, functionName)
+    for i in pending:
+        rows = [values[i] for values in inputs]
+        if lastOnly and (len(rows[0]) == 0 or any(numpy.isnan(row).any() for row in rows)):
+            ret[instruments[i]] = None
+            continue
+
+        outputs = talibFunc(*rows, **parameters)
+        if lastOnly:
+            if isinstance(outputs, tuple):
+                outputs = tuple(output[-1] for output in outputs)
+            else:
+                outputs = outputs[-1]
+        ret[instruments[i]] = outputs
+    return ret
+
+
+def call_talib(functionName, instruments, inputs, **parameters):
+    """Calculates a TA-Lib function for each instrument in an aligned block of values.
+
+    :param functionName: The TA-Lib function name, for example "ATR".
+    :type functionName: string.
+    :param instruments: The instruments, one for each column in the inputs.
+    :type instruments: list.
+    :param inputs: A dictionary that maps input names, like "high", "low" or "close", to 2-D numpy.array instances
+        with one row per datetime and one column per instrument.
+    :type inputs: dict.
+    :param parameters: The TA-Lib function parameters, for example timeperiod=14.
+    :rtype: A dictionary that maps instruments to the TA-Lib function outputs.
+
+    .. note::
+        SMA, EMA, TRANGE, ATR and ADX, with the timeperiod parameter only, are calculated with NumPy for every
+        instrument without missing values at once. TA-Lib gets called once for each instrument for other functions.
+    """
+    # Transpose once so every instrument is contiguous.
+    rowInputs = [
+        numpy.ascontiguousarray(numpy.asarray(inputs[column], dtype=float).T)
+        for column in streaming.get_input_columns(functionName)
+    ]
+    for values in rowInputs:
+        if values.shape[0] != len(instruments):
+            raise Exception("Inputs must have one column per instrument")
+    return _call_rows(functionName, instruments, rowInputs, parameters, False)
+
+
+class Panel(object):
+    """Keeps the last open, high, low, close and volume values for a set of instruments, aligned by datetime,
+    to calculate TA-Lib functions for every instrument.
+
+    :param instruments: The instruments.
+    :type instruments: list.
+    :param maxLen: The maximum number of values to hold for each instrument.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    :param barFeed: If not None, the bar feed to get bars from.
+    :type barFeed: :class:`pyalgotrade.barfeed.BaseBarFeed`.
+    :param useAdjustedValues: True to use adjusted open, high, low and close values.
+    :type useAdjustedValues: boolean.
+    :param frequency: The frequency of the bars to get from barFeed. If None, the first one in the bar feed is used.
+
+    .. note::
+        * Values for every instrument are kept in a single buffer, one row per instrument.
+        * Instruments that have no bar for a given datetime get NaN values.
+        * Check :func:`call_talib` for the functions that are calculated for every instrument at once.
+        * If barFeed is set, the current bars are available from :meth:`pyalgotrade.strategy.BaseStrategy.onBars`.
+    """
+
+    def __init__(self, instruments, maxLen=None, barFeed=None, useAdjustedValues=False, frequency=None):
+        maxLen = dataseries.get_checked_max_len(maxLen)
+        self.__instruments = list(instruments)
+        self.__useAdjustedValues = useAdjustedValues
+        self.__dateTimes = collections.ListDeque(maxLen)
+        self.__values = dict(
+            (column, collections.NumPyDeque(maxLen, columns=len(self.__instruments))) for column in COLUMNS
+        )
+        self.__cache = {}
+        self.__barFeed = barFeed
+        self.__lastBars = None
+        if barFeed is not None:
+            if frequency is None:
+                frequency = barFeed.getFrequency()[0]
+            barFeed.getNewValuesEvent().subscribe(lambda dateTime, bars: self.__update())
+        self.__frequency = frequency
+
+    # The strategy may get the new values event before we do, so the current bars get appended when values are
+    # requested too. Bars with a different frequency are skipped.
+    def __update(self):
+        if self.__barFeed is not None:
+            bars = self.__barFeed.getCurrentBars()
+            if bars is not None and bars is not self.__lastBars:
+                self.__lastBars = bars
+                if bars.getBarFrequency() == self.__frequency:
+                    self.appendBars(bars)
+
+    def appendBars(self, bars):
+        """Appends the values for a :class:`pyalgotrade.bar.Bars` instance."""
+        self.__lastBars = bars
+        adjusted = self.__useAdjustedValues
+        rows = numpy.empty((len(COLUMNS), len(self.__instruments)))
+        for i, instrument in enumerate(self.__instruments):
+            bar = bars.getBar(instrument)
+            if bar is None:
+                rows[:, i] = numpy.nan
+            else:
+                rows[:, i] = (
+                    bar.getOpen(adjusted), bar.getHigh(adjusted), bar.getLow(adjusted), bar.getClose(adjusted),
+                    bar.getVolume()
+                )
+        for column, row in zip(COLUMNS, rows):
+            self.__values[column].append(row)
+        self.__dateTimes.append(bars.getDateTime())
+        self.__cache = {}
+
+    def getInstruments(self):
+        return self.__instruments
+
+    def getDateTimes(self):
+        self.__update()
+        return self.__dateTimes.data()
+
+    def getValues(self, column):
+        """Returns a 2-D numpy.array with the values for a column, like "close", with one row per instrument."""
+        self.__update()
+        return self.__values[column].data()
+
+    def __len__(self):
+        self.__update()
+        return len(self.__dateTimes)
+
+    def __getInputs(self, functionName, count):
+        return [self.__values[column].data()[:, -count:] for column in streaming.get_input_columns(functionName)]
+
+    def evaluate(self, functionName, count, **parameters):
+        """Calculates the newest output of a TA-Lib function for every instrument, like the
+        **pyalgotrade.talibext.indicator** module does using the last count values.
+
+        :param functionName: The TA-Lib function name, for example "ATR".
+        :type functionName: string.
+        :param count: The number of values to calculate the function over. Only the values needed for the newest
+            output are used. Check :func:`pyalgotrade.talibext.streaming.get_window_size`.
+        :type count: int.
+        :param parameters: The TA-Lib function parameters, for example timeperiod=14.
+        :rtype: A dictionary that maps instruments to the newest output, a tuple for functions with multiple outputs,
+            or None if there are no values or values are missing.
+
+        .. note::
+            Results are cached until new bars get appended.
+        """
+        self.__update()
+        key = (functionName, count, tuple(sorted(six.iteritems(parameters))))
+        ret = self.__cache.get(key)
+        if ret is None:
+            windowSize = streaming.get_window_size(functionName, count, **parameters)
+            ret = _call_rows(
+                functionName, self.__instruments, self.__getInputs(functionName, windowSize), parameters, True
+            )
+            self.__cache[key] = ret
+        return ret
+
+    def calculate(self, functionName, **parameters):
+        """Calculates a TA-Lib function over all the values for every instrument.
+
+        :param functionName: The TA-Lib function name, for example "ATR".
+        :type functionName: string.
+        :param parameters: The TA-Lib function parameters, for example timeperiod=14.
+        :rtype: A dictionary that maps instruments to the TA-Lib function outputs.
+        """
+        self.__update()
+        return _call_rows(
+            functionName, self.__instruments, self.__getInputs(functionName, len(self)), parameters, False
+        )
@@ -0,0 +1,166 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import numpy
+import six
+import talib
+from talib import abstract
+
+from pyalgotrade.dataseries import bards
+from pyalgotrade.utils import collections
+
+
+# Functions whose output depends on every previous value, because they accumulate values or use exponential moving
+# averages, that TA-Lib doesn't flag as having an unstable period.
+HISTORY_DEPENDENT_FUNCTIONS = set([
+    "AD", "ADOSC", "DEMA", "MACD", "MACDFIX", "OBV", "SAR", "SAREXT", "STOCHRSI", "TEMA", "TRIX"
+])
+
+# Moving average types that only depend on the values in the period.
+WINDOWED_MA_TYPES = set([talib.MA_Type.SMA, talib.MA_Type.WMA, talib.MA_Type.TRIMA])
+
+UNSTABLE_PERIOD_FLAG = "Function has an unstable period"
+
+
+def is_windowed(functionName, parameters):
+    """Returns True if the newest output of a TA-Lib function only depends on the values in the lookback period,
+    plus the newest one.
+
+    :param functionName: The TA-Lib function name.
+    :type functionName: string.
+    :param parameters: The function parameters, with defaults filled in.
+    :type parameters: dict.
+    """
+    if functionName in HISTORY_DEPENDENT_FUNCTIONS:
+        return False
+    if UNSTABLE_PERIOD_FLAG in (abstract.Function(functionName).info["function_flags"] or []):
+        return False
+    for name, value in six.iteritems(parameters):
+        if name.endswith("matype") and value not in WINDOWED_MA_TYPES:
+            return False
+    return True
+
+
+def get_input_columns(functionName):
+    """Returns the names of the values that a TA-Lib function takes, in order. For example,
+    ["high", "low", "close"] for ATR."""
+    ret = []
+    for inputColumns in abstract.Function(functionName).info["input_names"].values():
+        if isinstance(inputColumns, six.string_types):
+            ret.append(inputColumns)
+        else:
+            ret.extend(inputColumns)
+    return ret
+
+
+def get_window_size(functionName, count, **parameters):
+    """Returns the number of values needed to calculate the newest output of a TA-Lib function, that would be
+    calculated over the last count values."""
+    function = abstract.Function(functionName, **parameters)
+    ret = count
+    if is_windowed(functionName, function.parameters):
+        ret = min(count, function.lookback + 1)
+    return ret
+
+
+class StreamingIndicator(object):
+    """Calculates the newest output of a TA-Lib function as values get appended to a dataseries, calling TA-Lib only
+    over the values it needs.
+
+    :param dataSeries: The dataseries to follow. Use a :class:`pyalgotrade.dataseries.bards.BarDataSeries` for
+        functions that take open, high, low, close or volume values.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param count: The number of values to calculate the function over, like in the
+        **pyalgotrade.talibext.indicator** module.
+    :type count: int.
+    :param functionName: The TA-Lib function name, for example "ATR".
+    :type functionName: string.
+    :param parameters: The TA-Lib function parameters, for example timeperiod=14.
+
+    .. note::
+        * Values are kept in NumPy buffers that get updated as values are appended to the dataseries.
+        * If the newest output only depends on the values in the lookback period, TA-Lib is called with
+          lookback + 1 values. Otherwise, like for EMA or ATR, the last count values are used.
+        * :meth:`getValue` results are cached until the dataseries gets a new value.
+    """
+
+    def __init__(self, dataSeries, count, functionName, **parameters):
+        function = abstract.Function(functionName, **parameters)
+        self.__talibFunc = getattr(talib, functionName)
+        self.__parameters = parameters
+        self.__multipleOutputs = len(function.info["output_names"]) > 1
+        self.__lookback = function.lookback
+        self.__windowSize = get_window_size(functionName, count, **parameters)
+        self.__cache = None
+
+        self.__buffers = []
+        for inputDS in self.__getInputDataSeries(dataSeries, get_input_columns(functionName)):
+            buffer = collections.NumPyDeque(self.__windowSize)
+            # Preload the values that the dataseries already holds.
+            for value in inputDS[-self.__windowSize:]:
+                buffer.append(numpy.nan if value is None else value)
+            inputDS.getNewValueEvent().subscribe(lambda ds, dateTime, value, buffer=buffer: self.__onNewValue(buffer, value))
+            self.__buffers.append(buffer)
+
+    def __getInputDataSeries(self, dataSeries, columns):
+        if not isinstance(dataSeries, bards.BarDataSeries):
+            if len(columns) != 1:
+                raise Exception("A bards.BarDataSeries is required for functions with multiple inputs")
+            return [dataSeries]
+
+        getters = {
+            "open": dataSeries.getOpenDataSeries,
+            "high": dataSeries.getHighDataSeries,
+            "low": dataSeries.getLowDataSeries,
+            "close": dataSeries.getCloseDataSeries,
+            "volume": dataSeries.getVolumeDataSeries,
+        }
+        return [getters[column]() for column in columns]
+
+    def __onNewValue(self, buffer, value):
+        buffer.append(numpy.nan if value is None else value)
+        self.__cache = None
+
+    def getLookback(self):
+        """Returns the number of values that TA-Lib needs before the first output."""
+        return self.__lookback
+
+    def getWindowSize(self):
+        """Returns the number of values TA-Lib gets called with."""
+        return self.__windowSize
+
+    def __calculate(self):
+        inputs = [buffer.data() for buffer in self.__buffers]
+        # Like the talibext.indicator module, None is returned if there are no values, or missing ones.
+        for values in inputs:
+            if len(values) == 0 or numpy.isnan(values).any():
+                return None
+        ret = self.__talibFunc(*inputs, **self.__parameters)
+        if self.__multipleOutputs:
+            ret = tuple(output[-1] for output in ret)
+        else:
+            ret = ret[-1]
+        return ret
+
+    def getValue(self):
+        """Returns the newest output, a tuple for functions with multiple outputs, or None if there are no values."""
+        if self.__cache is None:
+            self.__cache = (self.__calculate(),)
+        return self.__cache[0]
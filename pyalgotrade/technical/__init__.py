@@ -18,8 +18,60 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import copy
+import inspect
+import weakref
+
+import numpy as np
+import six
+from six.moves import xrange
+
 from pyalgotrade.utils import collections
 from pyalgotrade import dataseries
+from pyalgotrade.technical import kernels
+
+try:
+    _getargspec = inspect.getfullargspec
+except AttributeError:
+    _getargspec = inspect.getargspec
+
+
+# Whether EventWindow.backfill overrides use kernels compiled with numba, if available.
+_backfillJITEnabled = True
+
+
+def set_backfill_jit_enabled(enabled):
+    """Enables or disables compiled kernels for :meth:`EventWindow.backfill` overrides.
+
+    :param enabled: True to compile kernels using numba, if it is installed.
+    :type enabled: boolean.
+
+    .. note::
+        * Compiled kernels are enabled by default. Without numba, plain Python/NumPy kernels are used.
+        * Kernels get compiled the first time they are used, so the first backfill takes longer.
+        * Only :meth:`EventBasedFilter.backfill` uses kernels. Filters that get values one at a time, as bars get
+          dispatched, use :meth:`EventWindow.onNewValue` and are not affected by this setting.
+    """
+    global _backfillJITEnabled
+    _backfillJITEnabled = enabled
+
+
+def is_backfill_jit_enabled():
+    """Returns True if :meth:`EventWindow.backfill` overrides use compiled kernels."""
+    return _backfillJITEnabled and kernels.NUMBA_AVAILABLE
+
+
+def get_kernel(name):
+    """Returns a kernel from :mod:`pyalgotrade.technical.kernels`, compiled if :func:`is_backfill_jit_enabled`."""
+    return kernels.get(name, is_backfill_jit_enabled())
+
+
+def split_none(values):
+    """Returns a numpy.array with the values that are not None, and a numpy.array with, for each value,
+    how many of those are there up to and including it."""
+    notNone = np.fromiter((value is not None for value in values), dtype=bool, count=len(values))
+    ret = np.array([value for value in values if value is not None], dtype=float)
+    return ret, np.cumsum(notNone)
 
 
 class EventWindow(object):
@@ -41,12 +93,49 @@ class EventWindow(object):
         assert(isinstance(windowSize, int))
         self.__values = collections.NumPyDeque(windowSize, dtype)
         self.__windowSize = windowSize
+        self.__dtype = dtype
         self.__skipNone = skipNone
 
     def onNewValue(self, dateTime, value):
         if value is not None or not self.__skipNone:
             self.__values.append(value)
 
+    def backfill(self, dateTimes, values):
+        """Feeds the window with past values and returns a list with the value calculated after each one.
+
+        :param dateTimes: The datetimes for the values.
+        :type dateTimes: list.
+        :param values: The values.
+        :type values: list.
+
+        .. note::
+            The default implementation calls :meth:`onNewValue` and :meth:`getValue` for each value.
+            Override to calculate all the values in a single pass, leaving the window in the same state.
+        """
+        ret = []
+        for dateTime, value in zip(dateTimes, values):
+            self.onNewValue(dateTime, value)
+            ret.append(self.getValue())
+        return ret
+
+    # Replaces the values in the window with the last ones from a sequence.
+    # Subclasses that override backfill use this to leave the window in the same state as if onNewValue was called.
+    def _setValues(self, values):
+        self.__values = collections.NumPyDeque(self.__windowSize, self.__dtype)
+        for value in values[-self.__windowSize:]:
+            self.__values.append(value)
+
+    def getState(self):
+        """Returns a snapshot of the window, with the values in it and any accumulated values like smoothed averages,
+        that can be pickled and passed to :meth:`setState`."""
+        return copy.deepcopy(self.__dict__)
+
+    def setState(self, state):
+        """Restores a snapshot taken with :meth:`getState` from an event window of the same class and size."""
+        if set(state) != set(self.__dict__) or state["_EventWindow__windowSize"] != self.__windowSize:
+            raise Exception("The state doesn't match the event window")
+        self.__dict__.update(copy.deepcopy(state))
+
     def getValues(self):
         """Returns a numpy.array with the values in the window."""
         return self.__values.data()
@@ -82,8 +171,15 @@ class EventBasedFilter(dataseries.SequenceDataSeries):
         self.__dataSeries = dataSeries
         self.__dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
         self.__eventWindow = eventWindow
+        # Values up to this datetime were already processed before the state got restored.
+        self.__resumeDateTime = None
 
     def __onNewValue(self, dataSeries, dateTime, value):
+        if self.__resumeDateTime is not None:
+            if dateTime is not None and dateTime <= self.__resumeDateTime:
+                return
+            self.__resumeDateTime = None
+
         # Let the event window perform calculations.
         self.__eventWindow.onNewValue(dateTime, value)
         # Get the resulting value
@@ -91,8 +187,151 @@ class EventBasedFilter(dataseries.SequenceDataSeries):
         # Add the new value.
         self.appendWithDateTime(dateTime, newValue)
 
+    def backfill(self):
+        """Calculates values for the ones that the dataseries being filtered already holds, and continues incrementally
+        after that. Event windows that override :meth:`EventWindow.backfill` do this in a single pass, using kernels
+        compiled with numba if :func:`is_backfill_jit_enabled`.
+
+        .. note::
+            This must be called before the filter gets any value.
+        """
+        if len(self) != 0:
+            raise Exception("The filter already has values")
+
+        dateTimes = self.__dataSeries.getDateTimes()
+        values = self.__dataSeries[:]
+        if isinstance(values, np.ndarray):
+            # Numeric dataseries hold NaN for missing values.
+            values = [None if value != value else value for value in values.tolist()]
+        newValues = self.__eventWindow.backfill(dateTimes, values)
+        # Older values would be discarded anyway.
+        for i in xrange(max(len(newValues) - self.getMaxLen(), 0), len(newValues)):
+            self.appendWithDateTime(dateTimes[i], newValues[i])
+
+    def getState(self):
+        """Returns a snapshot of the filter, that can be pickled and passed to :meth:`setState` to resume calculations,
+        for example after a restart, without replaying every value.
+        It includes the event window state, the values in the filter and the datetime for the last one.
+        """
+        dateTimes = list(self.getDateTimes())
+        return {
+            "window": self.__eventWindow.getState(),
+            "dateTimes": dateTimes,
+            "values": list(self[:]),
+            "lastDateTime": dateTimes[-1] if len(dateTimes) else None,
+        }
+
+    def setState(self, state):
+        """Restores a snapshot taken with :meth:`getState`, and continues incrementally after that.
+
+        .. note::
+            * This must be called before the filter gets any value.
+            * Values for datetimes up to the last one in the snapshot are skipped, so the dataseries being filtered
+              can be filled with the bars since then, even if some of them were already processed.
+        """
+        if len(self) != 0:
+            raise Exception("The filter already has values")
+
+        self.__eventWindow.setState(state["window"])
+        dateTimes = state["dateTimes"]
+        values = state["values"]
+        # Bypass appendWithDateTime overrides since values were already calculated.
+        for i in xrange(max(len(values) - self.getMaxLen(), 0), len(values)):
+            super(EventBasedFilter, self).appendWithDateTime(dateTimes[i], values[i])
+        self.__resumeDateTime = state["lastDateTime"]
+
     def getDataSeries(self):
         return self.__dataSeries
 
     def getEventWindow(self):
         return self.__eventWindow
+
+
+# Returns a hashable version of an indicator parameter.
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        ret = tuple(_freeze(item) for item in value)
+    elif isinstance(value, dict):
+        ret = tuple(sorted((key, _freeze(item)) for key, item in six.iteritems(value)))
+    elif isinstance(value, np.ndarray):
+        ret = (value.dtype.str, value.shape, value.tobytes())
+    else:
+        ret = value
+    return ret
+
+
+class IndicatorRegistry(object):
+    """Shares indicator instances that have the same class, the same source dataseries and the same parameters,
+    so that each one subscribes to the source dataseries and calculates values once.
+
+    .. note::
+        * Indicators are held using weak references, so the registry doesn't keep them alive once the source
+          dataseries is gone.
+        * Parameters are compared by value after filling in defaults, so **SMA(ds, 20)** and
+          **SMA(ds, period=20, maxLen=None)** share the same instance. The source dataseries is compared by identity.
+    """
+
+    def __init__(self):
+        self.__indicators = weakref.WeakValueDictionary()
+        self.__created = 0
+        self.__duplicates = 0
+
+    def __getKey(self, indicatorClass, dataSeries, args, kwargs):
+        callArgs = inspect.getcallargs(indicatorClass.__init__, None, dataSeries, *args, **kwargs)
+        # Skip self and the source dataseries.
+        for name in _getargspec(indicatorClass.__init__).args[:2]:
+            callArgs.pop(name)
+        return (indicatorClass, id(dataSeries), _freeze(callArgs))
+
+    def getOrCreate(self, indicatorClass, dataSeries, *args, **kwargs):
+        """Returns the indicator of the given class, built over dataSeries using the rest of the arguments, creating it
+        only if there is no matching one.
+
+        :param indicatorClass: The indicator class, for example :class:`pyalgotrade.technical.ma.SMA`.
+        :param dataSeries: The DataSeries instance being filtered.
+        :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+        """
+        key = self.__getKey(indicatorClass, dataSeries, args, kwargs)
+        ret = self.__indicators.get(key)
+        if ret is None:
+            ret = indicatorClass(dataSeries, *args, **kwargs)
+            self.__indicators[key] = ret
+            self.__created += 1
+        else:
+            self.__duplicates += 1
+        return ret
+
+    def getCreatedCount(self):
+        """Returns the number of indicators created."""
+        return self.__created
+
+    def getDuplicatesEliminated(self):
+        """Returns the number of times an existing indicator was returned instead of building a new one."""
+        return self.__duplicates
+
+    def __len__(self):
+        # The number of indicators that are still alive.
+        return len(self.__indicators)
+
+    def clear(self):
+        self.__indicators.clear()
+        self.__created = 0
+        self.__duplicates = 0
+
+
+_registry = IndicatorRegistry()
+
+
+def get_registry():
+    """Returns the :class:`IndicatorRegistry` used by :func:`get_or_create`."""
+    return _registry
+
+
+def get_or_create(indicatorClass, dataSeries, *args, **kwargs):
+    """Returns a shared indicator instance using the default :class:`IndicatorRegistry`.
+    Check :meth:`IndicatorRegistry.getOrCreate`.
+
+    For example, **get_or_create(ma.SMA, feed["orcl"].getCloseDataSeries(), 20)** returns the same
+    :class:`pyalgotrade.technical.ma.SMA` instance for every caller.
+    """
+    return _registry.getOrCreate(indicatorClass, dataSeries, *args, **kwargs)
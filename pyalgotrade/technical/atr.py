@@ -18,6 +18,8 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import numpy as np
+
 from pyalgotrade import technical
 from pyalgotrade.dataseries import bards
 
@@ -54,6 +56,23 @@ class ATREventWindow(technical.EventWindow):
             else:
                 self.__value = (self.__value * (self.getWindowSize() - 1) + tr) / float(self.getWindowSize())
 
+    def backfill(self, dateTimes, values):
+        if len(values) == 0:
+            return []
+
+        period = self.getWindowSize()
+        high = np.array([value.getHigh(self.__useAdjustedValues) for value in values], dtype=float)
+        low = np.array([value.getLow(self.__useAdjustedValues) for value in values], dtype=float)
+        close = np.array([value.getClose(self.__useAdjustedValues) for value in values], dtype=float)
+        atrs, trueRanges = technical.get_kernel("atr")(high, low, close, period)
+        self._setValues(trueRanges)
+        self.__prevClose = values[-1].getClose(self.__useAdjustedValues)
+        ret = atrs.tolist()
+        ret[:period - 1] = [None] * min(period - 1, len(ret))
+        if len(values) >= period:
+            self.__value = ret[-1]
+        return ret
+
     def getValue(self):
         return self.__value
 
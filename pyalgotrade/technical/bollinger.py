@@ -19,10 +19,34 @@
 """
 
 from pyalgotrade import dataseries
-from pyalgotrade.technical import ma
 from pyalgotrade.technical import stats
 
 
+# Calculates the middle band like ma.SMAEventWindow and the standard deviation like stats.StdDevEventWindow, over a
+# single window, so values are identical to using ma.SMA and stats.StdDev.
+class BollingerEventWindow(stats.RollingMomentsEventWindow):
+    def __init__(self, period):
+        assert(period > 0)
+        super(BollingerEventWindow, self).__init__(period)
+        self.__sma = None
+
+    def onNewValue(self, dateTime, value):
+        firstValue = None
+        if value is not None and self.windowFull():
+            firstValue = self.getValues()[0]
+
+        super(BollingerEventWindow, self).onNewValue(dateTime, value)
+
+        if value is not None and self.windowFull():
+            if self.__sma is None:
+                self.__sma = self.getValues().mean()
+            else:
+                self.__sma = self.__sma + value / float(self.getWindowSize()) - firstValue / float(self.getWindowSize())
+
+    def getValue(self):
+        return self.__sma
+
+
 class BollingerBands(object):
     """Bollinger Bands filter as described in http://stockcharts.com/school/doku.php?id=chart_school:technical_indicators:bollinger_bands.
 
@@ -39,25 +63,26 @@ class BollingerBands(object):
     """
 
     def __init__(self, dataSeries, period, numStdDev, maxLen=None):
-        self.__sma = ma.SMA(dataSeries, period, maxLen=maxLen)
-        self.__stdDev = stats.StdDev(dataSeries, period, maxLen=maxLen)
+        self.__eventWindow = BollingerEventWindow(period)
+        self.__middleBand = dataseries.SequenceDataSeries(maxLen)
         self.__upperBand = dataseries.SequenceDataSeries(maxLen)
         self.__lowerBand = dataseries.SequenceDataSeries(maxLen)
         self.__numStdDev = numStdDev
-        # It is important to subscribe after sma and stddev since we'll use those values.
         dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
 
     def __onNewValue(self, dataSeries, dateTime, value):
         upperValue = None
         lowerValue = None
 
-        if value is not None:
-            sma = self.__sma[-1]
-            if sma is not None:
-                stdDev = self.__stdDev[-1]
-                upperValue = sma + stdDev * self.__numStdDev
-                lowerValue = sma + stdDev * self.__numStdDev * -1
+        self.__eventWindow.onNewValue(dateTime, value)
+        sma = self.__eventWindow.getValue()
+        if value is not None and sma is not None:
+            stdDev = self.__eventWindow.getStdDev(0)
+            upperValue = sma + stdDev * self.__numStdDev
+            lowerValue = sma + stdDev * self.__numStdDev * -1
 
+        # The middle band keeps the last value when value is None, like ma.SMA does.
+        self.__middleBand.appendWithDateTime(dateTime, sma)
         self.__upperBand.appendWithDateTime(dateTime, upperValue)
         self.__lowerBand.appendWithDateTime(dateTime, lowerValue)
 
@@ -71,7 +96,7 @@ class BollingerBands(object):
         """
         Returns the middle band as a :class:`pyalgotrade.dataseries.DataSeries`.
         """
-        return self.__sma
+        return self.__middleBand
 
     def getLowerBand(self):
         """
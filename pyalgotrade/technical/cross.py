@@ -18,6 +18,10 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import numpy as np
+
+from pyalgotrade import dataseries
+
 
 def compute_diff(values1, values2):
     assert(len(values1) == len(values2))
@@ -115,3 +119,101 @@ def cross_below(values1, values2, start=-2, end=None):
         The default start and end values check for cross below conditions over the last 2 values.
     """
     return _cross_impl(values1, values2, start, end, lambda x: x < 0)
+
+
+def cross_over(values1, values2):
+    """Vectorized version of :class:`CrossOver`, to evaluate whole histories at once.
+
+    :param values1: The values that cross.
+    :type values1: list or numpy.array.
+    :param values2: The values being crossed. Must have the same length as values1.
+    :type values2: list or numpy.array.
+    :rtype: A numpy.array with 1 where values1 crossed above values2, -1 where values1 crossed below values2 and 0
+        otherwise.
+    """
+    values1 = np.asarray(values1, dtype=float)
+    values2 = np.asarray(values2, dtype=float)
+    assert(len(values1) == len(values2))
+
+    with np.errstate(invalid="ignore"):
+        signs = np.sign(values1 - values2)
+    signs[np.isnan(signs)] = 0
+    # The sign of the last non-zero difference, up to each position.
+    positions = np.where(signs != 0, np.arange(len(signs)), 0)
+    lastSigns = signs[np.maximum.accumulate(positions)] if len(signs) else signs
+    prevSigns = np.concatenate([[0], lastSigns[:-1]])
+    crossed = (signs != 0) & (prevSigns != 0) & (signs != prevSigns)
+    return np.where(crossed, signs, 0).astype(int)
+
+
+class CrossOver(dataseries.SequenceDataSeries):
+    """Filter that detects when one DataSeries crosses another one.
+
+    For every datetime that both DataSeries have values for, it holds 1 if values1 crossed above values2, -1 if values1
+    crossed below values2, and 0 otherwise.
+
+    :param values1: The DataSeries that crosses.
+    :type values1: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param values2: The DataSeries being crossed.
+    :type values2: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param maxLen: The maximum number of values to hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+
+    .. note::
+        * Like :func:`cross_above` and :func:`cross_below`, equal values and missing values are skipped, so
+          values1 crosses above values2 when values1 - values2 turns positive after having been negative.
+        * Each new value is checked in O(1), using the last values received from each DataSeries, so **crossOver[-1] == 1** is a cheaper alternative to calling
+          :func:`cross_above` on every bar.
+    """
+
+    def __init__(self, values1, values2, maxLen=None):
+        super(CrossOver, self).__init__(maxLen)
+        self.__values1 = values1
+        self.__values2 = values2
+        # The sign of the last non-zero difference.
+        self.__lastSign = 0
+        self.__lastDateTime = None
+        # The last (dateTime, value) each DataSeries got, or None if it got none yet.
+        self.__lastValues = [None, None]
+        # The number of values each DataSeries got, to pair values without datetimes.
+        self.__counts = [0, 0]
+        values1.getNewValueEvent().subscribe(lambda ds, dateTime, value: self.__onNewValue(0, dateTime, value))
+        values2.getNewValueEvent().subscribe(lambda ds, dateTime, value: self.__onNewValue(1, dateTime, value))
+
+    def __onNewValue(self, index, dateTime, value):
+        self.__counts[index] += 1
+        self.__lastValues[index] = (dateTime, value)
+        # The DataSeries may not get values at the same time, so wait until both have one for this datetime.
+        other = self.__lastValues[1 - index]
+        if other is None or other[0] != dateTime:
+            return
+        if dateTime is None:
+            if self.__counts[0] != self.__counts[1]:
+                return
+        elif dateTime == self.__lastDateTime:
+            return
+
+        self.__lastDateTime = dateTime
+        value1 = self.__lastValues[0][1]
+        value2 = self.__lastValues[1][1]
+        ret = 0
+        if value1 is not None and value2 is not None:
+            diff = value1 - value2
+            sign = 0
+            if diff > 0:
+                sign = 1
+            elif diff < 0:
+                sign = -1
+            if sign != 0:
+                if self.__lastSign != 0 and sign != self.__lastSign:
+                    ret = sign
+                self.__lastSign = sign
+        self.appendWithDateTime(dateTime, ret)
+
+    def getValues1(self):
+        return self.__values1
+
+    def getValues2(self):
+        return self.__values2
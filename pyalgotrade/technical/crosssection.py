@@ -0,0 +1,242 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import numpy as np
+import six
+
+from pyalgotrade import dataseries
+from pyalgotrade.utils import collections
+
+VALUE = "value"
+RANK = "rank"
+PERCENTILE = "percentile"
+ZSCORE = "zscore"
+STATISTICS = [VALUE, RANK, PERCENTILE, ZSCORE]
+
+# Bar columns that can be used as the source values.
+COLUMNS = {
+    "open": lambda barDS: barDS.getOpenDataSeries(),
+    "high": lambda barDS: barDS.getHighDataSeries(),
+    "low": lambda barDS: barDS.getLowDataSeries(),
+    "close": lambda barDS: barDS.getCloseDataSeries(),
+    "volume": lambda barDS: barDS.getVolumeDataSeries(),
+    "adj_close": lambda barDS: barDS.getAdjCloseDataSeries(),
+    "price": lambda barDS: barDS.getPriceDataSeries(),
+}
+
+
+def rank(values):
+    """Returns a numpy.array with the rank for each value, from 1 for the lowest one, or NaN for NaN values.
+    Equal values get the same rank, the highest one, so the rank is the number of values that are lower than or equal
+    to each value."""
+    values = np.asarray(values, dtype=float)
+    ret = np.full(len(values), np.nan)
+    valid = ~np.isnan(values)
+    ret[valid] = np.searchsorted(np.sort(values[valid]), values[valid], side="right")
+    return ret
+
+
+def _percentile_from_ranks(ranks):
+    count = np.count_nonzero(~np.isnan(ranks))
+    if count:
+        ranks = ranks / float(count)
+    return ranks
+
+
+def percentile(values):
+    """Returns a numpy.array with the fraction of values that are lower than or equal to each value, from 0 to 1,
+    or NaN for NaN values."""
+    return _percentile_from_ranks(rank(values))
+
+
+def zscore(values, ddof=0):
+    """Returns a numpy.array with the Z-Score for each value, relative to the mean and standard deviation of the values
+    that are not NaN, or NaN for NaN values."""
+    values = np.asarray(values, dtype=float)
+    valid = values[~np.isnan(values)]
+    if len(valid) - ddof <= 0:
+        return np.full(len(values), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (values - valid.mean()) / valid.std(ddof=ddof)
+
+
+def top(values, count):
+    """Returns a numpy.array with the positions of the highest values, up to count, from the highest one.
+    NaN values are not included."""
+    values = np.asarray(values, dtype=float)
+    valid = np.flatnonzero(~np.isnan(values))
+    return valid[np.argsort(-values[valid], kind="mergesort")][:count]
+
+
+class CrossSection(object):
+    """Calculates ranks, percentiles and Z-Scores across a set of instruments, for every bar, using vectorized
+    operations over the values for all the instruments.
+
+    :param barFeed: The bar feed.
+    :type barFeed: :class:`pyalgotrade.barfeed.BaseBarFeed`.
+    :param instruments: The instruments.
+    :type instruments: list.
+    :param source: A bar column, "open", "high", "low", "close", "volume", "adj_close" or "price", or a dictionary
+        that maps instruments to :class:`pyalgotrade.dataseries.DataSeries` instances, like indicators, to get
+        values from.
+    :param frequency: The frequency of the bars to use. If None, the first one in the bar feed is used.
+    :param ddof: Delta degrees of freedom to use for the Z-Score standard deviation.
+    :type ddof: int.
+    :param maxLen: The maximum number of values to hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+
+    .. note::
+        * Instruments that have no value for a given datetime get NaN values, and are excluded from the statistics.
+        * Results for the current bars are available from :meth:`pyalgotrade.strategy.BaseStrategy.onBars`.
+        * Per instrument dataseries only get built, and updated, if requested using :meth:`getDataSeries`.
+    """
+
+    def __init__(self, barFeed, instruments, source="price", frequency=None, ddof=0, maxLen=None):
+        maxLen = dataseries.get_checked_max_len(maxLen)
+        if frequency is None:
+            frequency = barFeed.getFrequency()[0]
+        self.__instruments = list(instruments)
+        self.__ddof = ddof
+        self.__maxLen = maxLen
+        self.__dateTimes = collections.ListDeque(maxLen)
+        self.__statistics = dict(
+            (statistic, collections.NumPyDeque(maxLen, columns=len(self.__instruments))) for statistic in STATISTICS
+        )
+        self.__positions = dict((instrument, i) for i, instrument in enumerate(self.__instruments))
+        # Per instrument dataseries, by (instrument, statistic).
+        self.__dataSeries = {}
+        # The values for the bars being processed.
+        self.__row = np.full(len(self.__instruments), np.nan)
+        self.__rowDateTime = None
+        self.__pending = False
+
+        for i, instrument in enumerate(self.__instruments):
+            if isinstance(source, six.string_types):
+                sourceDS = COLUMNS[source](barFeed[instrument, frequency])
+            else:
+                sourceDS = source[instrument]
+            sourceDS.getNewValueEvent().subscribe(
+                lambda ds, dateTime, value, i=i: self.__onNewValue(i, dateTime, value)
+            )
+        barFeed.getNewValuesEvent().subscribe(lambda dateTime, bars: self.__update())
+
+    # Source dataseries get values before the bar feed emits the new values event, and before the strategy gets the
+    # bars, so the row gets filled here and statistics get calculated once all of them are in.
+    def __onNewValue(self, pos, dateTime, value):
+        if self.__pending and dateTime != self.__rowDateTime:
+            self.__update()
+        if not self.__pending:
+            self.__row.fill(np.nan)
+            self.__rowDateTime = dateTime
+            self.__pending = True
+        self.__row[pos] = np.nan if value is None else value
+
+    def __update(self):
+        if not self.__pending:
+            return
+        self.__pending = False
+
+        values = self.__row
+        ranks = rank(values)
+        rows = {
+            VALUE: values,
+            RANK: ranks,
+            PERCENTILE: _percentile_from_ranks(ranks),
+            ZSCORE: zscore(values, self.__ddof),
+        }
+        for statistic, row in six.iteritems(rows):
+            self.__statistics[statistic].append(row)
+        self.__dateTimes.append(self.__rowDateTime)
+
+        for (instrument, statistic), ds in six.iteritems(self.__dataSeries):
+            self.__appendValue(ds, self.__rowDateTime, rows[statistic][self.__positions[instrument]])
+
+    def __appendValue(self, ds, dateTime, value):
+        ds.appendWithDateTime(dateTime, None if value != value else float(value))
+
+    def getInstruments(self):
+        return self.__instruments
+
+    def __len__(self):
+        self.__update()
+        return len(self.__dateTimes)
+
+    def getDateTimes(self):
+        self.__update()
+        return self.__dateTimes.data()
+
+    def getHistory(self, statistic):
+        """Returns a 2-D numpy.array with the values for a statistic, like RANK, with one row per instrument."""
+        self.__update()
+        return self.__statistics[statistic].data()
+
+    def __getLast(self, statistic):
+        self.__update()
+        ret = self.__statistics[statistic].data()
+        if ret.shape[1] == 0:
+            return np.full(len(self.__instruments), np.nan)
+        return ret[:, -1]
+
+    def getValues(self):
+        """Returns a numpy.array with the last values, one for each instrument."""
+        return self.__getLast(VALUE)
+
+    def getRanks(self):
+        """Returns a numpy.array with the last ranks, from 1 for the lowest value. Check :func:`rank`."""
+        return self.__getLast(RANK)
+
+    def getPercentiles(self):
+        """Returns a numpy.array with the last percentiles. Check :func:`percentile`."""
+        return self.__getLast(PERCENTILE)
+
+    def getZScores(self):
+        """Returns a numpy.array with the last Z-Scores. Check :func:`zscore`."""
+        return self.__getLast(ZSCORE)
+
+    def getTop(self, count):
+        """Returns a list with the instruments with the highest last values, up to count, from the highest one."""
+        return [self.__instruments[i] for i in top(self.getValues(), count)]
+
+    def getBottom(self, count):
+        """Returns a list with the instruments with the lowest last values, up to count, from the lowest one."""
+        return [self.__instruments[i] for i in top(-self.getValues(), count)]
+
+    def getDataSeries(self, instrument, statistic):
+        """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the values for a statistic, like RANK, for an
+        instrument. NaN values are returned as None.
+
+        :param instrument: Instrument identifier.
+        :type instrument: string.
+        :param statistic: VALUE, RANK, PERCENTILE or ZSCORE.
+        :type statistic: string.
+        """
+        assert statistic in STATISTICS, "Invalid statistic"
+        self.__update()
+        ret = self.__dataSeries.get((instrument, statistic))
+        if ret is None:
+            ret = dataseries.SequenceDataSeries(self.__maxLen)
+            # Start with the values calculated so far.
+            values = self.__statistics[statistic].data()[self.__positions[instrument]]
+            for dateTime, value in zip(self.__dateTimes.data(), values.tolist()):
+                self.__appendValue(ret, dateTime, value)
+            self.__dataSeries[(instrument, statistic)] = ret
+        return ret
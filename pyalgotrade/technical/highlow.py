@@ -19,21 +19,35 @@
 """
 
 from pyalgotrade import technical
+from pyalgotrade.utils import collections
 
 
 class HighLowEventWindow(technical.EventWindow):
     def __init__(self, windowSize, useMin):
         super(HighLowEventWindow, self).__init__(windowSize)
         self.__useMin = useMin
+        self.__extremum = collections.RollingExtremum(windowSize, useMin)
+
+    def onNewValue(self, dateTime, value):
+        super(HighLowEventWindow, self).onNewValue(dateTime, value)
+        if value is not None:
+            self.__extremum.append(value)
+
+    def backfill(self, dateTimes, values):
+        windowSize = self.getWindowSize()
+        notNone, counts = technical.split_none(values)
+        extremums = technical.get_kernel("rolling_extremum")(notNone, windowSize, self.__useMin).tolist()
+        self._setValues(notNone)
+        self.__extremum = collections.RollingExtremum(windowSize, self.__useMin)
+        for value in self.getValues().tolist():
+            self.__extremum.append(value)
+        # The extremum stays the same for None values.
+        return [extremums[count - 1] if count >= windowSize else None for count in counts.tolist()]
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            values = self.getValues()
-            if self.__useMin:
-                ret = values.min()
-            else:
-                ret = values.max()
+            ret = self.__extremum.getValue()
         return ret
 
 
@@ -23,42 +23,117 @@ import numpy as np
 from pyalgotrade import technical
 
 
-# Code Tom Starke for the Hurst Exponent.
-def hurst_exp(p, minLags, maxLags):
-    tau = []
-    lagvec = []
-
-    #  Step through the different lags
-    for lag in range(minLags, maxLags):
-        #  produce price difference with lag
-        pp = np.subtract(p[lag:], p[:-lag])
-        #  Write the different lags into a vector
-        lagvec.append(lag)
-        #  Calculate the variance of the differnce vector
-        tau.append(np.sqrt(np.std(pp)))
+# Lags and log lag constants, by (minLags, maxLags).
+_lag_constants = {}
+
+
+def get_lag_constants(minLags, maxLags):
+    """Returns the lags, the centered log10 lags and their sum of squares, used to fit the double-log graph."""
+    key = (minLags, maxLags)
+    ret = _lag_constants.get(key)
+    if ret is None:
+        lags = np.arange(minLags, maxLags)
+        logLags = np.log10(lags)
+        centeredLogLags = logLags - logLags.mean()
+        ret = (lags, centeredLogLags, (centeredLogLags ** 2).sum())
+        _lag_constants[key] = ret
+    return ret
+
+
+def lag_moments(p, lags):
+    """Returns the mean and the sum of squared deviations of the price differences for each lag."""
+    p = np.asarray(p, dtype=float)
+    size = len(p)
+    width = lags[-1] + 1
+    # Pad so there is a window starting at every position, and mask the differences past the end for each lag.
+    padded = np.concatenate([p, np.zeros(width - 1)])
+    windows = np.lib.stride_tricks.as_strided(padded, shape=(size, width), strides=padded.strides * 2, writeable=False)
+    counts = size - lags
+    valid = np.arange(size)[:, np.newaxis] < counts
+    with np.errstate(invalid="ignore", divide="ignore"):
+        diffs = np.where(valid, windows[:, lags] - windows[:, :1], 0)
+        means = diffs.sum(axis=0) / counts
+        m2 = (np.where(valid, diffs - means, 0) ** 2).sum(axis=0)
+    return means, m2
+
+
+def fit_hurst(m2, counts, centeredLogLags, sumSquares):
     # linear fit to double-log graph (gives power)
-    m = np.polyfit(np.log10(lagvec), np.log10(tau), 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        tau = np.sqrt(np.sqrt(m2 / counts))
+        slope = (centeredLogLags * np.log10(tau)).sum() / sumSquares
     # calculate hurst
-    hurst = m[0]*2
-    return hurst
+    return slope*2
+
+
+# Based on code by Tom Starke for the Hurst Exponent.
+def hurst_exp(p, minLags, maxLags):
+    lags, centeredLogLags, sumSquares = get_lag_constants(minLags, maxLags)
+    m2 = lag_moments(p, lags)[1]
+    return fit_hurst(m2, len(p) - lags, centeredLogLags, sumSquares)
 
 
+# Keeps the moments of the price differences for every lag, and updates them at O(lags) per value, since only one
+# difference per lag gets in and out of the window. The moments are recalculated from the window values every period
+# updates, and while the window holds NaN or infinite values, so results match hurst_exp within rounding errors.
 class HurstExponentEventWindow(technical.EventWindow):
     def __init__(self, period, minLags, maxLags, logValues=True):
         super(HurstExponentEventWindow, self).__init__(period)
-        self.__minLags = minLags
-        self.__maxLags = maxLags
         self.__logValues = logValues
+        self.__lags, self.__centeredLogLags, self.__sumSquares = get_lag_constants(minLags, maxLags)
+        self.__counts = period - self.__lags
+        self.__incremental = period > self.__lags[-1]
+        self.__means = None
+        self.__m2 = None
+        self.__updates = 0
+        self.__nonFinite = 0
+
+    def __reanchor(self):
+        self.__means, self.__m2 = lag_moments(self.getValues(), self.__lags)
+        self.__updates = 0
 
     def onNewValue(self, dateTime, value):
         if value is not None and self.__logValues:
             value = np.log10(value)
+        if value is None:
+            super(HurstExponentEventWindow, self).onNewValue(dateTime, value)
+            return
+
+        oldValue = None
+        oldDiffs = None
+        if self.windowFull():
+            values = self.getValues()
+            oldValue = values[0]
+            if self.__incremental:
+                oldDiffs = values[self.__lags] - oldValue
+
         super(HurstExponentEventWindow, self).onNewValue(dateTime, value)
 
+        reanchor = self.__updates >= self.getWindowSize()
+        if not np.isfinite(value):
+            self.__nonFinite += 1
+        if oldValue is not None and not np.isfinite(oldValue):
+            self.__nonFinite -= 1
+            reanchor = True
+
+        if not self.windowFull():
+            pass
+        elif oldDiffs is None or self.__m2 is None or reanchor or self.__nonFinite:
+            self.__reanchor()
+        else:
+            values = self.getValues()
+            newDiffs = value - values[-1 - self.__lags]
+            # Replace the oldest difference with the newest one, for every lag.
+            delta = newDiffs - oldDiffs
+            oldMeans = self.__means
+            self.__means = oldMeans + delta / self.__counts
+            self.__m2 = self.__m2 + delta * (newDiffs - self.__means + oldDiffs - oldMeans)
+            self.__updates += 1
+
     def getValue(self):
         ret = None
         if self.windowFull():
-            ret = hurst_exp(self.getValues(), self.__minLags, self.__maxLags)
+            ret = fit_hurst(np.maximum(self.__m2, 0), self.__counts, self.__centeredLogLags, self.__sumSquares)
         return ret
 
 
@@ -0,0 +1,226 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+from pyalgotrade.utils import stats
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Kernels that calculate indicator values over a whole array of values, used by EventWindow.backfill overrides.
+# They perform the same operations as the onNewValue implementations, in the same order, so that without a JIT compiler
+# results are identical. When numba is available the loops get compiled, and results match within rounding errors.
+# Every kernel returns an array with one value for each input value, and NaN until the window is full.
+# Values that get appended one at a time, as bars get dispatched, don't go through these. Calling a compiled function
+# for every value costs more than the few operations that onNewValue performs.
+
+NUMBA_AVAILABLE = numba is not None
+
+if NUMBA_AVAILABLE:
+    # Let compiled kernels call the rolling moments functions, that are shared with the Python implementation.
+    for func in [
+        stats.moments_reset, stats.moments_add, stats.moments_replace, stats.moments_variance,
+        stats.rolling_moments_update
+    ]:
+        numba.extending.register_jitable(func)
+
+
+# Performs the same operations as technical.ma.SMAEventWindow.onNewValue, in the same order:
+# avg1 = avg0 + d/3 - a/3
+def sma(values, period):
+    ret = np.empty(len(values))
+    ret[:period - 1] = np.nan
+    if len(values) >= period:
+        steps = np.empty((len(values) - period) * 2 + 1)
+        steps[0] = values[:period].mean()
+        steps[1::2] = values[period:] / float(period)
+        steps[2::2] = -(values[:-period] / float(period))
+        ret[period - 1:] = np.add.accumulate(steps)[::2]
+    return ret
+
+
+# Loop version of sma, for the JIT compiler, since np.add.accumulate is not supported.
+def _sma_loop(values, period):
+    ret = np.empty(len(values))
+    ret[:period - 1] = np.nan
+    if len(values) >= period:
+        value = values[:period].mean()
+        ret[period - 1] = value
+        for i in range(period, len(values)):
+            value = value + values[i] / float(period) - values[i - period] / float(period)
+            ret[i] = value
+    return ret
+
+
+def ema(values, period):
+    ret = np.empty(len(values))
+    ret[:period - 1] = np.nan
+    if len(values) >= period:
+        multiplier = 2.0 / (period + 1)
+        value = values[:period].mean()
+        ret[period - 1] = value
+        for i in range(period, len(values)):
+            value = (values[i] - value) * multiplier + value
+            ret[i] = value
+    return ret
+
+
+# Returns the RSI values and the last average gain and loss.
+def rsi(values, period):
+    ret = np.empty(len(values))
+    ret[:period] = np.nan
+    avgGain = np.nan
+    avgLoss = np.nan
+    for i in range(period, len(values)):
+        if i == period:
+            gain = 0.0
+            loss = 0.0
+            for j in range(1, period + 1):
+                change = values[j] - values[j - 1]
+                if change < 0:
+                    loss += abs(change)
+                else:
+                    gain += change
+            avgGain = gain / float(period)
+            avgLoss = loss / float(period)
+        else:
+            change = values[i] - values[i - 1]
+            gain = 0.0
+            loss = 0.0
+            if change < 0:
+                loss = abs(change)
+            else:
+                gain = change
+            avgGain = (avgGain * (period - 1) + gain) / float(period)
+            avgLoss = (avgLoss * (period - 1) + loss) / float(period)
+
+        if avgLoss == 0:
+            ret[i] = 100.0
+        else:
+            ret[i] = 100 - 100 / (1 + avgGain / avgLoss)
+    return ret, avgGain, avgLoss
+
+
+# Returns the ATR values and the true range values.
+def atr(high, low, close, period):
+    trueRanges = np.empty(len(high))
+    ret = np.empty(len(high))
+    ret[:period - 1] = np.nan
+    value = np.nan
+    for i in range(len(high)):
+        tr = high[i] - low[i]
+        if i > 0:
+            tr = max(max(tr, abs(high[i] - close[i - 1])), abs(low[i] - close[i - 1]))
+        trueRanges[i] = tr
+        if i == period - 1:
+            value = trueRanges[:period].mean()
+        elif i >= period:
+            value = (value * (period - 1) + tr) / float(period)
+        ret[i] = value
+    return ret, trueRanges
+
+
+# Same steps as technical.stats.RollingMomentsEventWindow, since both use utils.stats.rolling_moments_update.
+def rolling_std(values, period, ddof):
+    ret = np.empty(len(values))
+    ret[:period - 1] = np.nan
+    state = (0, 0.0, 0.0, 0, 0)
+    for i in range(len(values)):
+        hasOldValue = i >= period
+        oldValue = values[i - period] if hasOldValue else 0.0
+        state = stats.rolling_moments_update(
+            state, values[max(i - period + 1, 0):i + 1], hasOldValue, oldValue, values[i], period
+        )
+        if i >= period - 1:
+            ret[i] = np.sqrt(stats.moments_variance(state[0], state[2], ddof))
+    return ret
+
+
+def rolling_extremum(values, period, useMin):
+    ret = np.empty(len(values))
+    ret[:period - 1] = np.nan
+    if len(values) >= period:
+        windows = as_strided(
+            values, shape=(len(values) - period + 1, period), strides=(values.strides[0], values.strides[0])
+        )
+        if useMin:
+            ret[period - 1:] = windows.min(axis=1)
+        else:
+            ret[period - 1:] = windows.max(axis=1)
+    return ret
+
+
+# Monotonic deque version of rolling_extremum, for the JIT compiler, since as_strided is not supported.
+def _rolling_extremum_loop(values, period, useMin):
+    ret = np.empty(len(values))
+    ret[:period - 1] = np.nan
+    positions = np.empty(len(values), dtype=np.int64)
+    head = 0
+    tail = 0
+    lastNaN = -period
+    for i in range(len(values)):
+        value = values[i]
+        if value != value:
+            lastNaN = i
+        else:
+            while tail > head:
+                last = values[positions[tail - 1]]
+                if (useMin and value > last) or (not useMin and value < last):
+                    break
+                tail -= 1
+            positions[tail] = i
+            tail += 1
+        if head < tail and positions[head] <= i - period:
+            head += 1
+        if i >= period - 1:
+            if lastNaN > i - period:
+                ret[i] = np.nan
+            else:
+                ret[i] = values[positions[head]]
+    return ret
+
+
+# Maps kernel names to the Python implementation and the one to compile.
+_kernels = {
+    "sma": (sma, _sma_loop),
+    "ema": (ema, ema),
+    "rsi": (rsi, rsi),
+    "atr": (atr, atr),
+    "rolling_std": (rolling_std, rolling_std),
+    "rolling_extremum": (rolling_extremum, _rolling_extremum_loop),
+}
+
+_compiled = {}
+
+
+def get(name, jit):
+    """Returns a kernel by name, compiled using numba if jit is True and numba is available."""
+    pyKernel, jitKernel = _kernels[name]
+    ret = pyKernel
+    if jit and NUMBA_AVAILABLE:
+        ret = _compiled.get(name)
+        if ret is None:
+            ret = numba.njit(jitKernel)
+            _compiled[name] = ret
+    return ret
@@ -21,6 +21,7 @@
 from pyalgotrade import technical
 from pyalgotrade.utils import collections
 from pyalgotrade.utils import dt
+from pyalgotrade.utils import stats as stats_utils
 
 import numpy as np
 from scipy import stats
@@ -35,25 +36,69 @@ def lsreg(x, y):
     return res[0], res[1]
 
 
-class LeastSquaresRegressionWindow(technical.EventWindow):
+# Keeps a least-squares regression of the values in the window, against the x values supplied by _getX, at O(1) per
+# value. The regression is recalculated from the window values every windowSize updates, and while the window holds
+# NaN or infinite values, so results match lsreg within rounding errors.
+class RollingRegressionEventWindow(technical.EventWindow):
+    def __init__(self, windowSize):
+        super(RollingRegressionEventWindow, self).__init__(windowSize)
+        self._xValues = collections.NumPyDeque(windowSize)
+        self.__regression = stats_utils.RollingRegression(windowSize)
+        self.__nonFinite = 0
+
+    def _getX(self, dateTime):
+        raise NotImplementedError()
+
+    def onNewValue(self, dateTime, value):
+        if value is None:
+            super(RollingRegressionEventWindow, self).onNewValue(dateTime, value)
+            return
+
+        x = self._getX(dateTime)
+        oldX = None
+        oldValue = None
+        if self.windowFull():
+            oldX = self._xValues[0]
+            oldValue = self.getValues()[0]
+
+        super(RollingRegressionEventWindow, self).onNewValue(dateTime, value)
+        self._xValues.append(x)
+
+        reanchor = self.__regression.needsReanchor()
+        if not np.isfinite(value):
+            self.__nonFinite += 1
+        if oldValue is not None and not np.isfinite(oldValue):
+            self.__nonFinite -= 1
+            reanchor = True
+
+        if reanchor or self.__nonFinite:
+            self.__regression.reset(self._xValues.data(), self.getValues())
+        elif oldValue is None:
+            self.__regression.add(x, value)
+        else:
+            self.__regression.replace(oldX, oldValue, x, value)
+
+    def getRegression(self):
+        """Returns the :class:`pyalgotrade.utils.stats.RollingRegression` for the values in the window."""
+        return self.__regression
+
+
+class LeastSquaresRegressionWindow(RollingRegressionEventWindow):
     def __init__(self, windowSize):
         assert(windowSize > 1)
         super(LeastSquaresRegressionWindow, self).__init__(windowSize)
-        self._timestamps = collections.NumPyDeque(windowSize)
+        self._timestamps = self._xValues
 
-    def onNewValue(self, dateTime, value):
-        technical.EventWindow.onNewValue(self, dateTime, value)
-        if value is not None:
-            timestamp = dt.datetime_to_timestamp(dateTime)
-            if len(self._timestamps):
-                assert(timestamp > self._timestamps[-1])
-            self._timestamps.append(timestamp)
+    def _getX(self, dateTime):
+        timestamp = dt.datetime_to_timestamp(dateTime)
+        if len(self._timestamps):
+            assert(timestamp > self._timestamps[-1])
+        return timestamp
 
     def __getValueAtImpl(self, timestamp):
         ret = None
         if self.windowFull():
-            a, b = lsreg(self._timestamps.data(), self.getValues())
-            ret = a * timestamp + b
+            ret = self.getRegression().getValueAt(timestamp)
         return ret
 
     def getValueAt(self, dateTime):
@@ -62,7 +107,7 @@ class LeastSquaresRegressionWindow(technical.EventWindow):
     def getValue(self):
         ret = None
         if self.windowFull():
-            ret = self.__getValueAtImpl(self._timestamps.data()[-1])
+            ret = self.__getValueAtImpl(self._timestamps[-1])
         return ret
 
 
@@ -91,16 +136,21 @@ class LeastSquaresRegression(technical.EventBasedFilter):
         return self.getEventWindow().getValueAt(dateTime)
 
 
-class SlopeEventWindow(technical.EventWindow):
+class SlopeEventWindow(RollingRegressionEventWindow):
     def __init__(self, windowSize):
         super(SlopeEventWindow, self).__init__(windowSize)
-        self.__x = np.asarray(range(windowSize))
+        # Values are evenly spaced, and the slope doesn't change if x values get shifted.
+        self.__count = 0
+
+    def _getX(self, dateTime):
+        ret = self.__count
+        self.__count += 1
+        return ret
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            y = self.getValues()
-            ret = lsreg(self.__x, y)[0]
+            ret = self.getRegression().getSlope()
         return ret
 
 
@@ -59,6 +59,17 @@ class SMAEventWindow(technical.EventWindow):
             else:
                 self.__value = self.__value + value / float(self.getWindowSize()) - firstValue / float(self.getWindowSize())
 
+    def backfill(self, dateTimes, values):
+        period = self.getWindowSize()
+        notNone, counts = technical.split_none(values)
+        self._setValues(notNone)
+        averages = technical.get_kernel("sma")(notNone, period).tolist()
+        # The average stays the same for None values.
+        ret = [averages[count - 1] if count >= period else None for count in counts.tolist()]
+        if len(ret):
+            self.__value = ret[-1]
+        return ret
+
     def getValue(self):
         return self.__value
 
@@ -96,6 +107,17 @@ class EMAEventWindow(technical.EventWindow):
             else:
                 self.__value = (value - self.__value) * self.__multiplier + self.__value
 
+    def backfill(self, dateTimes, values):
+        period = self.getWindowSize()
+        notNone, counts = technical.split_none(values)
+        self._setValues(notNone)
+        emas = technical.get_kernel("ema")(notNone, period).tolist()
+        # The EMA stays the same for None values.
+        ret = [emas[count - 1] if count >= period else None for count in counts.tolist()]
+        if len(notNone) >= period:
+            self.__value = emas[-1]
+        return ret
+
     def getValue(self):
         return self.__value
 
@@ -123,6 +145,19 @@ class WMAEventWindow(technical.EventWindow):
         super(WMAEventWindow, self).__init__(len(weights))
         self.__weights = np.asarray(weights)
 
+    def backfill(self, dateTimes, values):
+        period = self.getWindowSize()
+        notNone, counts = technical.split_none(values)
+        self._setValues(notNone)
+
+        averages = []
+        if len(notNone) >= period:
+            windows = np.lib.stride_tricks.as_strided(
+                notNone, shape=(len(notNone) - period + 1, period), strides=notNone.strides * 2, writeable=False
+            )
+            averages = ((windows * self.__weights).sum(axis=1) / float(self.__weights.sum())).tolist()
+        return [averages[count - period] if count >= period else None for count in counts.tolist()]
+
     def getValue(self):
         ret = None
         if self.windowFull():
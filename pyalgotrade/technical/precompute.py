@@ -0,0 +1,190 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+from pyalgotrade import dataseries
+from pyalgotrade import observer
+from pyalgotrade import technical
+from pyalgotrade.dataseries import bards
+
+
+class PrecomputedDataSeries(dataseries.DataSeries):
+    """A DataSeries that exhibits values calculated beforehand, as another dataseries gets new values.
+
+    :param dataSeries: The DataSeries instance to follow.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param dateTimes: The datetimes for the precomputed values.
+    :type dateTimes: list.
+    :param values: The precomputed values.
+    :type values: list.
+    :param maxLen: The maximum number of values to hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+
+    .. note::
+        When dataSeries gets a new value, the precomputed value for that datetime, if any, becomes available.
+    """
+
+    def __init__(self, dataSeries, dateTimes, values, maxLen=None):
+        super(PrecomputedDataSeries, self).__init__()
+        assert(len(dateTimes) == len(values))
+        self.__maxLen = dataseries.get_checked_max_len(maxLen)
+        self.__dateTimes = dateTimes
+        self.__values = values
+        # The number of precomputed values that are available.
+        self.__pos = 0
+        self.__newValueEvent = observer.Event()
+        dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
+
+    def __onNewValue(self, dataSeries, dateTime, value):
+        pos = self.__pos
+        if pos < len(self.__dateTimes):
+            nextDateTime = self.__dateTimes[pos]
+            if nextDateTime == dateTime:
+                self.__pos += 1
+                self.__newValueEvent.emit(self, dateTime, self.__values[pos])
+            elif nextDateTime < dateTime:
+                raise Exception("Precomputed value for %s was skipped" % (nextDateTime))
+
+    def __len__(self):
+        return min(self.__pos, self.__maxLen)
+
+    def getNewValueEvent(self):
+        return self.__newValueEvent
+
+    def getMaxLen(self):
+        return self.__maxLen
+
+    def setMaxLen(self, maxLen):
+        self.__maxLen = dataseries.get_checked_max_len(maxLen)
+
+    def getValueAbsolute(self, pos):
+        ret = None
+        if pos >= 0 and pos < len(self):
+            ret = self.__values[self.__pos - len(self) + pos]
+        return ret
+
+    def getDateTimes(self):
+        return self.__dateTimes[self.__pos - len(self):self.__pos]
+
+
+class Precomputer(object):
+    """Calculates indicators over all the bars held by a :class:`pyalgotrade.barfeed.membf.BarFeed`, before the
+    event loop starts, so that during the event loop indicators only need to advance over the precomputed values.
+
+    :param barFeed: The bar feed. All the bars must be loaded before calculating indicators.
+    :type barFeed: :class:`pyalgotrade.barfeed.membf.BarFeed`.
+
+    .. note::
+        * Indicators built using :class:`pyalgotrade.technical.EventBasedFilter` directly over bars or one of the
+          price dataseries are calculated using :meth:`pyalgotrade.technical.EventWindow.backfill`, in a single pass
+          if the event window supports it. Other indicators are calculated by replaying the bars.
+        * Results can be cached by key, so they get calculated once in parameter sweeps.
+    """
+
+    def __init__(self, barFeed):
+        self.__barFeed = barFeed
+        self.__frequency = barFeed.getFrequency()[0]
+        self.__cache = {}
+
+    def __getColumnValues(self, barDataSeries, sourceDS, bars):
+        columns = [
+            (barDataSeries, lambda bar: bar),
+            (barDataSeries.getOpenDataSeries(), lambda bar: bar.getOpen()),
+            (barDataSeries.getHighDataSeries(), lambda bar: bar.getHigh()),
+            (barDataSeries.getLowDataSeries(), lambda bar: bar.getLow()),
+            (barDataSeries.getCloseDataSeries(), lambda bar: bar.getClose()),
+            (barDataSeries.getVolumeDataSeries(), lambda bar: bar.getVolume()),
+            (barDataSeries.getAdjCloseDataSeries(), lambda bar: bar.getAdjClose()),
+        ]
+        for columnDS, getValue in columns:
+            if sourceDS is columnDS:
+                return [getValue(bar) for bar in bars]
+        return None
+
+    def __compute(self, instrument, buildIndicator):
+        bars = self.__barFeed.getBars(instrument)
+        if len(bars) == 0:
+            return [], []
+
+        useAdjustedValues = self.__barFeed[instrument, self.__frequency].getUseAdjustedValues()
+        for bar in bars:
+            bar.setUseAdjustedValue(useAdjustedValues)
+        barDataSeries = bards.BarDataSeries(len(bars))
+        barDataSeries.setUseAdjustedValues(useAdjustedValues)
+        indicator = buildIndicator(barDataSeries)
+        dateTimes = [bar.getDateTime() for bar in bars]
+
+        if isinstance(indicator, technical.EventBasedFilter):
+            values = self.__getColumnValues(barDataSeries, indicator.getDataSeries(), bars)
+            if values is not None:
+                return dateTimes, indicator.getEventWindow().backfill(dateTimes, values)
+
+        # Replay the bars and collect every value, regardless of the indicator maxLen.
+        dateTimes = []
+        values = []
+
+        def onNewValue(dataSeries, dateTime, value):
+            dateTimes.append(dateTime)
+            values.append(value)
+
+        indicator.getNewValueEvent().subscribe(onNewValue)
+        for bar in bars:
+            barDataSeries.append(bar)
+        return dateTimes, values
+
+    def getValues(self, instrument, buildIndicator, key=None):
+        """Returns the datetimes and the values for an indicator calculated over all the bars for an instrument.
+
+        :param instrument: Instrument identifier.
+        :type instrument: string.
+        :param buildIndicator: A function that receives a :class:`pyalgotrade.dataseries.bards.BarDataSeries` and
+            returns the indicator, for example **lambda ds: ma.SMA(ds.getCloseDataSeries(), 20)**.
+        :type buildIndicator: function.
+        :param key: If not None, the key used to cache the results.
+        :rtype: A tuple with a list of datetimes and a list of values.
+        """
+        if key is not None:
+            ret = self.__cache.get((instrument, key))
+            if ret is None:
+                ret = self.__compute(instrument, buildIndicator)
+                self.__cache[(instrument, key)] = ret
+        else:
+            ret = self.__compute(instrument, buildIndicator)
+        return ret
+
+    def add(self, instrument, buildIndicator, key=None, maxLen=None):
+        """Returns a :class:`PrecomputedDataSeries` with the indicator values, that follows the instrument
+        :class:`pyalgotrade.dataseries.bards.BarDataSeries` in the bar feed.
+
+        :param instrument: Instrument identifier.
+        :type instrument: string.
+        :param buildIndicator: A function that receives a :class:`pyalgotrade.dataseries.bards.BarDataSeries` and
+            returns the indicator.
+        :type buildIndicator: function.
+        :param key: If not None, the key used to cache the results.
+        :param maxLen: The maximum number of values to hold.
+        :type maxLen: int.
+
+        .. note::
+            If the bar feed gets reset, indicators have to be added again.
+        """
+        dateTimes, values = self.getValues(instrument, buildIndicator, key)
+        return PrecomputedDataSeries(self.__barFeed[instrument, self.__frequency], dateTimes, values, maxLen)
@@ -105,6 +105,20 @@ class RSIEventWindow(technical.EventWindow):
             self.__prevGain = avgGain
             self.__prevLoss = avgLoss
 
+    def backfill(self, dateTimes, values):
+        windowSize = self.getWindowSize()
+        notNone, counts = technical.split_none(values)
+        self._setValues(notNone)
+        rsis, avgGain, avgLoss = technical.get_kernel("rsi")(notNone, self.__period)
+        rsis = rsis.tolist()
+        # The RSI stays the same for None values.
+        ret = [rsis[count - 1] if count >= windowSize else None for count in counts.tolist()]
+        if len(notNone) >= windowSize:
+            self.__value = rsis[-1]
+            self.__prevGain = float(avgGain)
+            self.__prevLoss = float(avgLoss)
+        return ret
+
     def getValue(self):
         return self.__value
 
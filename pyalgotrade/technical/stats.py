@@ -19,18 +19,57 @@
 """
 
 from pyalgotrade import technical
+from pyalgotrade.utils import stats
 
 
-class StdDevEventWindow(technical.EventWindow):
+# Keeps the mean and variance for the values in the window at O(1) per value.
+# Moments are recalculated from the window values every period updates, and while the window holds NaN or infinite
+# values, so results match numpy within rounding errors.
+class RollingMomentsEventWindow(technical.EventWindow):
+    def __init__(self, period):
+        super(RollingMomentsEventWindow, self).__init__(period)
+        self.__moments = stats.RollingMoments(period)
+
+    def onNewValue(self, dateTime, value):
+        oldValue = None
+        if value is not None and self.windowFull():
+            oldValue = self.getValues()[0]
+
+        super(RollingMomentsEventWindow, self).onNewValue(dateTime, value)
+
+        if value is not None:
+            self.__moments.update(self.getValues(), oldValue, value)
+
+    # Recalculates the moments after the window values get replaced using _setValues.
+    def _resetMoments(self):
+        self.__moments.reset(self.getValues())
+
+    def getMean(self):
+        return self.__moments.getMean()
+
+    def getStdDev(self, ddof):
+        return self.__moments.getStdDev(ddof)
+
+
+class StdDevEventWindow(RollingMomentsEventWindow):
     def __init__(self, period, ddof):
         assert(period > 0)
         super(StdDevEventWindow, self).__init__(period)
         self.__ddof = ddof
 
+    def backfill(self, dateTimes, values):
+        period = self.getWindowSize()
+        notNone, counts = technical.split_none(values)
+        stdDevs = technical.get_kernel("rolling_std")(notNone, period, self.__ddof).tolist()
+        self._setValues(notNone)
+        self._resetMoments()
+        # The standard deviation stays the same for None values.
+        return [stdDevs[count - 1] if count >= period else None for count in counts.tolist()]
+
     def getValue(self):
         ret = None
         if self.windowFull():
-            ret = self.getValues().std(ddof=self.__ddof)
+            ret = self.getStdDev(self.__ddof)
         return ret
 
 
@@ -53,7 +92,7 @@ class StdDev(technical.EventBasedFilter):
         super(StdDev, self).__init__(dataSeries, StdDevEventWindow(period, ddof), maxLen)
 
 
-class ZScoreEventWindow(technical.EventWindow):
+class ZScoreEventWindow(RollingMomentsEventWindow):
     def __init__(self, period, ddof):
         assert(period > 1)
         super(ZScoreEventWindow, self).__init__(period)
@@ -62,10 +101,9 @@ class ZScoreEventWindow(technical.EventWindow):
     def getValue(self):
         ret = None
         if self.windowFull():
-            values = self.getValues()
-            lastValue = values[-1]
-            mean = values.mean()
-            std = values.std(ddof=self.__ddof)
+            lastValue = self.getValues()[-1]
+            mean = self.getMean()
+            std = self.getStdDev(self.__ddof)
             ret = (lastValue - mean) / float(std)
         return ret
 
@@ -18,9 +18,13 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+from six.moves import xrange
+
+from pyalgotrade import dataseries
 from pyalgotrade import technical
 from pyalgotrade.dataseries import bards
 from pyalgotrade.technical import ma
+from pyalgotrade.utils import collections
 
 
 def get_low_high_values(useAdjusted, bars):
@@ -35,15 +39,38 @@ def get_low_high_values(useAdjusted, bars):
 
 
 class SOEventWindow(technical.EventWindow):
-    def __init__(self, period, useAdjustedValues):
+    def __init__(self, period, useAdjustedValues, dSMAPeriod=None):
         assert(period > 1)
         super(SOEventWindow, self).__init__(period, dtype=object)
         self.__useAdjusted = useAdjustedValues
+        self.__lowestLow = collections.RollingExtremum(period, True)
+        self.__highestHigh = collections.RollingExtremum(period, False)
+        # %D is calculated in the same update, like ma.SMA would over the %K values.
+        self.__dWindow = None
+        if dSMAPeriod is not None:
+            self.__dWindow = ma.SMAEventWindow(dSMAPeriod)
+        self.__value = None
+
+    def onNewValue(self, dateTime, value):
+        super(SOEventWindow, self).onNewValue(dateTime, value)
+        if value is not None:
+            self.__lowestLow.append(value.getLow(self.__useAdjusted))
+            self.__highestHigh.append(value.getHigh(self.__useAdjusted))
+        self.__value = self.__calculate()
+        if self.__dWindow is not None:
+            self.__dWindow.onNewValue(dateTime, self.__value)
+
+    def getDValue(self):
+        return self.__dWindow.getValue()
 
     def getValue(self):
+        return self.__value
+
+    def __calculate(self):
         ret = None
         if self.windowFull():
-            lowestLow, highestHigh = get_low_high_values(self.__useAdjusted, self.getValues())
+            lowestLow = self.__lowestLow.getValue()
+            highestHigh = self.__highestHigh.getValue()
             currentClose = self.getValues()[-1].getClose(self.__useAdjusted)
             closeDelta = currentClose - lowestLow
             if closeDelta:
@@ -77,8 +104,38 @@ class StochasticOscillator(technical.EventBasedFilter):
         assert isinstance(barDataSeries, bards.BarDataSeries), \
             "barDataSeries must be a dataseries.bards.BarDataSeries instance"
 
-        super(StochasticOscillator, self).__init__(barDataSeries, SOEventWindow(period, useAdjustedValues), maxLen)
-        self.__d = ma.SMA(self, dSMAPeriod, maxLen)
+        self.__d = dataseries.SequenceDataSeries(maxLen)
+        super(StochasticOscillator, self).__init__(
+            barDataSeries, SOEventWindow(period, useAdjustedValues, dSMAPeriod), maxLen
+        )
+
+    def appendWithDateTime(self, dateTime, value):
+        super(StochasticOscillator, self).appendWithDateTime(dateTime, value)
+        # Write %D directly instead of having an SMA filter over %K.
+        self.__d.appendWithDateTime(dateTime, self.getEventWindow().getDValue())
+
+    def backfill(self):
+        if len(self) != 0:
+            raise Exception("The filter already has values")
+
+        # Replay the bars so %D gets calculated for each %K value.
+        barDataSeries = self.getDataSeries()
+        eventWindow = self.getEventWindow()
+        for dateTime, bar in zip(barDataSeries.getDateTimes(), barDataSeries[:]):
+            eventWindow.onNewValue(dateTime, bar)
+            self.appendWithDateTime(dateTime, eventWindow.getValue())
+
+    def getState(self):
+        ret = super(StochasticOscillator, self).getState()
+        ret["d"] = list(self.__d[:])
+        return ret
+
+    def setState(self, state):
+        super(StochasticOscillator, self).setState(state)
+        dateTimes = state["dateTimes"]
+        values = state["d"]
+        for i in xrange(max(len(values) - self.__d.getMaxLen(), 0), len(values)):
+            self.__d.appendWithDateTime(dateTimes[i], values[i])
 
     def getD(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the %D values."""
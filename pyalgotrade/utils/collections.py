@@ -18,7 +18,14 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import operator
+import tempfile
+
 import numpy as np
+from six.moves import collections_abc
+from six.moves import xrange
+
+from pyalgotrade.utils import dt
 
 
 def lt(v1, v2):
@@ -57,50 +64,135 @@ def intersect(values1, values2, skipNone=False):
 
 
 # Like a collections.deque but using a numpy.array.
+# Values are stored in a buffer with twice the capacity, and the window slides to the right on each append.
+# Once the window hits the end of the buffer, the last values are moved to the beginning. This makes appends
+# amortized O(1) while data() still returns a contiguous view.
+# If columns is not None, each value is a sequence with one item per column and data() returns a 2-D array
+# with one row per column, so that every column is contiguous.
 class NumPyDeque(object):
-    def __init__(self, maxLen, dtype=float):
+    def __init__(self, maxLen, dtype=float, columns=None):
         assert maxLen > 0, "Invalid maximum length"
 
-        self.__values = np.empty(maxLen, dtype=dtype)
+        self.__shape = () if columns is None else (columns,)
+        self.__values = np.empty(self.__shape + (maxLen * 2,), dtype=dtype)
         self.__maxLen = maxLen
-        self.__nextPos = 0
+        self.__start = 0
+        self.__end = 0
 
     def getMaxLen(self):
         return self.__maxLen
 
     def append(self, value):
-        if self.__nextPos < self.__maxLen:
-            self.__values[self.__nextPos] = value
-            self.__nextPos += 1
-        else:
-            # Shift items to the left and put the last value.
-            # I'm not using np.roll to avoid creating a new array.
-            self.__values[0:-1] = self.__values[1:]
-            self.__values[self.__nextPos - 1] = value
+        if self.__end == self.__values.shape[-1]:
+            # Move the last maxLen - 1 values to the beginning of the buffer.
+            keep = self.__maxLen - 1
+            self.__values[..., 0:keep] = self.__values[..., self.__end - keep:self.__end]
+            self.__start = 0
+            self.__end = keep
+
+        self.__values[..., self.__end] = value
+        self.__end += 1
+        if self.__end - self.__start > self.__maxLen:
+            self.__start += 1
 
     def data(self):
-        # If all values are not initialized, return a portion of the array.
-        if self.__nextPos < self.__maxLen:
-            ret = self.__values[0:self.__nextPos]
-        else:
-            ret = self.__values
-        return ret
+        return self.__values[..., self.__start:self.__end]
 
     def resize(self, maxLen):
         assert maxLen > 0, "Invalid maximum length"
 
         # Create empty, copy last values and swap.
-        values = np.empty(maxLen, dtype=self.__values.dtype)
-        lastValues = self.__values[0:self.__nextPos]
-        values[0:min(maxLen, len(lastValues))] = lastValues[-1*min(maxLen, len(lastValues)):]
+        lastValues = self.data()[..., -1*maxLen:]
+        count = lastValues.shape[-1]
+        values = np.empty(self.__shape + (maxLen * 2,), dtype=self.__values.dtype)
+        values[..., 0:count] = lastValues
         self.__values = values
+        self.__maxLen = maxLen
+        self.__start = 0
+        self.__end = count
+
+    def __len__(self):
+        return self.__end - self.__start
+
+    def __getitem__(self, key):
+        return self.data()[key]
+
+
+# A NumPyDeque like sequence that stores the values in a memory-mapped file instead of in memory.
+# The file grows as values are appended and it is never trimmed, so all the values ever appended stay on disk,
+# but only the last maxLen are accessible. The operating system decides which pages stay resident.
+# A NumPyDeque-like buffer backed by a memory-mapped file.
+# Values are appended at the end of the file. Once the file is full, values that were discarded because of maxLen get
+# overwritten by moving the ones in the deque to the beginning of the file, if they take up to half of it. Otherwise
+# the file doubles its size. This keeps the file below twice maxLen values, rounded up to a power of two times
+# MIN_CAPACITY, and moves every value at most once per each value appended.
+class MemMapDeque(object):
+    MIN_CAPACITY = 4096
+
+    def __init__(self, maxLen, dtype=float, fileName=None):
+        assert maxLen > 0, "Invalid maximum length"
+
+        if fileName is None:
+            self.__file = tempfile.TemporaryFile()
+        else:
+            self.__file = open(fileName, "w+b")
+        self.__dtype = np.dtype(dtype)
+        self.__values = np.empty(0, dtype=self.__dtype)
+        self.__maxLen = maxLen
+        self.__start = 0
+        self.__end = 0
+
+    def __grow(self):
+        # Double the capacity. The file is sparse so this doesn't write anything until values are appended.
+        capacity = max(len(self.__values) * 2, MemMapDeque.MIN_CAPACITY)
+        self.__file.truncate(capacity * self.__dtype.itemsize)
+        self.__values = np.memmap(self.__file, dtype=self.__dtype, mode="r+", shape=(capacity,))
+
+    def getMaxLen(self):
+        return self.__maxLen
+
+    def __compact(self):
+        count = self.__end - self.__start
+        self.__values[:count] = self.__values[self.__start:self.__end]
+        self.__start = 0
+        self.__end = count
+
+    def append(self, value):
+        if self.__end == len(self.__values):
+            if self.__start and self.__end - self.__start <= len(self.__values) // 2:
+                self.__compact()
+            else:
+                self.__grow()
+
+        self.__values[self.__end] = value
+        self.__end += 1
+        if self.__end - self.__start > self.__maxLen:
+            self.__start += 1
+
+    def data(self):
+        return self.__values[self.__start:self.__end]
+
+    def resize(self, maxLen):
+        assert maxLen > 0, "Invalid maximum length"
 
         self.__maxLen = maxLen
-        if self.__nextPos >= self.__maxLen:
-            self.__nextPos = self.__maxLen
+        self.__start = max(self.__start, self.__end - maxLen)
+
+    def flush(self):
+        if isinstance(self.__values, np.memmap):
+            self.__values.flush()
+
+    def close(self):
+        # Views returned by data() keep the mapping alive, so they can still be used after closing.
+        self.flush()
+        self.__values = np.empty(0, dtype=self.__dtype)
+        self.__file.truncate(self.__end * self.__dtype.itemsize)
+        self.__file.close()
+        self.__start = 0
+        self.__end = 0
 
     def __len__(self):
-        return self.__nextPos
+        return self.__end - self.__start
 
     def __getitem__(self, key):
         return self.data()[key]
@@ -139,3 +231,249 @@ class ListDeque(object):
 
     def __getitem__(self, key):
         return self.__values[key]
+
+
+# A read-only sequence with the values in a RingDeque, or a lazy DateTimeDeque, in order, that reflects later changes,
+# like the list that ListDeque.data() returns. Getting one is O(1), and it can be indexed, sliced and searched using bisect without
+# copying every value.
+# It supports the operations of a read-only list: indexing, slicing and concatenation return lists, so [:] or list()
+# can be used to get a copy. It also compares equal to lists and tuples with the same values.
+class RingDequeView(collections_abc.Sequence):
+    def __init__(self, ringDeque):
+        self.__ringDeque = ringDeque
+
+    def __len__(self):
+        return len(self.__ringDeque)
+
+    def __getitem__(self, key):
+        return self.__ringDeque[key]
+
+    def __iter__(self):
+        ringDeque = self.__ringDeque
+        for i in xrange(len(ringDeque)):
+            yield ringDeque[i]
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, tuple, RingDequeView)):
+            return NotImplemented
+        if len(self) != len(other):
+            return False
+        return all(value1 == value2 for value1, value2 in zip(self, other))
+
+    def __ne__(self, other):
+        ret = self.__eq__(other)
+        if ret is not NotImplemented:
+            ret = not ret
+        return ret
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+# A bounded sequence that, once full, overwrites the oldest value on each append.
+# Appends, indexing and data() are O(1), and slices only copy the selected values.
+class RingDeque(object):
+    def __init__(self, maxLen):
+        assert maxLen > 0, "Invalid maximum length"
+
+        self.__values = []
+        self.__maxLen = maxLen
+        # Position of the oldest value. This is only != 0 once the buffer is full.
+        self.__start = 0
+        self.__view = RingDequeView(self)
+
+    def getMaxLen(self):
+        return self.__maxLen
+
+    def append(self, value):
+        if len(self.__values) < self.__maxLen:
+            self.__values.append(value)
+        else:
+            self.__values[self.__start] = value
+            self.__start += 1
+            if self.__start == self.__maxLen:
+                self.__start = 0
+
+    def data(self):
+        # Returns a RingDequeView, that doesn't copy the values. It is always the same instance.
+        return self.__view
+
+    def resize(self, maxLen):
+        assert maxLen > 0, "Invalid maximum length"
+
+        self.__values = self[-1*maxLen:]
+        self.__maxLen = maxLen
+        self.__start = 0
+
+    def __len__(self):
+        return len(self.__values)
+
+    def __getitem__(self, key):
+        values = self.__values
+        start = self.__start
+        # Values are in order so we can use the list directly.
+        if start == 0:
+            return values[key]
+
+        size = len(values)
+        if isinstance(key, slice):
+            begin, end, step = key.indices(size)
+            if step != 1:
+                return [values[(start + i) % size] for i in xrange(begin, end, step)]
+            if end <= begin:
+                return []
+            begin += start
+            end += start
+            if end <= size:
+                return values[begin:end]
+            elif begin >= size:
+                return values[begin - size:end - size]
+            else:
+                return values[begin:] + values[:end - size]
+        else:
+            key = operator.index(key)
+            if key < 0:
+                key += size
+            if key < 0 or key >= size:
+                raise IndexError("Index out of range")
+            key += start
+            if key >= size:
+                key -= size
+            return values[key]
+
+
+# A bounded sequence of datetimes stored as int64 nanoseconds since epoch.
+# All the datetimes must be either naive or timezone aware. Timezone aware datetimes are returned in the timezone
+# of the first one appended.
+# datetime.datetime instances are only built when accessed, and data() caches them until the next change.
+# values can be used to supply a different int64 buffer that behaves like a NumPyDeque.
+# Keeps datetimes as int64 nanoseconds since epoch.
+# data() builds a list with every datetime, that is cached until the next append, unless lazy is True. In that case it
+# returns a RingDequeView that builds datetimes as they are accessed.
+class DateTimeDeque(object):
+    def __init__(self, maxLen, values=None, lazy=False):
+        if values is None:
+            values = NumPyDeque(maxLen, dtype=np.int64)
+        self.__values = values
+        self.__lazy = lazy
+        self.__view = RingDequeView(self)
+        self.__naive = None
+        self.__timeZone = None
+        self.__cache = None
+
+    def getMaxLen(self):
+        return self.__values.getMaxLen()
+
+    def getTimeZone(self):
+        return self.__timeZone
+
+    def __toEpochNs(self, dateTime):
+        if dateTime is None:
+            return dt.NAT
+        if self.__naive is not None and dt.datetime_is_naive(dateTime) != self.__naive:
+            raise Exception("Can't mix naive and timezone aware datetimes")
+        return dt.datetime_to_epoch_ns(dateTime)
+
+    def append(self, dateTime):
+        if dateTime is not None and self.__naive is None:
+            self.__naive = dt.datetime_is_naive(dateTime)
+            if not self.__naive:
+                self.__timeZone = dateTime.tzinfo
+        self.__values.append(self.__toEpochNs(dateTime))
+        self.__cache = None
+
+    def asarray(self):
+        # Returns a numpy.array view with the nanoseconds since epoch.
+        return self.__values.data()
+
+    def data(self):
+        if self.__lazy:
+            return self.__view
+        if self.__cache is None:
+            self.__cache = dt.epoch_ns_to_datetimes(self.__values.data(), self.__timeZone)
+        return self.__cache
+
+    def resize(self, maxLen):
+        self.__values.resize(maxLen)
+        self.__cache = None
+
+    def searchsorted(self, dateTime, side="left"):
+        # Returns the position where dateTime should be inserted to keep the datetimes sorted.
+        return int(np.searchsorted(self.__values.data(), self.__toEpochNs(dateTime), side=side))
+
+    def __len__(self):
+        return len(self.__values)
+
+    def __getitem__(self, key):
+        if self.__cache is not None:
+            return self.__cache[key]
+        values = self.__values[key]
+        if isinstance(key, slice):
+            return dt.epoch_ns_to_datetimes(values, self.__timeZone)
+        return dt.epoch_ns_to_datetimes([values], self.__timeZone)[0]
+
+
+# Keeps the maximum (or minimum) of the last windowSize values, using a monotonic deque.
+# Appends are amortized O(1): each value gets in and out of the deque at most once. Values that can't become the
+# extremum, because a newer one is greater (or lower), are dropped as soon as the newer one gets appended.
+# Like numpy.max/numpy.min, the extremum is NaN while there is a NaN in the window.
+class RollingExtremum(object):
+    def __init__(self, windowSize, useMin=False):
+        assert windowSize > 0, "Invalid window size"
+
+        self.__windowSize = windowSize
+        if useMin:
+            self.__dominates = operator.le
+        else:
+            self.__dominates = operator.ge
+        # Candidates, and their positions, from the oldest to the newest. Items before self.__head were discarded.
+        self.__values = []
+        self.__positions = []
+        self.__head = 0
+        self.__count = 0
+        self.__lastNaN = None
+
+    def getWindowSize(self):
+        return self.__windowSize
+
+    def append(self, value):
+        pos = self.__count
+        self.__count += 1
+        values = self.__values
+        positions = self.__positions
+
+        if value != value:
+            self.__lastNaN = pos
+        else:
+            while len(values) > self.__head and self.__dominates(value, values[-1]):
+                values.pop()
+                positions.pop()
+            values.append(value)
+            positions.append(pos)
+
+        if self.__head < len(positions) and positions[self.__head] <= pos - self.__windowSize:
+            self.__head += 1
+        # Compact once most of the lists are discarded items.
+        if self.__head > 32 and self.__head * 2 > len(values):
+            del values[:self.__head]
+            del positions[:self.__head]
+            self.__head = 0
+
+    def getValue(self):
+        # Returns the extremum, or None if there are no values.
+        if self.__lastNaN is not None and self.__lastNaN > self.__count - 1 - self.__windowSize:
+            return float("nan")
+        if self.__head == len(self.__values):
+            return None
+        return self.__values[self.__head]
+
+    def __len__(self):
+        return min(self.__count, self.__windowSize)
@@ -19,6 +19,8 @@
 """
 
 import datetime
+
+import numpy as np
 import pytz
 
 
@@ -66,6 +68,31 @@ def timestamp_to_datetime(timeStamp, localized=True):
     return ret
 
 
+def datetime_to_epoch_ns(dateTime):
+    """Converts a datetime.datetime to nanoseconds since epoch. Naive datetimes are converted as if they were UTC."""
+    if datetime_is_naive(dateTime):
+        diff = dateTime - epoch_naive
+    else:
+        diff = dateTime - epoch_utc
+    return ((diff.days * 86400 + diff.seconds) * 1000000 + diff.microseconds) * 1000
+
+
+def epoch_ns_to_datetimes(values, timeZone=None):
+    """Converts nanoseconds since epoch to a list of datetime.datetime. NAT values are converted to None.
+
+    :param values: The nanoseconds since epoch.
+    :type values: numpy.array.
+    :param timeZone: The timezone for the datetimes. If None, naive datetimes are returned.
+    """
+
+    values = np.asarray(values, dtype=np.int64)
+    microseconds = np.where(values == NAT, NAT, values // 1000)
+    ret = microseconds.view("datetime64[us]").astype(object).tolist()
+    if timeZone is not None:
+        ret = [None if dateTime is None else pytz.utc.localize(dateTime).astimezone(timeZone) for dateTime in ret]
+    return ret
+
+
 def get_first_monday(year):
     ret = datetime.date(year, 1, 1)
     if ret.weekday() != 0:
@@ -82,4 +109,8 @@ def get_last_monday(year):
     return ret
 
 
-epoch_utc = as_utc(datetime.datetime(1970, 1, 1))
+epoch_naive = datetime.datetime(1970, 1, 1)
+epoch_utc = as_utc(epoch_naive)
+
+# numpy.datetime64 NaT as an int64.
+NAT = np.iinfo(np.int64).min
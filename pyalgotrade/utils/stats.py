@@ -33,3 +33,261 @@ def stddev(values, ddof=1):
     if len(values):
         ret = numpy.array(values).std(ddof=ddof)
     return ret
+
+
+# Welford's algorithm steps over the count, mean and sum of squared differences (m2) for a window of values.
+# These are plain functions, and not RollingMoments methods, so compiled kernels in pyalgotrade.technical.kernels can
+# call them too.
+
+def moments_reset(values):
+    """Returns the count, mean and m2 for a numpy.array of values."""
+    count = len(values)
+    mean = 0.0
+    m2 = 0.0
+    if count:
+        mean = values.mean()
+        m2 = ((values - mean) ** 2).sum()
+    return count, mean, m2
+
+
+def moments_add(count, mean, m2, value):
+    count += 1
+    delta = value - mean
+    mean += delta / count
+    m2 += delta * (value - mean)
+    return count, mean, m2
+
+
+def moments_replace(count, mean, m2, oldValue, newValue):
+    """Replaces a value in the window with a new one, keeping the count."""
+    oldMean = mean
+    delta = newValue - oldValue
+    mean += delta / count
+    m2 += delta * (newValue - mean + oldValue - oldMean)
+    return count, mean, m2
+
+
+def moments_variance(count, m2, ddof):
+    ret = numpy.nan
+    if count - ddof > 0:
+        # Rounding errors could make it slightly negative.
+        ret = max(m2, 0.0) / (count - ddof)
+    return ret
+
+
+def rolling_moments_update(state, window, hasOldValue, oldValue, value, reanchorInterval):
+    """Updates the moments after a value gets appended to a window, and returns the new state.
+
+    :param state: A (count, mean, m2, updates, nonFinite) tuple, where updates is the number of updates since the
+        moments were last recalculated from the window values, and nonFinite is the number of NaN or infinite values
+        in the window.
+    :param window: A numpy.array with the window values, including the new one.
+    :param hasOldValue: True if a value left the window.
+    :param oldValue: The value that left the window, if hasOldValue is True.
+    :param value: The new value.
+    :param reanchorInterval: The number of updates after which the moments get recalculated from the window values,
+        to discard accumulated rounding errors.
+
+    .. note::
+        Moments also get recalculated from the window values while it holds NaN or infinite values.
+    """
+    count, mean, m2, updates, nonFinite = state
+    reanchor = updates >= reanchorInterval
+    if not numpy.isfinite(value):
+        nonFinite += 1
+    if hasOldValue and not numpy.isfinite(oldValue):
+        nonFinite -= 1
+        reanchor = True
+
+    if reanchor or nonFinite:
+        count, mean, m2 = moments_reset(window)
+        updates = 0
+    elif hasOldValue:
+        count, mean, m2 = moments_replace(count, mean, m2, oldValue, value)
+        updates += 1
+    else:
+        count, mean, m2 = moments_add(count, mean, m2, value)
+        updates += 1
+    return count, mean, m2, updates, nonFinite
+
+
+class RollingMoments(object):
+    """Incremental mean and variance for a window of values, using Welford's algorithm.
+
+    :param reanchorInterval: The number of updates after which the moments get recalculated from the window values,
+        to discard accumulated rounding errors. Check :func:`rolling_moments_update`.
+    :type reanchorInterval: int.
+    """
+
+    def __init__(self, reanchorInterval):
+        assert(reanchorInterval > 0)
+        self.__reanchorInterval = reanchorInterval
+        self.reset([])
+
+    def reset(self, values):
+        """Recalculates the moments from the window values."""
+        values = numpy.asarray(values, dtype=float)
+        count, mean, m2 = moments_reset(values)
+        self.__state = (count, mean, m2, 0, int(numpy.count_nonzero(~numpy.isfinite(values))))
+
+    def update(self, window, oldValue, value):
+        """Updates the moments after a value gets appended to the window.
+
+        :param window: A numpy.array with the window values, including the new one.
+        :param oldValue: The value that left the window, or None.
+        :param value: The new value.
+        """
+        self.__state = rolling_moments_update(
+            self.__state, window, oldValue is not None, 0.0 if oldValue is None else oldValue, value,
+            self.__reanchorInterval
+        )
+
+    def getCount(self):
+        return self.__state[0]
+
+    def getMean(self):
+        return self.__state[1]
+
+    def getVariance(self, ddof=0):
+        return moments_variance(self.__state[0], self.__state[2], ddof)
+
+    def getStdDev(self, ddof=0):
+        return numpy.sqrt(self.getVariance(ddof))
+
+
+class RollingRegression(object):
+    """Incremental least-squares regression of y on x for a window of (x, y) pairs.
+
+    Means, variances and the covariance are kept centered, as in Welford's algorithm, and x values are taken relative to
+    the first one after the last :meth:`reset`, so that large x values, like timestamps, don't lose precision.
+
+    :param reanchorInterval: The number of updates after which :meth:`needsReanchor` returns True, to recalculate
+        the moments from the window values using :meth:`reset` and discard accumulated rounding errors.
+    :type reanchorInterval: int.
+    """
+
+    def __init__(self, reanchorInterval):
+        assert(reanchorInterval > 0)
+        self.__reanchorInterval = reanchorInterval
+        self.reset([], [])
+
+    def reset(self, x, y):
+        """Recalculates the moments from the window values."""
+        x = numpy.asarray(x, dtype=float)
+        y = numpy.asarray(y, dtype=float)
+        assert(len(x) == len(y))
+        self.__count = len(x)
+        self.__originX = None
+        self.__meanX = 0.0
+        self.__meanY = 0.0
+        self.__cxx = 0.0
+        self.__cyy = 0.0
+        self.__cxy = 0.0
+        if self.__count:
+            self.__originX = x[0]
+            x = x - self.__originX
+            self.__meanX = x.mean()
+            self.__meanY = y.mean()
+            dx = x - self.__meanX
+            dy = y - self.__meanY
+            self.__cxx = (dx * dx).sum()
+            self.__cyy = (dy * dy).sum()
+            self.__cxy = (dx * dy).sum()
+        self.__updates = 0
+
+    def add(self, x, y):
+        if self.__originX is None:
+            self.__originX = x
+        x -= self.__originX
+        self.__count += 1
+        dx = x - self.__meanX
+        dy = y - self.__meanY
+        self.__meanX += dx / self.__count
+        self.__meanY += dy / self.__count
+        self.__cxx += dx * (x - self.__meanX)
+        self.__cyy += dy * (y - self.__meanY)
+        self.__cxy += dx * (y - self.__meanY)
+        self.__updates += 1
+
+    def remove(self, x, y):
+        assert(self.__count > 0)
+        if self.__count == 1:
+            updates = self.__updates
+            self.reset([], [])
+            self.__updates = updates + 1
+            return
+
+        # Undo add.
+        x -= self.__originX
+        self.__count -= 1
+        dx = x - self.__meanX
+        dy = y - self.__meanY
+        prevMeanX = self.__meanX - dx / self.__count
+        prevMeanY = self.__meanY - dy / self.__count
+        self.__cxx -= (x - prevMeanX) * dx
+        self.__cyy -= (y - prevMeanY) * dy
+        self.__cxy -= (x - prevMeanX) * dy
+        self.__meanX = prevMeanX
+        self.__meanY = prevMeanY
+        self.__updates += 1
+
+    def replace(self, oldX, oldY, newX, newY):
+        """Replaces a pair in the window with a new one, keeping the count."""
+        self.remove(oldX, oldY)
+        self.add(newX, newY)
+
+    def needsReanchor(self):
+        return self.__updates >= self.__reanchorInterval
+
+    def getCount(self):
+        return self.__count
+
+    def getMeanX(self):
+        ret = self.__meanX
+        if self.__originX is not None:
+            ret += self.__originX
+        return ret
+
+    def getMeanY(self):
+        return self.__meanY
+
+    def getVarianceX(self, ddof=0):
+        return self.__divide(max(self.__cxx, 0.0), ddof)
+
+    def getVarianceY(self, ddof=0):
+        return self.__divide(max(self.__cyy, 0.0), ddof)
+
+    def getCovariance(self, ddof=0):
+        return self.__divide(self.__cxy, ddof)
+
+    def __divide(self, value, ddof):
+        ret = numpy.nan
+        if self.__count - ddof > 0:
+            ret = value / float(self.__count - ddof)
+        return ret
+
+    def getSlope(self):
+        """Returns the slope of the regression line, or NaN if all x values are the same."""
+        ret = numpy.nan
+        if self.__cxx > 0:
+            ret = self.__cxy / self.__cxx
+        return ret
+
+    def getIntercept(self):
+        return self.__meanY - self.getSlope() * self.getMeanX()
+
+    def getValueAt(self, x):
+        """Returns the value of the regression line at x."""
+        if self.__originX is not None:
+            x -= self.__originX
+        return self.__meanY + self.getSlope() * (x - self.__meanX)
+
+    def getSlopeThroughOrigin(self):
+        """Returns the slope of the regression line without intercept, y = slope * x, or NaN if all x values are 0.
+        This is the hedge ratio used in pairs trading."""
+        ret = numpy.nan
+        meanX = self.getMeanX()
+        sumXX = self.__cxx + self.__count * meanX ** 2
+        if sumXX > 0:
+            ret = (self.__cxy + self.__count * meanX * self.__meanY) / sumXX
+        return ret
@@ -6,16 +6,9 @@ from pyalgotrade.dataseries import aligned
 from pyalgotrade import plotter
 from pyalgotrade.barfeed import yahoofeed
 from pyalgotrade.stratanalyzer import sharpe
+from pyalgotrade.utils import stats
 
 import numpy as np
-import statsmodels.api as sm
-
-
-def get_beta(values1, values2):
-    # http://statsmodels.sourceforge.net/stable/regression.html
-    model = sm.OLS(values1, values2)
-    results = model.fit()
-    return results.params[0]
 
 
 class StatArbHelper:
@@ -23,6 +16,12 @@ class StatArbHelper:
         # We're going to use datetime aligned versions of the dataseries.
         self.__ds1, self.__ds2 = aligned.datetime_aligned(ds1, ds2)
         self.__windowSize = windowSize
+        # Regression of the values in ds1 on the ones in ds2, updated as new values get in the window.
+        self.__regression = stats.RollingRegression(windowSize)
+        # True if the aligned dataseries got a new value since the last update.
+        self.__newValues = False
+        # Values get appended to ds2 after ds1.
+        self.__ds2.getNewValueEvent().subscribe(self.__onNewValue)
         self.__hedgeRatio = None
         self.__spread = None
         self.__spreadMean = None
@@ -44,14 +43,30 @@ class StatArbHelper:
     def getHedgeRatio(self):
         return self.__hedgeRatio
 
-    def __updateHedgeRatio(self, values1, values2):
-        self.__hedgeRatio = get_beta(values1, values2)
-
-    def __updateSpreadMeanAndStd(self, values1, values2):
+    def __updateRegression(self):
+        windowSize = self.__windowSize
+        if self.__regression.needsReanchor():
+            self.__regression.reset(self.__ds2[-1*windowSize:], self.__ds1[-1*windowSize:])
+        elif len(self.__ds1) > windowSize:
+            self.__regression.replace(
+                self.__ds2[-1*windowSize-1], self.__ds1[-1*windowSize-1], self.__ds2[-1], self.__ds1[-1]
+            )
+        else:
+            self.__regression.add(self.__ds2[-1], self.__ds1[-1])
+
+    def __updateHedgeRatio(self):
+        # The hedge ratio is the slope of an ordinary least squares regression, without intercept.
+        self.__hedgeRatio = self.__regression.getSlopeThroughOrigin()
+
+    def __updateSpreadMeanAndStd(self):
         if self.__hedgeRatio is not None:
-            spread = values1 - values2 * self.__hedgeRatio
-            self.__spreadMean = spread.mean()
-            self.__spreadStd = spread.std(ddof=1)
+            # The spread is values1 - values2 * hedgeRatio, so its moments come from the regression ones.
+            hedgeRatio = self.__hedgeRatio
+            regression = self.__regression
+            self.__spreadMean = regression.getMeanY() - hedgeRatio * regression.getMeanX()
+            variance = regression.getVarianceY(1) - 2 * hedgeRatio * regression.getCovariance(1) + \
+                hedgeRatio ** 2 * regression.getVarianceX(1)
+            self.__spreadStd = np.sqrt(max(variance, 0))
 
     def __updateSpread(self):
         if self.__hedgeRatio is not None:
@@ -61,13 +76,20 @@ class StatArbHelper:
         if self.__spread is not None and self.__spreadMean is not None and self.__spreadStd is not None:
             self.__zScore = (self.__spread - self.__spreadMean) / float(self.__spreadStd)
 
+    def __onNewValue(self, dataSeries, dateTime, value):
+        self.__newValues = True
+
     def update(self):
+        # The aligned dataseries may not get a new value on every bar.
+        if not self.__newValues:
+            return
+
+        self.__newValues = False
+        self.__updateRegression()
         if len(self.__ds1) >= self.__windowSize:
-            values1 = np.asarray(self.__ds1[-1*self.__windowSize:])
-            values2 = np.asarray(self.__ds2[-1*self.__windowSize:])
-            self.__updateHedgeRatio(values1, values2)
+            self.__updateHedgeRatio()
             self.__updateSpread()
-            self.__updateSpreadMeanAndStd(values1, values2)
+            self.__updateSpreadMeanAndStd()
             self.__updateZScore()
 
 
@@ -70,5 +70,6 @@ setup(
     ],
     extras_require={
         "TALib":  ["Cython", "TA-Lib"],
+        "Numba":  ["numba"],
     },
 )
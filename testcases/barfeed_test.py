@@ -20,10 +20,14 @@
 
 import datetime
 
+import six
+
 from . import common
 
 from pyalgotrade import barfeed
 from pyalgotrade.barfeed import common as bfcommon
+from pyalgotrade.barfeed import membf
+from pyalgotrade.dataseries import bards
 from pyalgotrade import bar
 from pyalgotrade import dispatcher
 
@@ -76,11 +80,62 @@ class OptimizerBarFeedTestCase(common.TestCase):
         barFeed = barfeed.OptimizerBarFeed(bar.Frequency.DAY, ["orcl"], bars)
         check_base_barfeed(self, barFeed, False)
 
+    def testColumnar(self):
+        bars = [
+            bar.Bars(
+                {"orcl": bar.BasicBar(datetime.datetime(2001, 1, i), i, i + 2, i - 1, i + 1, 10, i, bar.Frequency.DAY)},
+                frequecy=bar.Frequency.DAY
+            ) for i in range(1, 6)
+        ]
+        barFeed = barfeed.OptimizerBarFeed(bar.Frequency.DAY, ["orcl"], bars)
+        columnarFeed = barfeed.OptimizerBarFeed(bar.Frequency.DAY, ["orcl"], bars, columnar=True)
+        self.assertFalse(isinstance(barFeed["orcl", bar.Frequency.DAY], bards.ColumnarBarDataSeries))
+        self.assertTrue(isinstance(columnarFeed["orcl", bar.Frequency.DAY], bards.ColumnarBarDataSeries))
+        for feed in [barFeed, columnarFeed]:
+            feed.start()
+            while not feed.eof():
+                feed.dispatch()
+            feed.stop()
+            feed.join()
+
+        ds = barFeed["orcl", bar.Frequency.DAY]
+        columnarDS = columnarFeed["orcl", bar.Frequency.DAY]
+        self.assertEqual(columnarDS.getDateTimes(), ds.getDateTimes())
+        self.assertEqual(list(columnarDS.getCloseDataSeries()[:]), ds.getCloseDataSeries()[:])
+        self.assertEqual(columnarDS[-1].getHigh(), ds[-1].getHigh())
+
+        with six.assertRaisesRegex(self, Exception, "Instruments were already registered"):
+            columnarFeed.setUseColumnarDataSeries(False)
+
     def testEmtpy(self):
         barFeed = barfeed.OptimizerBarFeed(bar.Frequency.DAY, ["orcl"], [])
         self.assertEquals(barFeed.barsHaveAdjClose(), False)
 
 
+class MemBarFeedTestCase(common.TestCase):
+    def testFrequency(self):
+        class BarFeed(membf.BarFeed):
+            def barsHaveAdjClose(self):
+                return True
+
+        barFeed = BarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromSequence("orcl", [
+            bar.BasicBar(datetime.datetime(2001, 1, i), 1, 1, 1, 1, 1, 1, bar.Frequency.DAY) for i in range(1, 4)
+        ])
+        self.assertEqual(barFeed.getRegisteredInstruments(), ["orcl"])
+        self.assertTrue(("orcl", bar.Frequency.DAY) in barFeed)
+
+        frequencies = []
+        barFeed.getNewValuesEvent().subscribe(lambda dateTime, bars: frequencies.append(bars.getBarFrequency()))
+        barFeed.start()
+        while not barFeed.eof():
+            barFeed.dispatch()
+        barFeed.stop()
+        barFeed.join()
+        self.assertEqual(frequencies, [bar.Frequency.DAY] * 3)
+        self.assertEqual(len(barFeed["orcl", bar.Frequency.DAY]), 3)
+
+
 class CommonTestCase(common.TestCase):
     def testSanitize(self):
         self.assertEqual(bfcommon.sanitize_ohlc(10, 12, 9, 10), (10, 12, 9, 10))
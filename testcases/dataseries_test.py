@@ -19,7 +19,9 @@
 """
 
 import datetime
+import os
 
+import numpy as np
 from six.moves import xrange
 
 from . import common
@@ -27,7 +29,11 @@ from . import common
 from pyalgotrade import dataseries
 from pyalgotrade.dataseries import bards
 from pyalgotrade.dataseries import aligned
+from pyalgotrade.dataseries import mmapds
 from pyalgotrade import bar
+from pyalgotrade import marketsession
+from pyalgotrade.utils import collections
+from pyalgotrade.utils import dt
 
 
 class TestSequenceDataSeries(common.TestCase):
@@ -142,6 +148,171 @@ class TestSequenceDataSeries(common.TestCase):
         self.assertEqual(ds[0], 90)
         self.assertEqual(ds[-1], 99)
 
+    def testGetDateTimesDoesntCopy(self):
+        ds = dataseries.SequenceDataSeries(10)
+        firstDt = datetime.datetime(2000, 1, 1)
+        dateTimes = ds.getDateTimes()
+        for i in xrange(15):
+            ds.appendWithDateTime(firstDt + datetime.timedelta(days=i), i)
+
+        # The same view is returned every time, and it reflects the values appended later.
+        self.assertTrue(ds.getDateTimes() is dateTimes)
+        expected = [firstDt + datetime.timedelta(days=i) for i in xrange(5, 15)]
+        self.assertEqual(dateTimes, expected)
+        self.assertEqual(dateTimes[-1], expected[-1])
+        self.assertEqual(ds[ds.getSliceForDateTimes(expected[-2])], [13, 14])
+
+        # It behaves like a read-only list.
+        self.assertEqual(dateTimes[:], expected)
+        self.assertEqual(list(dateTimes), expected)
+        self.assertEqual(dateTimes + [firstDt], expected + [firstDt])
+        self.assertEqual([firstDt] + dateTimes, [firstDt] + expected)
+        self.assertEqual(dateTimes.index(expected[3]), 3)
+        self.assertEqual(dateTimes.count(expected[3]), 1)
+        self.assertTrue(expected[0] in dateTimes)
+        self.assertEqual(list(reversed(dateTimes)), expected[::-1])
+
+
+class TestNumericSequenceDataSeries(common.TestCase):
+    def testEmpty(self):
+        ds = dataseries.NumericSequenceDataSeries()
+        self.assertTrue(len(ds) == 0)
+        self.assertEqual(len(ds.asarray()), 0)
+        with self.assertRaises(IndexError):
+            ds[-1]
+        self.assertEqual(ds.getValueAbsolute(0), None)
+
+    def testNonEmpty(self):
+        ds = dataseries.NumericSequenceDataSeries()
+        for i in xrange(10):
+            ds.append(i)
+        self.assertEqual(ds[0], 0)
+        self.assertEqual(ds[-1], 9)
+        self.assertEqual(ds.getValueAbsolute(5), 5)
+        self.assertEqual(list(ds[2:5]), [2, 3, 4])
+        self.assertEqual(ds.asarray().dtype, np.float64)
+
+    def testInvalidKeys(self):
+        ds = dataseries.NumericSequenceDataSeries()
+        for i in xrange(10):
+            ds.append(i)
+        self.assertEqual(ds[np.int64(2)], 2)
+        with self.assertRaises(IndexError):
+            ds[10]
+        for key in [1.0, np.float64(1), "1", [1, 2], np.array([1, 2]), ds.asarray() > 5, None]:
+            with self.assertRaises(TypeError):
+                ds[key]
+
+    def testSliceIsAView(self):
+        ds = dataseries.NumericSequenceDataSeries()
+        for i in xrange(10):
+            ds.append(i)
+        values = ds[-5:]
+        self.assertTrue(isinstance(values, np.ndarray))
+        self.assertFalse(values.flags.owndata)
+        self.assertEqual(list(values), [5, 6, 7, 8, 9])
+
+    def testNaN(self):
+        ds = dataseries.NumericSequenceDataSeries()
+        ds.append(None)
+        ds.append(1)
+        self.assertEqual(ds[0], None)
+        self.assertEqual(ds[1], 1)
+        self.assertTrue(np.isnan(ds[:][0]))
+
+        ds = dataseries.NumericSequenceDataSeries(nanAsNone=False)
+        ds.append(None)
+        self.assertTrue(np.isnan(ds[0]))
+
+    def testBounded(self):
+        ds = dataseries.NumericSequenceDataSeries(maxLen=3)
+        for i in xrange(100):
+            ds.append(i)
+            self.assertEqual(ds[-1], i)
+            self.assertEqual(list(ds.asarray()), list(range(max(0, i - 2), i + 1)))
+        self.assertEqual(len(ds), 3)
+        self.assertEqual(len(ds.getDateTimes()), 3)
+
+    def testResize(self):
+        ds = dataseries.NumericSequenceDataSeries(100)
+        for i in xrange(100):
+            ds.append(i)
+        ds.setMaxLen(2)
+        self.assertEqual(len(ds), 2)
+        self.assertEqual(list(ds.asarray()), [98, 99])
+
+    def testBarDataSeriesColumns(self):
+        ds = bards.BarDataSeries(numericColumns=True)
+        for i in xrange(10):
+            ds.append(bar.BasicBar(datetime.datetime.now() + datetime.timedelta(seconds=i), 2, 4, 1, 3, 10, None, bar.Frequency.SECOND))
+        self.assertTrue(isinstance(ds.getCloseDataSeries(), dataseries.NumericSequenceDataSeries))
+        self.assertEqual(list(ds.getCloseDataSeries().asarray()), [3] * 10)
+        self.assertEqual(ds.getAdjCloseDataSeries()[-1], None)
+        self.assertEqual(ds[-1].getClose(), 3)
+
+
+class TestEpochDateTimes(common.TestCase):
+    def testNaive(self):
+        ds = dataseries.SequenceDataSeries(maxLen=5, epochDateTimes=True)
+        firstDt = datetime.datetime(2000, 1, 1, 10, 30, 0, 123456)
+        for i in xrange(10):
+            ds.appendWithDateTime(firstDt + datetime.timedelta(days=i), i)
+        self.assertEqual(len(ds.getDateTimes()), 5)
+        self.assertEqual(ds.getDateTimes(), [firstDt + datetime.timedelta(days=i) for i in xrange(5, 10)])
+        self.assertEqual(ds[:], [5, 6, 7, 8, 9])
+
+    def testLocalized(self):
+        timeZone = marketsession.USEquities.getTimezone()
+        ds = dataseries.SequenceDataSeries(epochDateTimes=True)
+        dateTimes = [dt.localize(datetime.datetime(2000, 3, 1) + datetime.timedelta(days=i), timeZone) for i in xrange(60)]
+        for dateTime in dateTimes:
+            ds.appendWithDateTime(dateTime, 1)
+        self.assertEqual(ds.getDateTimes(), dateTimes)
+        self.assertEqual(ds.getDateTimes()[-1].tzinfo.zone, timeZone.zone)
+        self.assertEqual(ds.getDateTimes()[-1].hour, 0)
+
+    def testNone(self):
+        ds = dataseries.SequenceDataSeries(epochDateTimes=True)
+        ds.append(1)
+        ds.append(2)
+        self.assertEqual(ds.getDateTimes(), [None, None])
+
+    def testInvalidDateTime(self):
+        ds = dataseries.SequenceDataSeries(epochDateTimes=True)
+        now = datetime.datetime.now()
+        ds.appendWithDateTime(now, 1)
+        with self.assertRaises(Exception):
+            ds.appendWithDateTime(now - datetime.timedelta(seconds=1), 1)
+        with self.assertRaises(Exception):
+            ds.appendWithDateTime(dt.as_utc(now + datetime.timedelta(seconds=1)), 1)
+
+    def testSliceForDateTimes(self):
+        for epochDateTimes in [True, False]:
+            ds = dataseries.SequenceDataSeries(maxLen=10, epochDateTimes=epochDateTimes)
+            firstDt = datetime.datetime(2000, 1, 1)
+            for i in xrange(20):
+                ds.appendWithDateTime(firstDt + datetime.timedelta(days=i), i)
+            self.assertEqual(ds[ds.getSliceForDateTimes()], list(range(10, 20)))
+            self.assertEqual(ds[ds.getSliceForDateTimes(firstDt, firstDt + datetime.timedelta(days=12))], [10, 11])
+            self.assertEqual(ds[ds.getSliceForDateTimes(firstDt + datetime.timedelta(days=15, hours=1))], [16, 17, 18, 19])
+            self.assertEqual(ds[ds.getSliceForDateTimes(endDateTime=firstDt)], [])
+
+    def testBarDataSeries(self):
+        ds = bards.BarDataSeries(maxLen=5, epochDateTimes=True)
+        firstDt = datetime.datetime(2000, 1, 1)
+        for i in xrange(10):
+            ds.append(bar.BasicBar(firstDt + datetime.timedelta(days=i), 2, 4, 1, 3, 10, 3, bar.Frequency.DAY, {"extra": i}))
+
+        dateTimes = [firstDt + datetime.timedelta(days=i) for i in xrange(5, 10)]
+        self.assertEqual(ds.getDateTimes(), dateTimes)
+        self.assertEqual(ds.getCloseDataSeries().getDateTimes(), dateTimes)
+        self.assertEqual(ds.getExtraDataSeries("extra").getDateTimes(), dateTimes)
+        self.assertEqual(ds.getExtraDataSeries("extra")[:], [5, 6, 7, 8, 9])
+
+        ds.getCloseDataSeries().setMaxLen(2)
+        self.assertEqual(ds.getCloseDataSeries().getDateTimes(), dateTimes[-2:])
+        self.assertEqual(ds.getCloseDataSeries()[ds.getCloseDataSeries().getSliceForDateTimes(dateTimes[-1])], [3])
+
 
 class TestBarDataSeries(common.TestCase):
     def testEmpty(self):
@@ -215,6 +386,153 @@ class TestBarDataSeries(common.TestCase):
             self.assertEqual(ds.getDateTimes()[i], firstDt + datetime.timedelta(seconds=i))
 
 
+class TestColumnarBarDataSeries(common.TestCase):
+    def __buildBar(self, dateTime, i):
+        return bar.BasicBar(dateTime, 2 + i, 4 + i, 1 + i, 3 + i, 10 + i, None, bar.Frequency.DAY, {"extra": i})
+
+    def testEmpty(self):
+        ds = bards.ColumnarBarDataSeries()
+        with self.assertRaises(IndexError):
+            ds[-1]
+        self.assertEqual(ds.getValueAbsolute(0), None)
+        self.assertEqual(len(ds.getCloseDataSeries()), 0)
+
+    def testValues(self):
+        ds = bards.ColumnarBarDataSeries(maxLen=5)
+        closeValues = []
+        ds.getCloseDataSeries().getNewValueEvent().subscribe(lambda ds_, dateTime, value: closeValues.append(value))
+        firstDt = datetime.datetime(2000, 1, 1)
+        for i in xrange(10):
+            ds.append(self.__buildBar(firstDt + datetime.timedelta(days=i), i))
+
+        self.assertEqual(len(ds), 5)
+        self.assertEqual(closeValues, [3 + i for i in xrange(10)])
+        self.assertEqual(list(ds.getOpenDataSeries()[:]), [2 + i for i in xrange(5, 10)])
+        self.assertEqual(list(ds.getHighDataSeries()[:]), [4 + i for i in xrange(5, 10)])
+        self.assertEqual(list(ds.getLowDataSeries()[:]), [1 + i for i in xrange(5, 10)])
+        self.assertEqual(list(ds.getCloseDataSeries().asarray()), [3 + i for i in xrange(5, 10)])
+        self.assertEqual(list(ds.getVolumeDataSeries()[:]), [10 + i for i in xrange(5, 10)])
+        self.assertEqual(ds.getAdjCloseDataSeries()[-1], None)
+        self.assertEqual(ds.getExtraDataSeries("extra")[:], [5, 6, 7, 8, 9])
+        self.assertEqual(ds.getCloseDataSeries().getDateTimes(), ds.getDateTimes())
+        self.assertEqual(ds.getValues().shape, (6, 5))
+
+        bar_ = ds[-1]
+        self.assertEqual(bar_.getDateTime(), firstDt + datetime.timedelta(days=9))
+        self.assertEqual(bar_.getOpen(), 11)
+        self.assertEqual(bar_.getClose(), 12)
+        self.assertEqual(bar_.getAdjClose(), None)
+        self.assertEqual(bar_.getFrequency(), bar.Frequency.DAY)
+        self.assertEqual(bar_.getExtraColumns(), {"extra": 9})
+        self.assertEqual([bar_.getClose() for bar_ in ds[-2:]], [11, 12])
+
+    def testNumPyIntKeys(self):
+        ds = bards.ColumnarBarDataSeries()
+        firstDt = datetime.datetime(2000, 1, 1)
+        for i in xrange(5):
+            ds.append(self.__buildBar(firstDt + datetime.timedelta(days=i), i))
+
+        for key in [np.int64(1), np.int32(-1), np.argmax(ds.getCloseDataSeries().asarray())]:
+            self.assertEqual(ds[key].getDateTime(), ds.getDateTimes()[int(key)])
+        with self.assertRaises(IndexError):
+            ds[np.int64(5)]
+        with self.assertRaises(TypeError):
+            ds[np.float64(1)]
+
+    def testResize(self):
+        ds = bards.ColumnarBarDataSeries(maxLen=10, epochDateTimes=True)
+        firstDt = datetime.datetime(2000, 1, 1)
+        for i in xrange(10):
+            ds.append(self.__buildBar(firstDt + datetime.timedelta(days=i), i))
+        ds.setMaxLen(3)
+        self.assertEqual(list(ds.getCloseDataSeries()[:]), [10, 11, 12])
+        self.assertEqual(ds.getCloseDataSeries().getDateTimes(), [firstDt + datetime.timedelta(days=i) for i in xrange(7, 10)])
+        self.assertEqual(ds[0].getDateTime(), firstDt + datetime.timedelta(days=7))
+        with self.assertRaises(Exception):
+            ds.getCloseDataSeries().setMaxLen(2)
+
+    def testAdjustedValues(self):
+        ds = bards.ColumnarBarDataSeries()
+        ds.setUseAdjustedValues(True)
+        ds.append(bar.BasicBar(datetime.datetime(2000, 1, 1), 2, 4, 1, 3, 10, 1.5, bar.Frequency.DAY))
+        self.assertEqual(ds[0].getPrice(), 1.5)
+        self.assertEqual(ds.getPriceDataSeries()[0], 1.5)
+
+    def testNoneFrequency(self):
+        ds = bards.ColumnarBarDataSeries()
+        ds.append(bar.BasicBar(datetime.datetime(2000, 1, 1), 2, 4, 1, 3, 10, None, None))
+        ds.append(bar.BasicBar(datetime.datetime(2000, 1, 2), 2, 4, 1, 3, 10, None, bar.Frequency.DAY))
+        self.assertEqual(ds[0].getFrequency(), None)
+        self.assertEqual(ds[1].getFrequency(), bar.Frequency.DAY)
+
+
+class TestMemMapDataSeries(common.TestCase):
+    def testUnbounded(self):
+        with common.TmpDir() as tmpPath:
+            fileName = os.path.join(tmpPath, "values")
+            ds = mmapds.MemMapDataSeries(fileName)
+            firstDt = datetime.datetime(2000, 1, 1)
+            count = collections.MemMapDeque.MIN_CAPACITY * 3
+            for i in xrange(count):
+                ds.appendWithDateTime(firstDt + datetime.timedelta(seconds=i), i)
+
+            self.assertEqual(len(ds), count)
+            self.assertEqual(ds[0], 0)
+            self.assertEqual(ds[-1], count - 1)
+            self.assertEqual(ds.getValueAbsolute(100), 100)
+            self.assertEqual(list(ds[100:103]), [100, 101, 102])
+            dateTimeSlice = ds.getSliceForDateTimes(firstDt + datetime.timedelta(seconds=10), firstDt + datetime.timedelta(seconds=12))
+            self.assertEqual(list(ds[dateTimeSlice]), [10, 11])
+            ds.close()
+
+            self.assertEqual(os.path.getsize(fileName), count * 8)
+            self.assertEqual(os.path.getsize(fileName + ".datetimes"), count * 8)
+
+    def testBounded(self):
+        ds = mmapds.MemMapDataSeries(maxLen=3)
+        for i in xrange(10):
+            ds.append(i)
+            self.assertEqual(ds[-1], i)
+        ds.append(None)
+        self.assertEqual(len(ds), 3)
+        self.assertEqual(ds[-1], None)
+        self.assertEqual(ds.getDateTimes(), [None, None, None])
+        ds.setMaxLen(2)
+        self.assertEqual(list(ds.asarray()[:1]), [9])
+        ds.close()
+
+    def testBoundedFileSize(self):
+        with common.TmpDir() as tmpPath:
+            fileName = os.path.join(tmpPath, "values")
+            ds = mmapds.MemMapDataSeries(fileName, maxLen=100)
+            firstDt = datetime.datetime(2000, 1, 1)
+            count = collections.MemMapDeque.MIN_CAPACITY * 5
+            for i in xrange(count):
+                ds.appendWithDateTime(firstDt + datetime.timedelta(seconds=i), i)
+                self.assertEqual(ds[0], max(i - 99, 0))
+
+            self.assertEqual(list(ds[:]), list(xrange(count - 100, count)))
+            self.assertEqual(ds.getDateTimes()[0], firstDt + datetime.timedelta(seconds=count - 100))
+            ds.flush()
+            self.assertEqual(os.path.getsize(fileName), collections.MemMapDeque.MIN_CAPACITY * 8)
+            self.assertEqual(os.path.getsize(fileName + ".datetimes"), collections.MemMapDeque.MIN_CAPACITY * 8)
+            ds.close()
+
+    def testLazyDateTimes(self):
+        ds = mmapds.MemMapDataSeries()
+        firstDt = datetime.datetime(2000, 1, 1)
+        dateTimes = ds.getDateTimes()
+        self.assertNotIsInstance(dateTimes, list)
+        for i in xrange(5):
+            ds.appendWithDateTime(firstDt + datetime.timedelta(days=i), i)
+        # The view reflects values appended later.
+        self.assertEqual(len(dateTimes), 5)
+        self.assertEqual(dateTimes[-1], firstDt + datetime.timedelta(days=4))
+        self.assertEqual(dateTimes[1:3], [firstDt + datetime.timedelta(days=i) for i in xrange(1, 3)])
+        self.assertEqual(list(dateTimes), [firstDt + datetime.timedelta(days=i) for i in xrange(5)])
+        ds.close()
+
+
 class TestDateAlignedDataSeries(common.TestCase):
     def testNotAligned(self):
         size = 20
@@ -406,6 +724,126 @@ class TestDateAlignedDataSeries(common.TestCase):
         self.assertEqual(ads1[:], [2, 3])
         self.assertEqual(ads2[:], [2, 3])
 
+    def testDefaultMaxPending(self):
+        # Up to maxLen pending datetimes are kept by default.
+        for count, expected in [(5, [0]), (6, [])]:
+            ds1 = dataseries.SequenceDataSeries()
+            ds2 = dataseries.SequenceDataSeries()
+            ads1, ads2 = aligned.datetime_aligned(ds1, ds2, maxLen=5)
+
+            now = datetime.datetime.now()
+            for i in xrange(count):
+                ds1.appendWithDateTime(now + datetime.timedelta(seconds=i), i)
+            ds2.appendWithDateTime(now, 0)
+            self.assertEqual(ads1[:], expected)
+            self.assertEqual(ads2[:], expected)
+
+    def testNoneDateTimes(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        ads1, ads2 = aligned.datetime_aligned(ds1, ds2)
+
+        ds1.append(1)
+        ds2.append(2)
+        self.assertEqual(ads1[:], [1])
+        self.assertEqual(ads2[:], [2])
+        self.assertEqual(ads1.getDateTimes(), [None])
+
+        # Values are paired in the order they arrive.
+        ds1.append(3)
+        ds1.append(5)
+        ds2.append(4)
+        ds2.append(6)
+        ds2.append(8)
+        self.assertEqual(ads1[:], [1, 3, 5])
+        self.assertEqual(ads2[:], [2, 4, 6])
+        ds1.append(7)
+        self.assertEqual(ads1[:], [1, 3, 5, 7])
+        self.assertEqual(ads2[:], [2, 4, 6, 8])
+
+    def testMaxPending(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        ads1, ads2 = aligned.datetime_aligned(ds1, ds2, maxPending=3)
+
+        now = datetime.datetime.now()
+        for i in xrange(5):
+            ds1.appendWithDateTime(now + datetime.timedelta(seconds=i), i)
+        # Datetimes 0 and 1 were discarded.
+        for i in xrange(5):
+            ds2.appendWithDateTime(now + datetime.timedelta(seconds=i), i * 10)
+        self.assertEqual(ads1[:], [2, 3, 4])
+        self.assertEqual(ads2[:], [20, 30, 40])
+        with self.assertRaises(Exception):
+            aligned.datetime_aligned(ds1, ds2, maxPending=0)
+
+
+class TestDateAlignedManyDataSeries(common.TestCase):
+    def testPartiallyAligned(self):
+        dss = [dataseries.SequenceDataSeries() for _ in xrange(5)]
+        adss = aligned.datetime_aligned_many(*dss)
+        self.assertEqual(len(adss), len(dss))
+
+        now = datetime.datetime.now()
+        for i in xrange(20):
+            dateTime = now + datetime.timedelta(seconds=i)
+            for j, ds in enumerate(dss):
+                # Every dataseries skips a different datetime, except for the last one.
+                if i % (j + 2) != 0 or j == len(dss) - 1:
+                    ds.appendWithDateTime(dateTime, i * 10 + j)
+
+        expected = [i for i in xrange(20) if all(i % (j + 2) != 0 for j in xrange(len(dss) - 1))]
+        for j, ads in enumerate(adss):
+            self.assertEqual(ads.getDateTimes(), [now + datetime.timedelta(seconds=i) for i in expected])
+            self.assertEqual(ads[:], [i * 10 + j for i in expected])
+
+    def testOutOfStep(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        ds3 = dataseries.SequenceDataSeries()
+        ads1, ads2, ads3 = aligned.datetime_aligned_many(ds1, ds2, ds3)
+
+        now = datetime.datetime.now()
+        for i in xrange(10):
+            ds1.appendWithDateTime(now + datetime.timedelta(seconds=i), i)
+        for i in xrange(0, 10, 2):
+            ds2.appendWithDateTime(now + datetime.timedelta(seconds=i), i)
+        self.assertEqual(len(ads1), 0)
+        for i in xrange(0, 10, 3):
+            ds3.appendWithDateTime(now + datetime.timedelta(seconds=i), i)
+
+        for ads in [ads1, ads2, ads3]:
+            self.assertEqual(ads[:], [0, 6])
+
+    def testMaxPending(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        ads1, ads2 = aligned.datetime_aligned_many(ds1, ds2, maxLen=2, maxPending=3)
+
+        now = datetime.datetime.now()
+        for i in xrange(10):
+            ds1.appendWithDateTime(now + datetime.timedelta(seconds=i), i)
+        for i in xrange(10):
+            ds2.appendWithDateTime(now + datetime.timedelta(seconds=i), i)
+        self.assertEqual(ads1[:], [8, 9])
+        self.assertEqual(ads2.getDateTimes(), [now + datetime.timedelta(seconds=i) for i in [8, 9]])
+
+    def testNoneDateTimes(self):
+        dss = [dataseries.SequenceDataSeries() for _ in xrange(3)]
+        adss = aligned.datetime_aligned_many(*dss, maxPending=2)
+        for i in xrange(3):
+            dss[0].append(i)
+        # The oldest value in the first dataseries was discarded.
+        for ds in dss[1:]:
+            ds.append(10)
+        self.assertEqual([ads[:] for ads in adss], [[1], [10], [10]])
+
+    def testInvalidArguments(self):
+        with self.assertRaises(Exception):
+            aligned.datetime_aligned_many()
+        with self.assertRaises(TypeError):
+            aligned.datetime_aligned_many(dataseries.SequenceDataSeries(), maxlen=1)
+
 
 class TestUpdatedDefaultMaxLen(common.TestCase):
     def setUp(self):
@@ -0,0 +1,129 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import csv
+import datetime
+import os
+
+from six.moves import xrange
+
+from . import common
+from .observer_test import NonRealtimeFeed
+
+from pyalgotrade import instrumentation
+from pyalgotrade import dispatcher
+from pyalgotrade import dataseries
+from pyalgotrade.technical import ma
+
+
+class Handler(object):
+    def __init__(self):
+        self.values = []
+
+    def onValue(self, value):
+        self.values.append(value)
+
+
+class InstrumentationTestCase(common.TestCase):
+    def tearDown(self):
+        instrumentation.disable()
+
+    def __run(self):
+        now = datetime.datetime.now()
+        feed = NonRealtimeFeed([now + datetime.timedelta(seconds=i) for i in xrange(10)])
+        handler = Handler()
+        feed.getEvent().subscribe(handler.onValue)
+        disp = dispatcher.Dispatcher()
+        disp.addSubject(feed)
+        disp.run()
+        return feed, handler
+
+    def testDisabled(self):
+        self.assertIsNone(instrumentation.current)
+        feed, handler = self.__run()
+        self.assertEqual(len(handler.values), 10)
+        self.assertIsNone(instrumentation.disable())
+
+    def testDispatchAndHandlerStats(self):
+        stats = instrumentation.enable()
+        feed, handler = self.__run()
+        self.assertEqual(instrumentation.disable(), stats)
+        self.assertEqual(len(handler.values), 10)
+
+        subjectStats = stats.getSubjectStats()
+        self.assertEqual(list(subjectStats.keys()), [feed])
+        self.assertEqual(subjectStats[feed].getName(), "NonRealtimeFeed")
+        self.assertEqual(subjectStats[feed].getCount(), 10)
+
+        handlerStats = stats.getHandlerStats()[handler.onValue]
+        self.assertEqual(handlerStats.getName(), "Handler.onValue")
+        self.assertEqual(handlerStats.getCount(), 10)
+        self.assertGreater(handlerStats.getTotal(), 0)
+        self.assertLessEqual(handlerStats.getPercentile(50), handlerStats.getMax())
+        self.assertLessEqual(handlerStats.getPercentile(99), handlerStats.getMax())
+
+        # Nothing should get recorded once disabled.
+        self.__run()
+        self.assertEqual(stats.getHandlerStats()[handler.onValue].getCount(), 10)
+
+    def testIndicatorStats(self):
+        stats = instrumentation.enable(instrumentation.Stats(maxSamples=5))
+        ds = dataseries.SequenceDataSeries()
+        ma.SMA(ds, 2)
+        ma.SMA(ds, 3)
+        for i in xrange(20):
+            ds.append(i)
+
+        # Each instance gets its own counter, named after the class.
+        counters = list(stats.getHandlerStats().values())
+        self.assertEqual(len(counters), 2)
+        for counter in counters:
+            self.assertEqual(counter.getName(), "SMA.__onNewValue")
+            self.assertEqual(counter.getCount(), 20)
+            self.assertIsNotNone(counter.getMean())
+
+    def testObserverDoesntImportNumPy(self):
+        res = common.run_python_code("import sys; import pyalgotrade.observer; print('numpy' in sys.modules)")
+        self.assertTrue(res.exit_ok())
+        self.assertEqual(res.get_output_lines(), ["False"])
+
+    def testReport(self):
+        stats = instrumentation.enable()
+        self.__run()
+        instrumentation.disable()
+
+        report = stats.getReport()
+        self.assertEqual(len(report), 2)
+        self.assertEqual(sorted([row["kind"] for row in report]), ["handler", "subject"])
+        self.assertEqual(report[0]["count"], 10)
+        self.assertIn("p99", report[0])
+
+        with common.TmpDir() as tmpPath:
+            fileName = os.path.join(tmpPath, "stats.csv")
+            stats.writeCSV(fileName)
+            with open(fileName) as f:
+                rows = list(csv.DictReader(f))
+            with open(fileName, "rb") as f:
+                lines = f.read().split(b"\n")
+        self.assertEqual(len(rows), 2)
+        # One csv line terminator per row, without newline translation.
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(all(line.endswith(b"\r") and not line.endswith(b"\r\r") for line in lines[:-1]))
+        self.assertEqual(rows[0]["name"], report[0]["name"])
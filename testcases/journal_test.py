@@ -0,0 +1,203 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+import mmap
+import os
+
+import pytz
+from six.moves import xrange
+
+from . import common
+
+from pyalgotrade import bar
+from pyalgotrade import barfeed
+from pyalgotrade import dispatcher
+from pyalgotrade.barfeed import journal
+
+
+def build_bars(dateTimes, instruments, adjClose=True):
+    ret = []
+    for i, dateTime in enumerate(dateTimes):
+        barDict = {}
+        for j, instrument in enumerate(instruments):
+            # Skip some bars so not every instrument is present on each event.
+            if len(instruments) > 1 and (i + j) % 3 == 2:
+                continue
+            price = 10 + i * 0.1 + j
+            barDict[instrument] = bar.BasicBar(
+                dateTime, price, price + 1.25, price - 1.5, price + 0.5, 1000 + i, price * 0.9 if adjClose else None,
+                bar.Frequency.DAY, {"extra": i * 0.5}
+            )
+        ret.append(bar.Bars(barDict, frequecy=bar.Frequency.DAY))
+    return ret
+
+
+def run_feed(feed, instruments, recorder=None):
+    events = []
+
+    def onBars(dateTime, bars):
+        events.append((dateTime, bars.getBarFrequency(), sorted([
+            (
+                instrument,
+                bar_.getDateTime(), bar_.getOpen(), bar_.getHigh(), bar_.getLow(), bar_.getClose(), bar_.getVolume(),
+                bar_.getAdjClose(), bar_.getFrequency(), bar_.getExtraColumns()
+            ) for instrument, bar_ in bars.items()
+        ])))
+
+    feed.getNewValuesEvent().subscribe(onBars)
+    disp = dispatcher.Dispatcher()
+    disp.addSubject(feed)
+    if recorder is not None:
+        recorder.attach(disp)
+    disp.run()
+    if recorder is not None:
+        recorder.close()
+    return events
+
+
+class JournalTestCase(common.TestCase):
+    instruments = ["orcl", "ibm", "aapl"]
+
+    def __testRecordAndReplay(self, dateTimes, adjClose=True):
+        bars = build_bars(dateTimes, JournalTestCase.instruments, adjClose)
+        with common.TmpDir() as tmpPath:
+            fileName = os.path.join(tmpPath, "journal.bin")
+            srcFeed = barfeed.OptimizerBarFeed(bar.Frequency.DAY, JournalTestCase.instruments, bars)
+            srcEvents = run_feed(srcFeed, JournalTestCase.instruments, journal.Recorder(fileName))
+
+            replayFeed = journal.ReplayBarFeed(fileName, bar.Frequency.DAY)
+            self.assertEqual(sorted(replayFeed.getRegisteredInstruments()), sorted(JournalTestCase.instruments))
+            self.assertEqual(replayFeed.barsHaveAdjClose(), adjClose)
+            replayEvents = run_feed(replayFeed, JournalTestCase.instruments)
+
+        self.assertEqual(len(srcEvents), len(dateTimes))
+        self.assertEqual(replayEvents, srcEvents)
+        for instrument in JournalTestCase.instruments:
+            srcDS = srcFeed[instrument, bar.Frequency.DAY]
+            replayDS = replayFeed[instrument, bar.Frequency.DAY]
+            self.assertEqual(replayDS.getDateTimes(), srcDS.getDateTimes())
+            self.assertEqual(replayDS.getCloseDataSeries()[:], srcDS.getCloseDataSeries()[:])
+            self.assertEqual(replayDS.getExtraDataSeries("extra")[:], srcDS.getExtraDataSeries("extra")[:])
+
+    def testNaiveDateTimes(self):
+        dateTimes = [datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i, microseconds=i) for i in xrange(50)]
+        self.__testRecordAndReplay(dateTimes)
+
+    def testLocalizedDateTimes(self):
+        timeZone = pytz.timezone("US/Eastern")
+        dateTimes = [
+            timeZone.localize(datetime.datetime(2000, 3, 1, 16) + datetime.timedelta(days=i)) for i in xrange(60)
+        ]
+        self.__testRecordAndReplay(dateTimes, adjClose=False)
+
+    def testMultipleFeeds(self):
+        dateTimes = [datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i) for i in xrange(10)]
+        with common.TmpDir() as tmpPath:
+            fileName = os.path.join(tmpPath, "journal.bin")
+            recorder = journal.Recorder(fileName)
+            disp = dispatcher.Dispatcher()
+            feeds = [
+                barfeed.OptimizerBarFeed(bar.Frequency.DAY, ["orcl"], build_bars(dateTimes[0::2], ["orcl"])),
+                barfeed.OptimizerBarFeed(bar.Frequency.DAY, ["ibm"], build_bars(dateTimes[1::2], ["ibm"])),
+            ]
+            for feed in feeds:
+                disp.addSubject(feed)
+            recorder.attach(disp)
+            disp.run()
+            recorder.close()
+
+            for subjectId, instrument in enumerate(["orcl", "ibm"]):
+                replayFeed = journal.ReplayBarFeed(fileName, bar.Frequency.DAY, subjectId)
+                self.assertEqual(replayFeed.getRegisteredInstruments(), [instrument])
+                replayEvents = run_feed(replayFeed, [instrument])
+                self.assertEqual(
+                    [event[0] for event in replayEvents],
+                    feeds[subjectId][instrument, bar.Frequency.DAY].getDateTimes()
+                )
+
+    def __replayAndCheckClosed(self, replay):
+        # Keep track of the buffers mapped by ReplayBarFeed.
+        buffers = []
+
+        class TrackedBuffer(mmap.mmap):
+            closed = False
+
+            def close(self):
+                super(TrackedBuffer, self).close()
+                self.closed = True
+
+        class TrackedMMap(object):
+            ACCESS_READ = mmap.ACCESS_READ
+
+            @staticmethod
+            def mmap(*args, **kwargs):
+                ret = TrackedBuffer(*args, **kwargs)
+                buffers.append(ret)
+                return ret
+
+        dateTimes = [datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i) for i in xrange(10)]
+        bars = build_bars(dateTimes, JournalTestCase.instruments, True)
+        with common.TmpDir() as tmpPath:
+            fileName = os.path.join(tmpPath, "journal.bin")
+            srcFeed = barfeed.OptimizerBarFeed(bar.Frequency.DAY, JournalTestCase.instruments, bars)
+            run_feed(srcFeed, JournalTestCase.instruments, journal.Recorder(fileName))
+
+            journal.mmap = TrackedMMap
+            try:
+                replayFeed = journal.ReplayBarFeed(fileName, bar.Frequency.DAY)
+            finally:
+                journal.mmap = mmap
+            self.assertEqual(len(buffers), 1)
+            self.assertFalse(buffers[0].closed)
+            replay(replayFeed)
+            self.assertTrue(buffers[0].closed)
+            self.assertTrue(replayFeed.eof())
+            self.assertEqual(replayFeed.getNextBars(), None)
+
+    def testClosedAtEOF(self):
+        def replay(replayFeed):
+            for i in xrange(10):
+                self.assertFalse(replayFeed.eof())
+                replayFeed.getNextBars()
+        self.__replayAndCheckClosed(replay)
+
+    def testClosedOnStop(self):
+        def replay(replayFeed):
+            replayFeed.start()
+            replayFeed.getNextBars()
+            replayFeed.stop()
+            replayFeed.join()
+        self.__replayAndCheckClosed(replay)
+
+    def testClose(self):
+        def replay(replayFeed):
+            replayFeed.close()
+            replayFeed.close()
+        self.__replayAndCheckClosed(replay)
+
+    def testInvalidFile(self):
+        with common.TmpDir() as tmpPath:
+            fileName = os.path.join(tmpPath, "journal.bin")
+            with open(fileName, "wb") as f:
+                f.write(b"invalid journal")
+            with self.assertRaises(Exception) as e:
+                journal.ReplayBarFeed(fileName, bar.Frequency.DAY)
+            self.assertTrue(str(e.exception).startswith("Invalid journal file"))
@@ -20,7 +20,12 @@
 
 import datetime
 import copy
+import os
+import threading
+import time
+import unittest
 
+import six
 from six.moves import xrange
 
 from . import common
@@ -97,7 +102,104 @@ class RealtimeFeed(observer.Subject):
         return self.__priority
 
 
+class QueueFeed(observer.Subject):
+    def __init__(self):
+        super(QueueFeed, self).__init__()
+        self.__queue = observer.DataReadyQueue()
+        self.__event = observer.Event()
+        self.__eof = False
+
+    def getQueue(self):
+        return self.__queue
+
+    def getEvent(self):
+        return self.__event
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def join(self):
+        pass
+
+    def eof(self):
+        return self.__eof
+
+    def dispatch(self):
+        value = self.__queue.get(False)
+        if value is None:
+            self.__eof = True
+        else:
+            self.__event.emit(value)
+        return not self.__eof
+
+    def peekDateTime(self):
+        return None
+
+    def getDataReadySignal(self):
+        return self.__queue.getDataReadySignal()
+
+
+class PipeFeed(observer.Subject):
+    def __init__(self, fd):
+        super(PipeFeed, self).__init__()
+        self.__fd = fd
+        self.__event = observer.Event()
+        self.__eof = False
+
+    def getEvent(self):
+        return self.__event
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def join(self):
+        pass
+
+    def eof(self):
+        return self.__eof
+
+    def dispatch(self):
+        data = os.read(self.__fd, 1)
+        if data == b"x":
+            self.__eof = True
+        else:
+            self.__event.emit(data)
+        return not self.__eof
+
+    def peekDateTime(self):
+        return None
+
+    def getDataReadySignal(self):
+        return self.__fd
+
+
+class DataReadyQueueTestCase(common.TestCase):
+    def testSignal(self):
+        callbacks = []
+        q = observer.DataReadyQueue()
+        signal = q.getDataReadySignal()
+        signal.addCallback(lambda: callbacks.append(1))
+        self.assertFalse(signal.isSet())
+        q.put(1)
+        q.put(2)
+        self.assertTrue(signal.isSet())
+        self.assertEqual(callbacks, [1, 1])
+        q.get()
+        self.assertTrue(signal.isSet())
+        q.get()
+        self.assertFalse(signal.isSet())
+
+
 class DispatcherTestCase(common.TestCase):
+    def createDispatcher(self):
+        return dispatcher.Dispatcher()
+
     def test1NrtFeed(self):
         values = []
         now = datetime.datetime.now()
@@ -105,7 +207,7 @@ class DispatcherTestCase(common.TestCase):
         nrtFeed = NonRealtimeFeed(copy.copy(datetimes))
         nrtFeed.getEvent().subscribe(lambda x: values.append(x))
 
-        disp = dispatcher.Dispatcher()
+        disp = self.createDispatcher()
         disp.addSubject(nrtFeed)
         disp.run()
 
@@ -121,7 +223,7 @@ class DispatcherTestCase(common.TestCase):
         nrtFeed2 = NonRealtimeFeed(copy.copy(datetimes2))
         nrtFeed2.getEvent().subscribe(lambda x: values.append(x))
 
-        disp = dispatcher.Dispatcher()
+        disp = self.createDispatcher()
         disp.addSubject(nrtFeed1)
         disp.addSubject(nrtFeed2)
         disp.run()
@@ -137,7 +239,7 @@ class DispatcherTestCase(common.TestCase):
         nrtFeed = RealtimeFeed(copy.copy(datetimes))
         nrtFeed.getEvent().subscribe(lambda x: values.append(x))
 
-        disp = dispatcher.Dispatcher()
+        disp = self.createDispatcher()
         disp.addSubject(nrtFeed)
         disp.run()
 
@@ -153,7 +255,7 @@ class DispatcherTestCase(common.TestCase):
         nrtFeed2 = RealtimeFeed(copy.copy(datetimes2))
         nrtFeed2.getEvent().subscribe(lambda x: values.append(x))
 
-        disp = dispatcher.Dispatcher()
+        disp = self.createDispatcher()
         disp.addSubject(nrtFeed1)
         disp.addSubject(nrtFeed2)
         disp.run()
@@ -173,7 +275,7 @@ class DispatcherTestCase(common.TestCase):
         nrtFeed2 = NonRealtimeFeed(copy.copy(datetimes2))
         nrtFeed2.getEvent().subscribe(lambda x: values.append(x))
 
-        disp = dispatcher.Dispatcher()
+        disp = self.createDispatcher()
         disp.addSubject(nrtFeed1)
         disp.addSubject(nrtFeed2)
         disp.run()
@@ -189,19 +291,19 @@ class DispatcherTestCase(common.TestCase):
         feed2 = RealtimeFeed([], 3)
         feed1 = RealtimeFeed([], 0)
 
-        disp = dispatcher.Dispatcher()
+        disp = self.createDispatcher()
         disp.addSubject(feed3)
         disp.addSubject(feed2)
         disp.addSubject(feed1)
         self.assertEqual(disp.getSubjects(), [feed1, feed2, feed3])
 
-        disp = dispatcher.Dispatcher()
+        disp = self.createDispatcher()
         disp.addSubject(feed1)
         disp.addSubject(feed2)
         disp.addSubject(feed3)
         self.assertEqual(disp.getSubjects(), [feed1, feed2, feed3])
 
-        disp = dispatcher.Dispatcher()
+        disp = self.createDispatcher()
         disp.addSubject(feed3)
         disp.addSubject(feed4)
         disp.addSubject(feed2)
@@ -216,7 +318,7 @@ class DispatcherTestCase(common.TestCase):
         feed1.getEvent().subscribe(lambda x: values.append(x))
         feed2.getEvent().subscribe(lambda x: values.append(x))
 
-        disp = dispatcher.Dispatcher()
+        disp = self.createDispatcher()
         disp.addSubject(feed2)
         disp.addSubject(feed1)
         self.assertEqual(disp.getSubjects(), [feed1, feed2])
@@ -225,6 +327,102 @@ class DispatcherTestCase(common.TestCase):
         self.assertTrue(values[0] < values[1])
 
 
+class HeapDispatcherTestCase(DispatcherTestCase):
+    def createDispatcher(self):
+        return dispatcher.HeapDispatcher()
+
+    def testManyNrtFeeds(self):
+        values = []
+        now = datetime.datetime.now()
+        feeds = []
+        for i in xrange(20):
+            datetimes = [now + datetime.timedelta(seconds=j) for j in xrange(i, 100, i + 1)]
+            feed = NonRealtimeFeed(datetimes, i)
+            feed.getEvent().subscribe(lambda x, i=i: values.append((x, i)))
+            feeds.append(feed)
+
+        disp = self.createDispatcher()
+        for feed in reversed(feeds):
+            disp.addSubject(feed)
+        disp.run()
+
+        # Events should be sorted by datetime first and then by dispatch priority.
+        self.assertEqual(len(values), sum(len(range(i, 100, i + 1)) for i in xrange(20)))
+        self.assertEqual(values, sorted(values))
+
+    def testSameResultsAsDispatcher(self):
+        now = datetime.datetime.now()
+
+        def run(disp):
+            values = []
+            for i in xrange(5):
+                datetimes = [now + datetime.timedelta(seconds=j) for j in xrange(0, 30, i + 1)]
+                feed = NonRealtimeFeed(datetimes, None)
+                feed.getEvent().subscribe(lambda x, i=i: values.append((x, i)))
+                disp.addSubject(feed)
+            feed = RealtimeFeed([now + datetime.timedelta(seconds=j) for j in xrange(7)], None)
+            feed.getEvent().subscribe(lambda x: values.append((x, None)))
+            disp.addSubject(feed)
+            disp.run()
+            return values
+
+        self.assertEqual(run(self.createDispatcher()), run(dispatcher.Dispatcher()))
+
+
+@unittest.skipIf(six.PY2, "asyncio is not available")
+class AsyncioDispatcherTestCase(DispatcherTestCase):
+    def createDispatcher(self):
+        from pyalgotrade import asyncdispatcher
+        return asyncdispatcher.AsyncioDispatcher()
+
+    def __produce(self, put, values):
+        for value in values:
+            time.sleep(0.02)
+            put(value)
+
+    def testDataReadyQueue(self):
+        values = []
+        idleEvents = []
+        feed = QueueFeed()
+        feed.getEvent().subscribe(lambda x: values.append(x))
+
+        disp = self.createDispatcher()
+        disp.getIdleEvent().subscribe(lambda: idleEvents.append(1))
+        disp.addSubject(feed)
+        producer = threading.Thread(target=self.__produce, args=(feed.getQueue().put, [1, 2, 3, 4, 5, None]))
+        producer.start()
+        disp.run()
+        producer.join()
+
+        self.assertEqual(values, [1, 2, 3, 4, 5])
+        # The dispatcher should sleep while the queue is empty instead of spinning.
+        self.assertLessEqual(len(idleEvents), 10)
+
+    def testFileDescriptor(self):
+        values = []
+        idleEvents = []
+        readFd, writeFd = os.pipe()
+        try:
+            feed = PipeFeed(readFd)
+            feed.getEvent().subscribe(lambda x: values.append(x))
+
+            disp = self.createDispatcher()
+            disp.getIdleEvent().subscribe(lambda: idleEvents.append(1))
+            disp.addSubject(feed)
+            producer = threading.Thread(
+                target=self.__produce, args=(lambda value: os.write(writeFd, value), [b"a", b"b", b"c", b"x"])
+            )
+            producer.start()
+            disp.run()
+            producer.join()
+        finally:
+            os.close(readFd)
+            os.close(writeFd)
+
+        self.assertEqual(values, [b"a", b"b", b"c"])
+        self.assertLessEqual(len(idleEvents), 10)
+
+
 class EventTestCase(common.TestCase):
     def testEmitOrder(self):
         handlersData = []
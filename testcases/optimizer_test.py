@@ -21,6 +21,8 @@
 import sys
 import logging
 
+import six
+
 from . import common
 
 from pyalgotrade.optimizer import local
@@ -44,6 +46,11 @@ class FailingStrategy(strategy.BacktestingStrategy):
         raise Exception("oh no!")
 
 
+class FailingBarFeed(yahoofeed.Feed):
+    def __iter__(self):
+        raise Exception("Failed to load bars")
+
+
 class OptimizerTestCase(common.TestCase):
     def testLocal(self):
         barFeed = yahoofeed.Feed()
@@ -62,3 +69,10 @@ class OptimizerTestCase(common.TestCase):
         barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
         res = local.run(FailingStrategy, barFeed, parameters_generator(instrument, 5, 100), logLevel=logging.DEBUG)
         self.assertIsNone(res)
+
+    def testServerFailsToStart(self):
+        barFeed = FailingBarFeed()
+        instrument = "orcl"
+        barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        with six.assertRaisesRegex(self, Exception, "The server failed to start"):
+            local.run(sma_crossover.SMACrossOver, barFeed, parameters_generator(instrument, 5, 10))
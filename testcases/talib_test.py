@@ -19,6 +19,7 @@
 """
 
 import datetime
+import numpy
 import talib
 
 from six.moves import xrange
@@ -26,7 +27,10 @@ from six.moves import xrange
 from . import common
 
 from pyalgotrade.talibext import indicator
+from pyalgotrade.talibext import streaming
+from pyalgotrade.talibext import panel
 from pyalgotrade import bar
+from pyalgotrade import barfeed
 from pyalgotrade import dataseries
 from pyalgotrade.dataseries import bards
 
@@ -575,3 +579,216 @@ class TestCase(common.TestCase):
         self.assertAmountsAreEqual(indicator.WMA(barDs.getCloseDataSeries(), 252, 2)[2], 94.52)
         self.assertAmountsAreEqual(indicator.WMA(barDs.getCloseDataSeries(), 252, 2)[3], 94.86)  # Original value 94.85
         self.assertAmountsAreEqual(indicator.WMA(barDs.getCloseDataSeries(), 252, 2)[-1], 108.16)
+
+
+class StreamingTestCase(common.TestCase):
+    def __buildBar(self, i):
+        dateTime = datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i)
+        return bar.BasicBar(
+            dateTime, OPEN_VALUES[i], HIGH_VALUES[i], LOW_VALUES[i], CLOSE_VALUES[i], VOLUME_VALUES[i], CLOSE_VALUES[i],
+            bar.Frequency.DAY
+        )
+
+    def __assertValuesEqual(self, value, expected):
+        if isinstance(expected, tuple):
+            self.assertEqual(len(value), len(expected))
+            for v1, v2 in zip(value, expected):
+                self.__assertValuesEqual(v1, v2)
+        elif expected != expected:
+            self.assertTrue(value != value)
+        else:
+            self.assertAlmostEqual(value, expected, places=6)
+
+    def __testMatchesIndicator(self, count, functionName, indicatorFun, useBars, preload=0, **parameters):
+        barDs = bards.BarDataSeries()
+        for i in xrange(preload):
+            barDs.append(self.__buildBar(i))
+        source = barDs if useBars else barDs.getCloseDataSeries()
+        streamingIndicator = streaming.StreamingIndicator(source, count, functionName, **parameters)
+
+        for i in xrange(preload, len(OPEN_VALUES)):
+            barDs.append(self.__buildBar(i))
+            expected = indicatorFun(source, count, **parameters)
+            if isinstance(expected, tuple):
+                expected = tuple(values[-1] for values in expected)
+            else:
+                expected = expected[-1]
+            self.__assertValuesEqual(streamingIndicator.getValue(), expected)
+        return streamingIndicator
+
+    def testWindowedFunctions(self):
+        sma = self.__testMatchesIndicator(100, "SMA", indicator.SMA, False, timeperiod=20)
+        self.assertEqual(sma.getWindowSize(), 20)
+        bbands = self.__testMatchesIndicator(100, "BBANDS", indicator.BBANDS, False, timeperiod=10)
+        self.assertEqual(bbands.getWindowSize(), 10)
+        stoch = self.__testMatchesIndicator(100, "STOCH", indicator.STOCH, True)
+        self.assertEqual(stoch.getWindowSize(), stoch.getLookback() + 1)
+        self.__testMatchesIndicator(100, "CCI", indicator.CCI, True, timeperiod=14)
+        self.__testMatchesIndicator(100, "MFI", indicator.MFI, True, timeperiod=14)
+        self.__testMatchesIndicator(100, "SMA", indicator.SMA, False, preload=50, timeperiod=20)
+
+    def testHistoryDependentFunctions(self):
+        ema = self.__testMatchesIndicator(100, "EMA", indicator.EMA, False, timeperiod=20)
+        self.assertEqual(ema.getWindowSize(), 100)
+        atr = self.__testMatchesIndicator(100, "ATR", indicator.ATR, True, timeperiod=14)
+        self.assertEqual(atr.getWindowSize(), 100)
+        macd = self.__testMatchesIndicator(100, "MACD", indicator.MACD, False)
+        self.assertEqual(macd.getWindowSize(), 100)
+        bbands = self.__testMatchesIndicator(100, "BBANDS", indicator.BBANDS, False, timeperiod=10, matype=talib.MA_Type.EMA)
+        self.assertEqual(bbands.getWindowSize(), 100)
+
+    def testCachedPerValue(self):
+        barDs = bards.BarDataSeries()
+        atr = streaming.StreamingIndicator(barDs, 50, "ATR", timeperiod=14)
+        self.assertEqual(atr.getValue(), None)
+        for i in xrange(30):
+            barDs.append(self.__buildBar(i))
+        value = atr.getValue()
+        self.assertIs(atr.getValue(), value)
+        barDs.append(self.__buildBar(30))
+        self.assertIsNot(atr.getValue(), value)
+
+    def testMissingValues(self):
+        ds = dataseries.SequenceDataSeries()
+        sma = streaming.StreamingIndicator(ds, 10, "SMA", timeperiod=3)
+        for value in [1, 2, None, 4, 5, 6]:
+            ds.append(value)
+            if ds[-3:].count(None):
+                self.assertEqual(sma.getValue(), None)
+        self.assertEqual(sma.getValue(), 5)
+
+
+class PanelTestCase(common.TestCase):
+    Instruments = ["a", "b", "c"]
+
+    def __buildBar(self, dateTime, i, factor):
+        return bar.BasicBar(
+            dateTime, OPEN_VALUES[i] * factor, HIGH_VALUES[i] * factor, LOW_VALUES[i] * factor,
+            CLOSE_VALUES[i] * factor, VOLUME_VALUES[i], CLOSE_VALUES[i] * factor, bar.Frequency.DAY
+        )
+
+    def __buildBars(self, i, skip=None):
+        dateTime = datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i)
+        barDict = {}
+        for j, instrument in enumerate(PanelTestCase.Instruments):
+            if instrument != skip:
+                barDict[instrument] = self.__buildBar(dateTime, i, j + 1)
+        return bar.Bars(barDict, frequecy=bar.Frequency.DAY)
+
+    def testMatchesIndicator(self):
+        p = panel.Panel(PanelTestCase.Instruments, maxLen=100)
+        barDSs = dict((instrument, bards.BarDataSeries()) for instrument in PanelTestCase.Instruments)
+        for i in xrange(len(OPEN_VALUES)):
+            bars = self.__buildBars(i)
+            p.appendBars(bars)
+            for instrument in PanelTestCase.Instruments:
+                barDSs[instrument].append(bars[instrument])
+
+            atr = p.evaluate("ATR", 100, timeperiod=14)
+            cci = p.evaluate("CCI", 100, timeperiod=14)
+            bbands = p.evaluate("BBANDS", 100, timeperiod=10)
+            self.assertIs(p.evaluate("ATR", 100, timeperiod=14), atr)
+            for instrument in PanelTestCase.Instruments:
+                barDs = barDSs[instrument]
+                for obtained, expected in [
+                    (atr[instrument], indicator.ATR(barDs, 100, 14)[-1]),
+                    (cci[instrument], indicator.CCI(barDs, 100, 14)[-1]),
+                    (bbands[instrument][0], indicator.BBANDS(barDs.getCloseDataSeries(), 100, 10)[0][-1]),
+                ]:
+                    if expected != expected:
+                        self.assertTrue(obtained != obtained)
+                    else:
+                        self.assertAlmostEqual(obtained, expected, places=6)
+        self.assertEqual(len(p), 100)
+        self.assertEqual(p.getValues("close").shape, (3, 100))
+
+    def testMissingBars(self):
+        p = panel.Panel(PanelTestCase.Instruments)
+        for i in xrange(30):
+            p.appendBars(self.__buildBars(i, skip="b" if i == 25 else None))
+        sma = p.evaluate("SMA", 30, timeperiod=10)
+        self.assertEqual(sma["b"], None)
+        self.assertAlmostEqual(sma["a"], numpy.mean(CLOSE_VALUES[20:30]))
+        self.assertAlmostEqual(sma["c"], numpy.mean(CLOSE_VALUES[20:30]) * 3)
+        for i in xrange(30, 40):
+            p.appendBars(self.__buildBars(i))
+        self.assertAlmostEqual(p.evaluate("SMA", 30, timeperiod=10)["b"], numpy.mean(CLOSE_VALUES[30:40]) * 2)
+
+    def testBarFeed(self):
+        bars = [self.__buildBars(i) for i in xrange(20)]
+        feed = barfeed.OptimizerBarFeed(bar.Frequency.DAY, PanelTestCase.Instruments, bars)
+        lastCloses = []
+        # Subscribe before the panel, like strategies do.
+        feed.getNewValuesEvent().subscribe(lambda dateTime, bars: lastCloses.append(p.getValues("close")[0, -1]))
+        p = panel.Panel(PanelTestCase.Instruments, barFeed=feed)
+        feed.start()
+        while not feed.eof():
+            feed.dispatch()
+        self.assertEqual(lastCloses, CLOSE_VALUES[:20])
+        self.assertEqual(len(p), 20)
+
+    def testBarFeedFrequency(self):
+        # Daily bars interleaved with weekly ones, that should be skipped.
+        bars = []
+        for i in xrange(20):
+            bars.append(self.__buildBars(i))
+            if i % 5 == 4:
+                weeklyBar = bar.BasicBar(bars[-1].getDateTime(), 1, 1, 1, 1, 1, 1, bar.Frequency.WEEK)
+                barDict = dict((instrument, weeklyBar) for instrument in PanelTestCase.Instruments)
+                bars.append(bar.Bars(barDict, frequecy=bar.Frequency.WEEK))
+        feed = barfeed.OptimizerBarFeed(bar.Frequency.DAY, PanelTestCase.Instruments, bars)
+        for instrument in PanelTestCase.Instruments:
+            feed.registerInstrument(instrument, bar.Frequency.WEEK)
+        dailyPanel = panel.Panel(PanelTestCase.Instruments, barFeed=feed)
+        weeklyPanel = panel.Panel(PanelTestCase.Instruments, barFeed=feed, frequency=bar.Frequency.WEEK)
+        feed.start()
+        while not feed.eof():
+            feed.dispatch()
+        self.assertEqual(len(dailyPanel), 20)
+        self.assertEqual(dailyPanel.getValues("close")[0].tolist(), CLOSE_VALUES[:20])
+        self.assertEqual(len(weeklyPanel), 4)
+        self.assertEqual(weeklyPanel.getValues("close")[0].tolist(), [1] * 4)
+
+    def testCalculate(self):
+        p = panel.Panel(PanelTestCase.Instruments)
+        for i in xrange(len(OPEN_VALUES)):
+            p.appendBars(self.__buildBars(i))
+        high = numpy.array(HIGH_VALUES)
+        low = numpy.array(LOW_VALUES)
+        close = numpy.array(CLOSE_VALUES)
+        expected = talib.ADX(high * 2, low * 2, close * 2, 14)
+        numpy.testing.assert_allclose(p.calculate("ADX", timeperiod=14)["b"], expected)
+
+        inputs = {
+            "high": numpy.column_stack([high, high * 2]),
+            "low": numpy.column_stack([low, low * 2]),
+            "close": numpy.column_stack([close, close * 2]),
+        }
+        ret = panel.call_talib("ADX", ["x", "y"], inputs, timeperiod=14)
+        numpy.testing.assert_allclose(ret["y"], expected)
+        numpy.testing.assert_allclose(ret["x"], talib.ADX(high, low, close, 14))
+
+    def testVectorizedMatchesTALib(self):
+        rnd = numpy.random.RandomState(0)
+        instruments = ["i%d" % i for i in xrange(5)]
+        for count in [0, 1, 5, 30, 120]:
+            close = 100 + numpy.cumsum(rnd.normal(size=(count, len(instruments))), axis=0)
+            high = close + rnd.uniform(0, 2, size=close.shape)
+            low = close - rnd.uniform(0, 2, size=close.shape)
+            # Missing values get TA-Lib called for that instrument only.
+            if count > 10:
+                close[10, 1] = numpy.nan
+            inputs = {"high": high, "low": low, "close": close}
+            for functionName, parameters in [
+                ("SMA", {"timeperiod": 10}), ("SMA", {}), ("EMA", {"timeperiod": 10}), ("TRANGE", {}),
+                ("ATR", {"timeperiod": 14}), ("ATR", {"timeperiod": 1}), ("ADX", {"timeperiod": 14}),
+                ("ADX", {"timeperiod": 2}),
+            ]:
+                ret = panel.call_talib(functionName, instruments, inputs, **parameters)
+                for i, instrument in enumerate(instruments):
+                    columns = [
+                        numpy.ascontiguousarray(inputs[column][:, i])
+                        for column in streaming.get_input_columns(functionName)
+                    ]
+                    expected = getattr(talib, functionName)(*columns, **parameters)
+                    numpy.testing.assert_allclose(ret[instrument], expected, rtol=1e-9)
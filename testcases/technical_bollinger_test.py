@@ -23,6 +23,8 @@ from six.moves import xrange
 from . import common
 
 from pyalgotrade.technical import bollinger
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import stats
 from pyalgotrade import dataseries
 
 
@@ -75,3 +77,20 @@ class TestCase(common.TestCase):
         self.assertEqual(len(bBands.getLowerBand()), 3)
         self.assertEqual(len(bBands.getLowerBand()[:]), 3)
         self.assertEqual(len(bBands.getLowerBand().getDateTimes()), 3)
+
+    def testMatchesSMAAndStdDev(self):
+        seqDS = dataseries.SequenceDataSeries()
+        bBands = bollinger.BollingerBands(seqDS, 10, 2)
+        sma = ma.SMA(seqDS, 10)
+        stdDev = stats.StdDev(seqDS, 10)
+        for i in xrange(200):
+            seqDS.append(None if i % 17 == 0 else 100 + (i * 37) % 23 / 3.0)
+
+        self.assertEqual(bBands.getMiddleBand()[:], sma[:])
+        for i in xrange(len(seqDS)):
+            if seqDS[i] is None or sma[i] is None:
+                self.assertEqual(bBands.getUpperBand()[i], None)
+                self.assertEqual(bBands.getLowerBand()[i], None)
+            else:
+                self.assertEqual(bBands.getUpperBand()[i], sma[i] + stdDev[i] * 2)
+                self.assertEqual(bBands.getLowerBand()[i], sma[i] + stdDev[i] * 2 * -1)
@@ -18,6 +18,10 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import datetime
+
+import numpy as np
+
 from . import common
 
 from pyalgotrade.technical import cross
@@ -191,3 +195,67 @@ class TestCase(common.TestCase):
         self.assertEqual(cross.cross_above([0, 0, 0, 1, 2], [1, 1, 1], -3), 1)
         self.assertEqual(cross.cross_above([0, 0, 0, 1, 2], [1, 1], -3), 0)
         self.assertEqual(cross.cross_above([0, 0, 0, 0, 2], [1, 1], -3), 1)
+
+
+class CrossOverTestCase(common.TestCase):
+    def testMatchesCrossAboveAndBelow(self):
+        randomState = np.random.RandomState(1)
+        values1 = randomState.randint(0, 5, 300).tolist()
+        values2 = randomState.randint(0, 5, 300).tolist()
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        crossOver = cross.CrossOver(ds1, ds2, maxLen=len(values1))
+        for value1, value2 in zip(values1, values2):
+            ds1.append(value1)
+            ds2.append(value2)
+
+        self.assertEqual(crossOver[:], cross.cross_over(values1, values2).tolist())
+        for i in range(1, len(values1) + 1):
+            self.assertEqual(crossOver[:i].count(1), cross.cross_above(values1, values2, 0, i))
+            self.assertEqual(crossOver[:i].count(-1), cross.cross_below(values1, values2, 0, i))
+
+    def testWithSMA(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        sma1 = ma.SMA(ds1, 15)
+        sma2 = ma.SMA(ds2, 25)
+        crossOver = cross.CrossOver(sma1, sma2)
+        for i in range(100):
+            ds1.append(i)
+            ds2.append(50)
+            self.assertEqual(crossOver[-1], 1 if i == 58 else 0)
+
+    def testUnalignedValues(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        crossOver = cross.CrossOver(ds1, ds2)
+        dateTime = datetime.datetime(2000, 1, 1)
+        ds1.appendWithDateTime(dateTime, 1)
+        ds2.appendWithDateTime(dateTime, 2)
+        ds1.appendWithDateTime(dateTime + datetime.timedelta(days=1), 3)
+        ds2.appendWithDateTime(dateTime + datetime.timedelta(days=2), 2)
+        self.assertEqual(len(crossOver), 1)
+        ds1.appendWithDateTime(dateTime + datetime.timedelta(days=2), 3)
+        self.assertEqual(crossOver[:], [0, 1])
+        self.assertEqual(crossOver.getDateTimes()[-1], dateTime + datetime.timedelta(days=2))
+
+    def testUsesValuesReceived(self):
+        # The inputs are not queried, values and datetimes come from the new value events.
+        class NoDateTimesDataSeries(dataseries.SequenceDataSeries):
+            def getDateTimes(self):
+                raise Exception("getDateTimes should not be called")
+
+        ds1 = NoDateTimesDataSeries()
+        ds2 = NoDateTimesDataSeries()
+        crossOver = cross.CrossOver(ds1, ds2)
+        dateTime = datetime.datetime(2000, 1, 1)
+        for i, (value1, value2) in enumerate([(1, 2), (3, 2), (1, 2)]):
+            ds1.appendWithDateTime(dateTime + datetime.timedelta(days=i), value1)
+            ds2.appendWithDateTime(dateTime + datetime.timedelta(days=i), value2)
+        self.assertEqual(crossOver[:], [0, 1, -1])
+
+    def testVectorized(self):
+        self.assertEqual(cross.cross_over([], []).tolist(), [])
+        self.assertEqual(cross.cross_over([0, 1, 1, 2, 0], [1, 1, 1, 1, 1]).tolist(), [0, 0, 0, 1, -1])
+        self.assertEqual(cross.cross_over([1, np.nan, 0, 2], [1, 1, 1, 1]).tolist(), [0, 0, 0, 1])
+        self.assertEqual(cross.cross_over([2, None, 0], [1, 1, 1]).tolist(), [0, 0, -1])
@@ -0,0 +1,162 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+
+import numpy
+
+from . import common
+
+from pyalgotrade import bar
+from pyalgotrade import barfeed
+from pyalgotrade.technical import crosssection
+from pyalgotrade.technical import ma
+
+NaN = float("nan")
+
+
+def build_feed(instruments, closes):
+    bars = []
+    for i, row in enumerate(closes):
+        dateTime = datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i)
+        barDict = {}
+        for instrument, close in zip(instruments, row):
+            if close is not None:
+                barDict[instrument] = bar.BasicBar(dateTime, close, close, close, close, 10, close, bar.Frequency.DAY)
+        bars.append(bar.Bars(barDict, frequecy=bar.Frequency.DAY))
+    return barfeed.OptimizerBarFeed(bar.Frequency.DAY, instruments, bars)
+
+
+def dispatch_all(feed):
+    feed.start()
+    while not feed.eof():
+        feed.dispatch()
+    feed.stop()
+    feed.join()
+
+
+class FunctionsTestCase(common.TestCase):
+    def assertArrayEqual(self, values1, values2):
+        self.assertTrue(numpy.array_equal(values1, values2, equal_nan=True), "%s != %s" % (values1, values2))
+
+    def testRank(self):
+        self.assertArrayEqual(crosssection.rank([3, 1, NaN, 2]), [3, 1, NaN, 2])
+        self.assertArrayEqual(crosssection.rank([2, 1, 2]), [3, 1, 3])
+        self.assertArrayEqual(crosssection.rank([5, NaN, 5, 5]), [3, NaN, 3, 3])
+        self.assertArrayEqual(crosssection.rank([NaN, NaN]), [NaN, NaN])
+        self.assertArrayEqual(crosssection.rank([]), [])
+
+    def testPercentile(self):
+        self.assertArrayEqual(crosssection.percentile([3, 1, NaN, 2, 4]), [0.75, 0.25, NaN, 0.5, 1])
+        self.assertArrayEqual(crosssection.percentile([NaN]), [NaN])
+        # Equal values get the same percentile.
+        self.assertArrayEqual(crosssection.percentile([5, 5, 1, 2, NaN]), [1, 1, 0.25, 0.5, NaN])
+
+    def testZScore(self):
+        values = numpy.array([1, 5, NaN, 3, 7])
+        valid = values[~numpy.isnan(values)]
+        for ddof in [0, 1]:
+            expected = (values - valid.mean()) / valid.std(ddof=ddof)
+            self.assertArrayEqual(crosssection.zscore(values, ddof), expected)
+        self.assertArrayEqual(crosssection.zscore([1, NaN], 1), [NaN, NaN])
+
+    def testTop(self):
+        self.assertArrayEqual(crosssection.top([3, 1, NaN, 5, 2], 2), [3, 0])
+        self.assertArrayEqual(crosssection.top([3, 1, NaN, 5, 2], 10), [3, 0, 4, 1])
+        self.assertArrayEqual(crosssection.top([NaN], 1), [])
+
+
+class CrossSectionTestCase(common.TestCase):
+    Instruments = ["a", "b", "c", "d"]
+    Closes = [
+        [10, 20, 30, 40],
+        [15, 18, None, 41],
+        [30, 25, 20, 10],
+        [12, 12, 11, 13],
+    ]
+
+    def testStatistics(self):
+        feed = build_feed(CrossSectionTestCase.Instruments, CrossSectionTestCase.Closes)
+        cs = crosssection.CrossSection(feed, CrossSectionTestCase.Instruments, "close", maxLen=10)
+
+        def onBars(dateTime, bars):
+            i = len(cs) - 1
+            values = numpy.array([NaN if value is None else value for value in CrossSectionTestCase.Closes[i]])
+            self.assertEqual(cs.getDateTimes()[-1], dateTime)
+            self.assertTrue(numpy.array_equal(cs.getValues(), values, equal_nan=True))
+            self.assertTrue(numpy.array_equal(cs.getRanks(), crosssection.rank(values), equal_nan=True))
+            self.assertTrue(numpy.array_equal(cs.getPercentiles(), crosssection.percentile(values), equal_nan=True))
+            self.assertTrue(numpy.array_equal(cs.getZScores(), crosssection.zscore(values), equal_nan=True))
+            checked.append(i)
+
+        checked = []
+        feed.getNewValuesEvent().subscribe(onBars)
+        dispatch_all(feed)
+        self.assertEqual(checked, [0, 1, 2, 3])
+
+        self.assertEqual(cs.getTop(2), ["d", "a"])
+        self.assertEqual(cs.getBottom(1), ["c"])
+        self.assertEqual(cs.getHistory(crosssection.RANK)[1].tolist(), [2, 2, 3, 3])
+        self.assertEqual(cs.getHistory(crosssection.RANK).shape, (4, 4))
+
+    def testResultsAvailableFromOnBars(self):
+        feed = build_feed(CrossSectionTestCase.Instruments, CrossSectionTestCase.Closes)
+        tops = []
+        # Subscribe before the cross section, like strategies do.
+        feed.getNewValuesEvent().subscribe(lambda dateTime, bars: tops.append(cs.getTop(1)))
+        cs = crosssection.CrossSection(feed, CrossSectionTestCase.Instruments, "close")
+        dispatch_all(feed)
+        self.assertEqual(tops, [["d"], ["d"], ["a"], ["d"]])
+        self.assertEqual(len(cs), 4)
+
+    def testDataSeries(self):
+        feed = build_feed(CrossSectionTestCase.Instruments, CrossSectionTestCase.Closes)
+        cs = crosssection.CrossSection(feed, CrossSectionTestCase.Instruments, "close")
+        ranks = []
+
+        def onBars(dateTime, bars):
+            if len(cs) == 2:
+                ranks.append(cs.getDataSeries("c", crosssection.RANK))
+                self.assertEqual(ranks[0][:], [3, None])
+
+        feed.getNewValuesEvent().subscribe(onBars)
+        dispatch_all(feed)
+        self.assertEqual(ranks[0][:], [3, None, 2, 1])
+        self.assertEqual(len(ranks[0].getDateTimes()), 4)
+        self.assertIs(cs.getDataSeries("c", crosssection.RANK), ranks[0])
+
+    def testIndicatorSource(self):
+        feed = build_feed(CrossSectionTestCase.Instruments, CrossSectionTestCase.Closes)
+        smas = dict(
+            (instrument, ma.SMA(feed[instrument, bar.Frequency.DAY].getCloseDataSeries(), 2))
+            for instrument in CrossSectionTestCase.Instruments
+        )
+        cs = crosssection.CrossSection(feed, CrossSectionTestCase.Instruments, smas)
+        dispatch_all(feed)
+        self.assertEqual(cs.getValues().tolist(), [21, 18.5, 15.5, 11.5])
+        self.assertEqual(cs.getTop(4), ["a", "b", "c", "d"])
+        self.assertTrue(numpy.isnan(cs.getHistory(crosssection.VALUE)[:, 0]).all())
+
+    def testEmpty(self):
+        feed = build_feed(CrossSectionTestCase.Instruments, [])
+        cs = crosssection.CrossSection(feed, CrossSectionTestCase.Instruments, "close")
+        self.assertEqual(len(cs), 0)
+        self.assertTrue(numpy.isnan(cs.getValues()).all())
+        self.assertEqual(cs.getTop(1), [])
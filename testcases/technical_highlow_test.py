@@ -33,3 +33,17 @@ class HighLowTestCase(common.TestCase):
             values.append(value)
         self.assertEqual(high[-1], 5)
         self.assertEqual(low[-1], 3)
+
+    def testLongWindow(self):
+        values = dataseries.SequenceDataSeries()
+        high = highlow.High(values, 250)
+        low = highlow.Low(values, 250)
+        prices = [(i * 7919) % 1009 for i in range(1000)]
+        for i, price in enumerate(prices):
+            values.append(price)
+            if i < 249:
+                self.assertEqual(high[-1], None)
+                self.assertEqual(low[-1], None)
+            else:
+                self.assertEqual(high[-1], max(prices[i-249:i+1]))
+                self.assertEqual(low[-1], min(prices[i-249:i+1]))
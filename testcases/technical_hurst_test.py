@@ -70,3 +70,46 @@ class TestCase(common.TestCase):
         hds = build_hurst(values, num_values - 10, 2, 20)
         self.assertEquals(round(hds[-1], 1), 0)
         self.assertEquals(round(hds[-2], 1), 0)
+
+
+# The original implementation, that loops over the lags.
+def hurst_exp_loop(p, minLags, maxLags):
+    tau = []
+    lagvec = []
+    for lag in range(minLags, maxLags):
+        pp = np.subtract(p[lag:], p[:-lag])
+        lagvec.append(lag)
+        tau.append(np.sqrt(np.std(pp)))
+    m = np.polyfit(np.log10(lagvec), np.log10(tau), 1)
+    return m[0]*2
+
+
+class BatchedTestCase(common.TestCase):
+    def testMatchesLoop(self):
+        values = np.log10(np.cumsum(np.random.RandomState(1).randn(1000)) + 1000)
+        for minLags, maxLags in [(2, 20), (2, 4), (5, 50)]:
+            for size in [100, 1000]:
+                self.assertAlmostEqual(
+                    hurst.hurst_exp(values[:size], minLags, maxLags), hurst_exp_loop(values[:size], minLags, maxLags)
+                )
+
+    def testLagConstantsAreCached(self):
+        self.assertIs(hurst.get_lag_constants(2, 20), hurst.get_lag_constants(2, 20))
+
+    def testIncremental(self):
+        period = 100
+        values = np.cumsum(np.random.RandomState(2).randn(1000)) + 1000
+        hds = build_hurst(values, period, 2, 20)
+        logValues = np.log10(values)
+        for i in range(period - 1, len(values)):
+            self.assertAlmostEqual(hds[i], hurst_exp_loop(logValues[i - period + 1:i + 1], 2, 20))
+
+    def testNaN(self):
+        period = 30
+        values = np.cumsum(np.random.RandomState(3).randn(100)) + 1000
+        values[50] = np.nan
+        hds = build_hurst(values, period, 2, 10)
+        self.assertTrue(np.isnan(hds[50]))
+        self.assertTrue(np.isnan(hds[79]))
+        self.assertAlmostEqual(hds[80], hurst_exp_loop(np.log10(values[51:81]), 2, 10))
+        self.assertAlmostEqual(hds[-1], hurst_exp_loop(np.log10(values[-period:]), 2, 10))
@@ -0,0 +1,187 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+import os
+import unittest
+
+import numpy
+from six.moves import xrange
+
+from . import common
+
+from pyalgotrade import bar
+from pyalgotrade import dataseries
+from pyalgotrade import technical
+from pyalgotrade.dataseries import bards
+from pyalgotrade.technical import atr
+from pyalgotrade.technical import highlow
+from pyalgotrade.technical import kernels
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import rsi
+from pyalgotrade.technical import stats
+
+
+def build_values(count, noneEvery=7):
+    prices = (100 + numpy.random.RandomState(42).normal(0, 1, count).cumsum()).tolist()
+    return [None if noneEvery and i % noneEvery == 3 else prices[i] for i in xrange(count)]
+
+
+def build_bars(count):
+    rnd = numpy.random.RandomState(42)
+    closes = 100 + rnd.normal(0, 1, count).cumsum()
+    ranges = rnd.uniform(0, 2, (2, count))
+    dateTime = datetime.datetime(2000, 1, 1)
+    ret = []
+    for i in xrange(count):
+        close = closes[i]
+        ret.append(bar.BasicBar(
+            dateTime + datetime.timedelta(days=i), close, close + ranges[0][i], close - ranges[1][i], close, 100, close,
+            bar.Frequency.DAY
+        ))
+    return ret
+
+
+class ParityTestCase(common.TestCase):
+    JIT = False
+
+    def setUp(self):
+        super(ParityTestCase, self).setUp()
+        technical.set_backfill_jit_enabled(self.JIT)
+
+    def tearDown(self):
+        technical.set_backfill_jit_enabled(True)
+        super(ParityTestCase, self).tearDown()
+
+    def __assertEqualValues(self, values1, values2, exact=True):
+        self.assertEqual(len(values1), len(values2))
+        for value1, value2 in zip(values1, values2):
+            if value1 is None or value2 is None:
+                self.assertEqual(value1, value2)
+            elif self.JIT or not exact:
+                self.assertTrue(numpy.allclose(value1, value2, equal_nan=True), "%s != %s" % (value1, value2))
+            else:
+                self.assertTrue(value1 == value2 or (value1 != value1 and value2 != value2), "%s != %s" % (value1, value2))
+
+    # Compares the values of a filter calculated incrementally with the values of the same filter after a backfill,
+    # both for the backfilled values and for the ones that follow.
+    # Rolling moments get recalculated from the window after a backfill, so following values may differ within rounding
+    # errors.
+    def __assertParity(self, buildFilter, values, dataSeries=None, exactAfterBackfill=True):
+        if dataSeries is None:
+            dataSeries = dataseries.SequenceDataSeries()
+        dateTime = datetime.datetime(2000, 1, 1)
+        backfillCount = int(len(values) * 0.75)
+
+        expected = buildFilter(dataSeries)
+        for i in xrange(backfillCount):
+            dataSeries.appendWithDateTime(dateTime + datetime.timedelta(days=i), values[i])
+        backfilled = buildFilter(dataSeries)
+        backfilled.backfill()
+        self.__assertEqualValues(backfilled[:], expected[:])
+
+        for i in xrange(backfillCount, len(values)):
+            dataSeries.appendWithDateTime(dateTime + datetime.timedelta(days=i), values[i])
+        self.__assertEqualValues(backfilled[backfillCount:], expected[backfillCount:], exactAfterBackfill)
+
+    def testSMA(self):
+        for period in [1, 2, 14, 50]:
+            self.__assertParity(lambda ds: ma.SMA(ds, period), build_values(200))
+
+    def testEMA(self):
+        for period in [2, 3, 14, 50]:
+            self.__assertParity(lambda ds: ma.EMA(ds, period), build_values(200))
+
+    def testRSI(self):
+        for period in [2, 14, 50]:
+            self.__assertParity(lambda ds: rsi.RSI(ds, period), build_values(200))
+        self.__assertParity(lambda ds: rsi.RSI(ds, 3), [1, 2, 3, 4, 5, 6, 7, 8])
+
+    def testATR(self):
+        for period in [2, 14, 50]:
+            self.__assertParity(lambda ds: atr.ATR(ds, period), build_bars(200), bards.BarDataSeries())
+        self.__assertParity(lambda ds: atr.ATR(ds, 14), build_bars(10), bards.BarDataSeries())
+
+    def testStdDev(self):
+        for period in [1, 2, 14, 50]:
+            self.__assertParity(lambda ds: stats.StdDev(ds, period), build_values(300), exactAfterBackfill=False)
+        self.__assertParity(lambda ds: stats.StdDev(ds, 5, ddof=1), build_values(300), exactAfterBackfill=False)
+
+    def testStdDevNonFinite(self):
+        values = build_values(100)
+        values[20] = float("nan")
+        values[60] = float("inf")
+        self.__assertParity(lambda ds: stats.StdDev(ds, 5), values, exactAfterBackfill=False)
+
+    def testHighLow(self):
+        for period in [1, 2, 14, 50]:
+            self.__assertParity(lambda ds: highlow.High(ds, period), build_values(200))
+            self.__assertParity(lambda ds: highlow.Low(ds, period), build_values(200))
+
+    def testHighLowNaN(self):
+        values = build_values(100)
+        values[20] = float("nan")
+        self.__assertParity(lambda ds: highlow.High(ds, 5), values)
+        self.__assertParity(lambda ds: highlow.Low(ds, 5), values)
+
+    def testNotEnoughValues(self):
+        values = build_values(5)
+        self.__assertParity(lambda ds: ma.EMA(ds, 10), values)
+        self.__assertParity(lambda ds: rsi.RSI(ds, 10), values)
+        self.__assertParity(lambda ds: stats.StdDev(ds, 10), values, exactAfterBackfill=False)
+        self.__assertParity(lambda ds: highlow.High(ds, 10), values)
+
+
+# The numba tox environment sets PYALGOTRADE_REQUIRE_NUMBA so these fail, instead of getting skipped, if numba is
+# missing there.
+@unittest.skipIf(
+    not kernels.NUMBA_AVAILABLE and not os.environ.get("PYALGOTRADE_REQUIRE_NUMBA"), "numba is not available"
+)
+class JITParityTestCase(ParityTestCase):
+    JIT = True
+
+    def testCompiledKernels(self):
+        values = numpy.array(build_values(200, noneEvery=0))
+        for name, args in [
+            ("sma", (values, 14)),
+            ("ema", (values, 14)),
+            ("rolling_std", (values, 14, 0)),
+            ("rolling_extremum", (values, 14, True)),
+            ("rolling_extremum", (values, 14, False)),
+        ]:
+            expected = kernels.get(name, False)(*args)
+            self.assertTrue(numpy.allclose(kernels.get(name, True)(*args), expected, equal_nan=True))
+
+
+class SwitchTestCase(common.TestCase):
+    def tearDown(self):
+        technical.set_backfill_jit_enabled(True)
+        super(SwitchTestCase, self).tearDown()
+
+    def testDisabled(self):
+        technical.set_backfill_jit_enabled(False)
+        self.assertFalse(technical.is_backfill_jit_enabled())
+        self.assertEqual(technical.get_kernel("ema"), kernels.ema)
+
+    def testEnabled(self):
+        technical.set_backfill_jit_enabled(True)
+        self.assertEqual(technical.is_backfill_jit_enabled(), kernels.NUMBA_AVAILABLE)
+        if not kernels.NUMBA_AVAILABLE:
+            self.assertEqual(technical.get_kernel("ema"), kernels.ema)
@@ -20,10 +20,14 @@
 
 import datetime
 
+import numpy as np
+
 from . import common
 
 from pyalgotrade.technical import linreg
 from pyalgotrade import dataseries
+from pyalgotrade.utils import dt
+from pyalgotrade.utils import stats
 
 
 class LeastSquaresRegressionTestCase(common.TestCase):
@@ -79,3 +83,55 @@ class LeastSquaresRegressionTestCase(common.TestCase):
         nextDateTime = nextDateTime + datetime.timedelta(milliseconds=50)
         seqDS.appendWithDateTime(nextDateTime, 5)
         self.assertEqual(round(lsReg[-1], 2), 5)
+
+    def testMatchesLsreg(self):
+        windowSize = 30
+        values = 100 + np.cumsum(np.random.RandomState(1).normal(0, 1, 500))
+        dateTimes = [datetime.datetime(2012, 1, 1) + datetime.timedelta(minutes=i * 7 + i % 3) for i in range(len(values))]
+        seqDS = dataseries.SequenceDataSeries()
+        lsReg = linreg.LeastSquaresRegression(seqDS, windowSize, maxLen=len(values))
+        slope = linreg.Slope(seqDS, windowSize, maxLen=len(values))
+        for dateTime, value in zip(dateTimes, values):
+            seqDS.appendWithDateTime(dateTime, value)
+
+        x = np.array([dt.datetime_to_timestamp(dateTime) for dateTime in dateTimes])
+        for i in range(windowSize - 1, len(values)):
+            window = slice(i - windowSize + 1, i + 1)
+            a, b = linreg.lsreg(x[window], values[window])
+            self.assertAlmostEqual(lsReg[i], a * x[i] + b, places=6)
+            self.assertAlmostEqual(slope[i], linreg.lsreg(range(windowSize), values[window])[0], places=9)
+
+    def testNaN(self):
+        seqDS = dataseries.SequenceDataSeries()
+        slope = linreg.Slope(seqDS, 2)
+        for value in [1, 2, np.nan, 3, 5, 6]:
+            seqDS.append(value)
+        self.assertTrue(np.isnan(slope[2]))
+        self.assertTrue(np.isnan(slope[3]))
+        self.assertEqual(slope[4], 2)
+        self.assertEqual(slope[5], 1)
+
+
+class RollingRegressionTestCase(common.TestCase):
+    def testHedgeRatio(self):
+        windowSize = 20
+        randomState = np.random.RandomState(2)
+        values2 = 50 + np.cumsum(randomState.normal(0, 1, 200))
+        values1 = 1.5 * values2 + randomState.normal(0, 1, 200)
+        regression = stats.RollingRegression(windowSize)
+        for i in range(len(values1)):
+            if regression.needsReanchor():
+                regression.reset(values2[max(i - windowSize + 1, 0):i + 1], values1[max(i - windowSize + 1, 0):i + 1])
+            elif i >= windowSize:
+                regression.replace(values2[i - windowSize], values1[i - windowSize], values2[i], values1[i])
+            else:
+                regression.add(values2[i], values1[i])
+
+            if i >= windowSize - 1:
+                x = values2[i - windowSize + 1:i + 1]
+                y = values1[i - windowSize + 1:i + 1]
+                self.assertEqual(regression.getCount(), windowSize)
+                # Least squares without intercept.
+                self.assertAlmostEqual(regression.getSlopeThroughOrigin(), np.linalg.lstsq(x[:, None], y, rcond=None)[0][0])
+                self.assertAlmostEqual(regression.getCovariance(1), np.cov(x, y)[0][1])
+                self.assertAlmostEqual(regression.getVarianceY(1), y.var(ddof=1))
@@ -227,3 +227,49 @@ class EMATestCase(common.TestCase):
         self.assertEqual(len(ema), 2)
         self.assertEqual(len(ema[:]), 2)
         self.assertEqual(len(ema.getDateTimes()), 2)
+
+
+class BackfillTestCase(common.TestCase):
+    VALUES = [10, 20, None, 15.5, 30, 12, None, None, 40, 7, 19, 33, 21.25, None, 18]
+
+    def __assertBackfill(self, buildFilter, dataSeries=None, maxLen=None):
+        if dataSeries is None:
+            dataSeries = dataseries.SequenceDataSeries()
+        expected = buildFilter(dataSeries)
+        for value in BackfillTestCase.VALUES[:10]:
+            dataSeries.append(value)
+
+        backfilled = buildFilter(dataSeries, maxLen)
+        backfilled.backfill()
+        for value in BackfillTestCase.VALUES[10:]:
+            dataSeries.append(value)
+
+        expectedValues = expected[:]
+        if maxLen is not None:
+            expectedValues = expectedValues[-maxLen:]
+        self.assertEqual(len(backfilled), len(expectedValues))
+        for i in xrange(len(expectedValues)):
+            self.assertEqual(safe_round(backfilled[i], 8), safe_round(expectedValues[i], 8))
+        self.assertEqual(backfilled.getDateTimes(), dataSeries.getDateTimes()[-len(expectedValues):])
+
+    def testSMA(self):
+        for period in [1, 2, 3, 8, 20]:
+            self.__assertBackfill(lambda ds, maxLen=None: ma.SMA(ds, period, maxLen))
+        self.__assertBackfill(lambda ds, maxLen=None: ma.SMA(ds, 3, maxLen), maxLen=4)
+
+    def testWMA(self):
+        self.__assertBackfill(lambda ds, maxLen=None: ma.WMA(ds, [1, 2, 3], maxLen))
+        self.__assertBackfill(lambda ds, maxLen=None: ma.WMA(ds, [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11], maxLen))
+
+    def testEMA(self):
+        self.__assertBackfill(lambda ds, maxLen=None: ma.EMA(ds, 3, maxLen))
+
+    def testNumericDataSeries(self):
+        self.__assertBackfill(lambda ds, maxLen=None: ma.SMA(ds, 3, maxLen), dataseries.NumericSequenceDataSeries())
+
+    def testNotEmpty(self):
+        ds = dataseries.SequenceDataSeries()
+        sma = ma.SMA(ds, 1)
+        ds.append(1)
+        with self.assertRaises(Exception):
+            sma.backfill()
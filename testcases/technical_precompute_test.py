@@ -0,0 +1,104 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+from . import common
+
+from pyalgotrade import bar
+from pyalgotrade import dispatcher
+from pyalgotrade.barfeed import yahoofeed
+from pyalgotrade.technical import bollinger
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import macd
+from pyalgotrade.technical import precompute
+from pyalgotrade.technical import rsi
+from pyalgotrade.technical import stoch
+
+
+INDICATORS = [
+    lambda ds: ma.SMA(ds.getCloseDataSeries(), 15),
+    lambda ds: ma.SMA(ds.getPriceDataSeries(), 1),
+    lambda ds: ma.EMA(ds.getCloseDataSeries(), 10),
+    lambda ds: ma.WMA(ds.getHighDataSeries(), [1, 2, 3, 4]),
+    lambda ds: rsi.RSI(ds.getCloseDataSeries(), 14),
+    lambda ds: macd.MACD(ds.getCloseDataSeries(), 12, 26, 9),
+    lambda ds: bollinger.BollingerBands(ds.getCloseDataSeries(), 20, 2).getUpperBand(),
+    lambda ds: stoch.StochasticOscillator(ds, 14),
+    lambda ds: ma.SMA(rsi.RSI(ds.getCloseDataSeries(), 14), 5),
+]
+
+
+class PrecomputerTestCase(common.TestCase):
+    def __loadBarFeed(self):
+        ret = yahoofeed.Feed()
+        ret.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        return ret
+
+    def testSameValuesAsIncremental(self):
+        barFeed = self.__loadBarFeed()
+        precomputer = precompute.Precomputer(barFeed)
+        barDS = barFeed["orcl", bar.Frequency.DAY]
+        pairs = [(buildIndicator(barDS), precomputer.add("orcl", buildIndicator)) for buildIndicator in INDICATORS]
+
+        # Check values as they become available.
+        def onBars(dateTime, bars):
+            for incremental, precomputed in pairs:
+                self.assertEqual(len(precomputed), len(incremental))
+                self.assertEqual(precomputed[-1], incremental[-1])
+        barFeed.getNewValuesEvent().subscribe(onBars)
+
+        disp = dispatcher.Dispatcher()
+        disp.addSubject(barFeed)
+        disp.run()
+
+        self.assertEqual(len(barDS), 252)
+        for incremental, precomputed in pairs:
+            self.assertEqual(precomputed[:], incremental[:])
+            self.assertEqual(precomputed.getDateTimes(), incremental.getDateTimes())
+
+    def testCacheAndMaxLen(self):
+        barFeed = self.__loadBarFeed()
+        precomputer = precompute.Precomputer(barFeed)
+        calls = []
+
+        def buildIndicator(ds):
+            calls.append(ds)
+            return ma.SMA(ds.getCloseDataSeries(), 10)
+
+        sma = precomputer.add("orcl", buildIndicator, key=("sma", 10), maxLen=5)
+        precomputer.add("orcl", buildIndicator, key=("sma", 10))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(sma), 0)
+        self.assertEqual(sma.getValueAbsolute(0), None)
+
+        disp = dispatcher.Dispatcher()
+        disp.addSubject(barFeed)
+        disp.run()
+
+        dateTimes, values = precomputer.getValues("orcl", buildIndicator, key=("sma", 10))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(values), 252)
+        self.assertEqual(len(sma), 5)
+        self.assertEqual(sma[:], values[-5:])
+        self.assertEqual(sma.getDateTimes(), dateTimes[-5:])
+
+    def testNoBars(self):
+        barFeed = yahoofeed.Feed()
+        precomputer = precompute.Precomputer(barFeed)
+        self.assertEqual(precomputer.getValues("orcl", lambda ds: ma.SMA(ds.getCloseDataSeries(), 10)), ([], []))
@@ -70,3 +70,29 @@ class TestCase(common.TestCase):
             if i >= 4:
                 self.assertEqual(round(zscore[-1], 4), round(expected[i], 4))
             i += 1
+
+    def testStdDev_Incremental(self):
+        period = 20
+        values = 1e6 + numpy.cumsum(numpy.random.RandomState(1).normal(0, 10, 5000))
+        seqDS = dataseries.SequenceDataSeries()
+        stdDev = stats.StdDev(seqDS, period, ddof=1, maxLen=len(values))
+        zscore = stats.ZScore(seqDS, period, maxLen=len(values))
+        for value in values:
+            seqDS.append(value)
+
+        for i in range(period - 1, len(values)):
+            window = values[i - period + 1:i + 1]
+            self.assertAlmostEqual(stdDev[i], window.std(ddof=1), delta=window.std() * 1e-6)
+            self.assertAlmostEqual(zscore[i], (window[-1] - window.mean()) / window.std(), places=6)
+
+    def testStdDev_NaN(self):
+        values = [1, 2, numpy.nan, 3, 4, 5, 6]
+        seqDS = dataseries.SequenceDataSeries()
+        stdDev = stats.StdDev(seqDS, 2)
+        for value in values:
+            seqDS.append(value)
+
+        self.assertTrue(numpy.isnan(stdDev[2]))
+        self.assertTrue(numpy.isnan(stdDev[3]))
+        self.assertEqual(stdDev[4], numpy.array([3, 4]).std())
+        self.assertEqual(stdDev[6], numpy.array([5, 6]).std())
@@ -24,6 +24,8 @@ from six.moves import xrange
 
 from . import common
 
+from pyalgotrade import technical
+from pyalgotrade.technical import ma
 from pyalgotrade.technical import stoch
 from pyalgotrade.dataseries import bards
 from pyalgotrade import bar
@@ -125,3 +127,28 @@ class TestCase(common.TestCase):
         stochFilter = stoch.StochasticOscillator(barDS, 2, 2)
         self.__fillBarDataSeries(barDS, closePrices, highPrices, lowPrices)
         self.assertEqual(stochFilter[-1], 0)
+
+    def testMatchesSMAOverK(self):
+        barDS = bards.BarDataSeries()
+        stochFilter = stoch.StochasticOscillator(barDS, 5, 3)
+        # %K and %D calculated as separate filters.
+        kFilter = technical.EventBasedFilter(barDS, stoch.SOEventWindow(5, False))
+        dFilter = ma.SMA(kFilter, 3)
+        closePrices = [10 + (i * 7) % 11 for i in xrange(100)]
+        self.__fillBarDataSeries(barDS, closePrices, [price + 2 for price in closePrices], [price - 2 for price in closePrices])
+
+        self.assertEqual(stochFilter[:], kFilter[:])
+        self.assertEqual(stochFilter.getD()[:], dFilter[:])
+        self.assertEqual(stochFilter.getD().getDateTimes(), dFilter.getDateTimes())
+
+    def testBackfill(self):
+        barDS = bards.BarDataSeries()
+        closePrices = [10 + (i * 7) % 11 for i in xrange(50)]
+        self.__fillBarDataSeries(barDS, closePrices, [price + 2 for price in closePrices], [price - 2 for price in closePrices])
+        stochFilter = stoch.StochasticOscillator(barDS, 5, 3)
+        stochFilter.backfill()
+        expected = stoch.StochasticOscillator(bards.BarDataSeries(), 5, 3)
+        for bar_ in barDS[:]:
+            expected.getDataSeries().append(bar_)
+        self.assertEqual(stochFilter[:], expected[:])
+        self.assertEqual(stochFilter.getD()[:], expected.getD()[:])
@@ -20,8 +20,20 @@
 
 from . import common
 
+import datetime
+import gc
+import pickle
+
+from pyalgotrade import bar
 from pyalgotrade import technical
 from pyalgotrade import dataseries
+from pyalgotrade.dataseries import bards
+from pyalgotrade.technical import atr
+from pyalgotrade.technical import highlow
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import rsi
+from pyalgotrade.technical import stats
+from pyalgotrade.technical import stoch
 
 
 class TestEventWindow(technical.EventWindow):
@@ -68,3 +80,117 @@ class DataSeriesFilterTest(common.TestCase):
         for i in range(0, len(testFilter)):
             self.assertEqual(testFilter[i], ds[i])
             self.assertEqual(testFilter.getDataSeries()[i], ds[i])
+
+
+class IndicatorRegistryTest(common.TestCase):
+    def testSharedInstances(self):
+        registry = technical.IndicatorRegistry()
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+
+        sma = registry.getOrCreate(ma.SMA, ds1, 20)
+        self.assertIs(registry.getOrCreate(ma.SMA, ds1, 20), sma)
+        self.assertIs(registry.getOrCreate(ma.SMA, ds1, period=20, maxLen=None), sma)
+        self.assertIsNot(registry.getOrCreate(ma.SMA, ds1, 10), sma)
+        self.assertIsNot(registry.getOrCreate(ma.SMA, ds1, 20, maxLen=10), sma)
+        self.assertIsNot(registry.getOrCreate(ma.SMA, ds2, 20), sma)
+        self.assertIsNot(registry.getOrCreate(ma.EMA, ds1, 20), sma)
+        wma = registry.getOrCreate(ma.WMA, ds1, [1, 2, 3])
+        self.assertIs(registry.getOrCreate(ma.WMA, ds1, (1, 2, 3)), wma)
+
+        self.assertEqual(registry.getCreatedCount(), 6)
+        self.assertEqual(registry.getDuplicatesEliminated(), 3)
+
+        for i in range(30):
+            ds1.append(i)
+        self.assertEqual(sma[-1], sum(range(10, 30)) / 20.0)
+
+    def testDefaultRegistry(self):
+        ds = dataseries.SequenceDataSeries()
+        duplicates = technical.get_registry().getDuplicatesEliminated()
+        sma = technical.get_or_create(ma.SMA, ds, 5)
+        self.assertIs(technical.get_or_create(ma.SMA, ds, 5), sma)
+        self.assertEqual(technical.get_registry().getDuplicatesEliminated(), duplicates + 1)
+
+    def testIndicatorsAreNotKeptAlive(self):
+        registry = technical.IndicatorRegistry()
+        ds = dataseries.SequenceDataSeries()
+        registry.getOrCreate(ma.SMA, ds, 5)
+        del ds
+        gc.collect()
+        self.assertEqual(len(registry), 0)
+
+
+class StateTest(common.TestCase):
+    VALUES = [10, 20, None, 15.5, 30, 12, None, 9, 40, 7, 19, 33, 21.25, None, 18, 25, 11, 30, 29.5, 12, 16]
+
+    def __buildBars(self):
+        ret = []
+        for i, value in enumerate(StateTest.VALUES):
+            if value is not None:
+                dateTime = datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i)
+                ret.append(bar.BasicBar(dateTime, value, value + 2, value - 1.5, value + 0.5, 100, value, bar.Frequency.DAY))
+        return ret
+
+    def __assertResume(self, buildFilter, values, dataSeriesClass=dataseries.SequenceDataSeries, overlap=3):
+        dateTimes = [datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i) for i in range(len(values))]
+        splitPos = len(values) // 2
+
+        dataSeries = dataSeriesClass()
+        expected = buildFilter(dataSeries)
+        for dateTime, value in zip(dateTimes, values):
+            dataSeries.appendWithDateTime(dateTime, value)
+
+        dataSeries = dataSeriesClass()
+        stopped = buildFilter(dataSeries)
+        for dateTime, value in zip(dateTimes[:splitPos], values[:splitPos]):
+            dataSeries.appendWithDateTime(dateTime, value)
+        state = pickle.loads(pickle.dumps(stopped.getState()))
+        self.assertEqual(state["lastDateTime"], dateTimes[splitPos - 1])
+
+        # Resume over a new dataseries, that gets a few values that were already processed.
+        dataSeries = dataSeriesClass()
+        resumed = buildFilter(dataSeries)
+        resumed.setState(state)
+        for dateTime, value in zip(dateTimes[splitPos - overlap:], values[splitPos - overlap:]):
+            dataSeries.appendWithDateTime(dateTime, value)
+
+        self.assertEqual(resumed[:], expected[:])
+        self.assertEqual(resumed.getDateTimes(), expected.getDateTimes())
+        return expected, resumed
+
+    def testIndicators(self):
+        self.__assertResume(lambda ds: ma.SMA(ds, 3), StateTest.VALUES)
+        self.__assertResume(lambda ds: ma.EMA(ds, 3), StateTest.VALUES)
+        self.__assertResume(lambda ds: rsi.RSI(ds, 3), StateTest.VALUES)
+        self.__assertResume(lambda ds: stats.StdDev(ds, 4), StateTest.VALUES)
+        self.__assertResume(lambda ds: highlow.High(ds, 4), StateTest.VALUES)
+        self.__assertResume(lambda ds: highlow.Low(ds, 4), StateTest.VALUES, overlap=0)
+
+    def testBarIndicators(self):
+        bars = self.__buildBars()
+        self.__assertResume(lambda ds: atr.ATR(ds, 3), bars, bards.BarDataSeries)
+        expected, resumed = self.__assertResume(
+            lambda ds: stoch.StochasticOscillator(ds, 3), bars, bards.BarDataSeries
+        )
+        self.assertEqual(resumed.getD()[:], expected.getD()[:])
+
+    def testBounded(self):
+        ds = dataseries.SequenceDataSeries()
+        sma = ma.SMA(ds, 2)
+        for value in StateTest.VALUES:
+            ds.append(value)
+        resumed = ma.SMA(dataseries.SequenceDataSeries(), 2, maxLen=3)
+        resumed.setState(sma.getState())
+        self.assertEqual(resumed[:], sma[-3:])
+
+    def testInvalidState(self):
+        ds = dataseries.SequenceDataSeries()
+        sma = ma.SMA(ds, 3)
+        ds.append(1)
+        with self.assertRaisesRegexp(Exception, "The filter already has values"):
+            sma.setState(ma.SMA(dataseries.SequenceDataSeries(), 3).getState())
+        with self.assertRaisesRegexp(Exception, "The state doesn't match the event window"):
+            ma.SMA(dataseries.SequenceDataSeries(), 4).setState(sma.getState())
+        with self.assertRaisesRegexp(Exception, "The state doesn't match the event window"):
+            ma.EMA(dataseries.SequenceDataSeries(), 3).setState(sma.getState())
@@ -20,6 +20,7 @@
 
 import datetime
 
+from six.moves import collections_abc
 from six.moves import xrange
 
 from . import common
@@ -301,6 +302,25 @@ class NumPyDequeTestCase(CollectionTestCaseBase):
             d.append(i)
         self.assertEqual(d[0:3].sum(), 3)
 
+    def testSlidingWindow(self):
+        for maxLen in [1, 2, 5]:
+            d = collections.NumPyDeque(maxLen)
+            expected = []
+            for i in xrange(maxLen * 5 + 3):
+                d.append(i)
+                expected = (expected + [i])[-maxLen:]
+                self.assertEqual(len(d), len(expected))
+                self.assertEqual(d.data().tolist(), expected)
+                self.assertEqual(d[-1], i)
+
+    def testDataIsContiguousView(self):
+        d = collections.NumPyDeque(10)
+        for i in xrange(25):
+            d.append(i)
+            data = d.data()
+            self.assertTrue(data.flags["C_CONTIGUOUS"])
+            self.assertIsNotNone(data.base)
+
 
 class ListDequeTestCase(CollectionTestCaseBase):
     def buildCollection(self, maxLen):
@@ -316,6 +336,97 @@ class ListDequeTestCase(CollectionTestCaseBase):
         CollectionTestCaseBase._testResizeEmptyImpl(self)
 
 
+class RingDequeTestCase(CollectionTestCaseBase):
+    def buildCollection(self, maxLen):
+        return collections.RingDeque(maxLen)
+
+    def testBasicOps(self):
+        CollectionTestCaseBase._testBasicOpsImpl(self)
+
+    def testResize(self):
+        CollectionTestCaseBase._testResizeImpl(self)
+
+    def testResizeEmpty(self):
+        CollectionTestCaseBase._testResizeEmptyImpl(self)
+
+    def testMatchesList(self):
+        maxLen = 7
+        d = collections.RingDeque(maxLen)
+        expected = []
+        for i in xrange(30):
+            d.append(i)
+            expected = (expected + [i])[-maxLen:]
+            self.assertEqual(d.data(), expected)
+            for key in xrange(-len(expected), len(expected)):
+                self.assertEqual(d[key], expected[key])
+            for begin in [None, -9, -3, -1, 0, 2, 5, 9]:
+                for end in [None, -9, -4, -1, 0, 3, 6, 9]:
+                    for step in [None, 1, 2, -1, -2]:
+                        self.assertEqual(d[begin:end:step], expected[begin:end:step])
+
+    def testDataView(self):
+        d = collections.RingDeque(3)
+        data = d.data()
+        self.assertEqual(data, [])
+        for i in xrange(5):
+            d.append(i)
+        # The view is not a copy, so it reflects the values appended later.
+        self.assertTrue(d.data() is data)
+        self.assertEqual(data, [2, 3, 4])
+        self.assertNotEqual(data, [2, 3])
+        self.assertEqual(len(data), 3)
+        self.assertEqual(list(data), [2, 3, 4])
+        self.assertEqual(data[-1], 4)
+        self.assertEqual(data[1:], [3, 4])
+        self.assertEqual(repr(data), "[2, 3, 4]")
+        self.assertTrue(isinstance(data, collections_abc.Sequence))
+        self.assertEqual(data, (2, 3, 4))
+        self.assertNotEqual(data, "234")
+
+    def testInvalidKeys(self):
+        d = collections.RingDeque(3)
+        for i in xrange(5):
+            d.append(i)
+        with self.assertRaises(IndexError):
+            d[3]
+        with self.assertRaises(IndexError):
+            d[-4]
+        with self.assertRaises(TypeError):
+            d[1.0]
+
+
+class RollingExtremumTestCase(common.TestCase):
+    def __testMatchesWindow(self, values, windowSize, useMin):
+        extremum = collections.RollingExtremum(windowSize, useMin)
+        self.assertEqual(extremum.getValue(), None)
+        for i, value in enumerate(values):
+            extremum.append(value)
+            window = values[max(i + 1 - windowSize, 0):i + 1]
+            self.assertEqual(len(extremum), len(window))
+            if any(v != v for v in window):
+                self.assertTrue(extremum.getValue() != extremum.getValue())
+            elif useMin:
+                self.assertEqual(extremum.getValue(), min(window))
+            else:
+                self.assertEqual(extremum.getValue(), max(window))
+
+    def testMatchesWindow(self):
+        values = [(i * 7919) % 101 for i in xrange(500)]
+        for windowSize in [1, 2, 5, 50, 250]:
+            for useMin in [True, False]:
+                self.__testMatchesWindow(values, windowSize, useMin)
+
+    def testMonotonicValues(self):
+        for values in [list(xrange(200)), list(xrange(200, 0, -1)), [1] * 200]:
+            for useMin in [True, False]:
+                self.__testMatchesWindow(values, 10, useMin)
+
+    def testNaN(self):
+        values = [1, 5, float("nan"), 2, 3, 1, 0, float("nan"), 4]
+        for useMin in [True, False]:
+            self.__testMatchesWindow(values, 3, useMin)
+
+
 class DateTimeTestCase(common.TestCase):
     def testTimeStampConversions(self):
         dateTime = datetime.datetime(2000, 1, 1)
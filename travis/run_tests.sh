@@ -4,4 +4,4 @@ export LD_LIBRARY_PATH=/usr/local/lib:$LD_LIBRARY_PATH
 # This is needed to avoid "Coverage.py warning: No data was collected" from cov plugin.
 export PYTHONPATH=.
 
-tox -v -e py27
+tox -v -e py27,numba